@@ -35,8 +35,12 @@ called_from = getattr(sys.modules['__main__'], '__file__', '<interactive>')
 in_app = called_from.endswith('plotdevice-app.py')
 in_setup = called_from.endswith('setup.py')
 
+# the drawing api requires PyObjC, but the array-based geometry in plotdevice.lib can
+# still be imported (and tested) on platforms without it
+headless = sys.platform != 'darwin'
+
 # don't mess with sys.path during builds
-if not in_setup:
+if not (in_setup or headless):
     # add the shared directory (for Libraries) to the path
     sys.path.append(os.path.join(os.getenv('HOME'), 'Library', 'Application Support', 'PlotDevice'))
 
@@ -47,7 +51,7 @@ if not in_setup:
     objc.setVerbose(True)
 
 # populate the namespace (or don't) depending on the context
-if in_app or in_setup:
+if in_app or in_setup or headless:
     # if a script imports * from within the app, nothing should be (re-)added to the
     # global namespace. we'll let the Sandbox handle populating the namespace instead.
     __all__ = []
@@ -2,13 +2,15 @@
 import os, re, types
 from contextlib import contextmanager
 from collections import namedtuple, OrderedDict
+import numpy as np
 from os.path import exists, expanduser
 from objc import super
 
 from .lib.cocoa import *
 from .lib import pathmatics
+from .lib.spatial import SpatialHash
 from .util import _copy_attr, _copy_attrs, _flatten, trim_zeroes, numlike, autorelease
-from .gfx.geometry import Dimension, parse_coords
+from .gfx.geometry import Dimension, parse_coords, match_coords
 from .gfx.typography import Layout
 from .gfx import *
 from . import gfx, lib, util, Halted, DeviceError
@@ -237,9 +239,10 @@ class Context(object):
             pass
 
         Bezier.validate(kwargs)
-        if isinstance(x, (list, tuple, Bezier)):
-            # if the first arg is an iterable of point tuples or an existing Bezier, apply
-            # the `close` kwarg immediately since the path is already fully-specified
+        if isinstance(x, (list, tuple, np.ndarray, PointArray, Bezier)):
+            # if the first arg is an iterable of point tuples, an (N,2) array of points (or a
+            # PointArray), or an existing Bezier, apply the `close` kwarg immediately since the
+            # path is already fully-specified
             pth = Bezier(path=x, **kwargs)
             pth._autoclose()
         else:
@@ -345,13 +348,12 @@ class Context(object):
         close = kwargs.pop('close', False)
         radius = kwargs.pop('radius', None)
         x2 = y2 = None
-        try:
-            (x1,y1), (x2,y2), radius = parse_coords(coords, [Point,Point,float])
-        except:
-            try:
-                (x1,y1), (x2,y2) = parse_coords(coords, [Point,Point])
-            except:
-                (x1,y1) = parse_coords(coords, [Point])
+        found = match_coords(coords, [Point,Point,float], [Point,Point], [Point])
+        (x1,y1) = found[0]
+        if len(found) > 1:
+            (x2,y2) = found[1]
+        if len(found) > 2:
+            radius = found[2]
 
         if self._path is None:
             raise DeviceError("No active path. Use bezier() or beginpath() first.")
@@ -377,11 +379,9 @@ class Context(object):
         either a single float (specifying the corner radius in canvas units) or a
         2-tuple with the radii for the x- and y-axis respectively.
         """
-        try:
-            (x,y), (w,h), roundness = parse_coords(coords, [Point,Size,float])
-        except:
-            (x,y), (w,h) = parse_coords(coords, [Point,Size])
-            roundness = 0
+        found = match_coords(coords, [Point,Size], [Point,Size,float])
+        (x,y), (w,h) = found[:2]
+        roundness = found[2] if len(found) > 2 else 0
         roundness = kwargs.pop('roundness', roundness)
         radius = kwargs.pop('radius', None)
         if roundness > 0:
@@ -538,7 +538,7 @@ class Context(object):
 
     def drawpath(self, path, **kwargs):
         Bezier.validate(kwargs)
-        if isinstance(path, (list, tuple)):
+        if isinstance(path, (list, tuple, np.ndarray, PointArray)):
             path = Bezier(path, **kwargs)
         else: # Set the values in the current bezier path with the kwargs
             for arg_key, arg_val in kwargs.items():
@@ -551,6 +551,18 @@ class Context(object):
     def findpath(self, points, curvature=1.0):
         return pathmatics.findpath(points, curvature=curvature)
 
+    def union(self, *paths, **kwargs):
+        """Merge any number of Beziers (or a list of them) into a single path and plot it."""
+        draw = self._should_plot(kwargs)
+        flatness = kwargs.pop('flatness', 0.6)
+        if len(paths) == 1 and not isinstance(paths[0], Bezier):
+            paths = paths[0]
+        Bezier.validate(kwargs)
+        pth = Bezier.union_all(paths, flatness, **kwargs)
+        if draw:
+            pth.draw()
+        return pth
+
     ### Transformation Commands ###
 
     def push(self):
@@ -1431,13 +1443,13 @@ class Context(object):
 
         # if there are any positional args following the grob, assign a new x/y (and possibly w/h)
         if coords:
-            try:
-                (grob.x, grob.y), (grob.width, grob.height) = parse_coords(coords, [Point,Size])
-            except:
-                try:
-                    (grob.x, grob.y), grob.width = parse_coords(coords, [Point,float])
-                except:
-                    grob.x, grob.y = parse_coords(coords, [Point])
+            found = match_coords(coords, [Point,Size], [Point,float], [Point])
+            grob.x, grob.y = found[0]
+            if len(found) > 1:
+                if isinstance(found[1], Size):
+                    grob.width, grob.height = found[1]
+                else:
+                    grob.width = found[1]
 
         # for any valid kwargs, assign the value to the attr of the same name
         grob.__class__.validate(kwargs)
@@ -1646,6 +1658,42 @@ class _PostScriptView(NSView):
     def isFlipped(self):
         return True
 
+def _placement(grob):
+    """Returns the bounds of a grob once its transform has been applied (along with its
+    transformed outline if it's a Bezier or None otherwise)"""
+    # the screen transform maps the grob's pixel-unit geometry to its final position, so
+    # factor out where it would have been drawn with an identity transform, then convert
+    # between canvas- and pixel-units on either side
+    screen = getattr(grob, '_screen_transform', None)
+    if screen is None:
+        return grob.bounds, None
+    saved, grob._transform = grob._transform, Transform()
+    try:
+        unmoved = grob._screen_transform
+    finally:
+        grob._transform = saved
+    xf = Transform(grob._grid.from_px)
+    xf.prepend(screen)
+    xf.prepend(unmoved.inverse)
+    xf.prepend(grob._grid.to_px)
+
+    if isinstance(grob, Bezier):
+        outline = xf.apply(grob)
+        return outline.bounds, outline
+    (x, y), (w, h) = grob.bounds
+    corners = xf.apply_array(np.array([(x, y), (x+w, y), (x+w, y+h), (x, y+h)], dtype=np.float64))
+    (x0, y0), (x1, y1) = corners.min(axis=0), corners.max(axis=0)
+    return Region(x0, y0, x1-x0, y1-y0), None
+
+def _placement_key(grob):
+    """Returns the state that a grob's placement depends on (letting a cached index of the
+    canvas notice when a grob has been moved or edited since it was added)"""
+    xf = getattr(grob, '_transform', None)
+    key = (getattr(xf, '_matrix', None), getattr(grob, '_transformmode', None))
+    if isinstance(grob, Bezier):
+        return key + (grob._pathdata, grob._pathdata.version)
+    return key + (grob.bounds,)
+
 class Canvas(object):
 
     def __init__(self, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, unit=px):
@@ -1666,6 +1714,7 @@ class Canvas(object):
 
     def clear(self, *grobs):
         """Erase the canvas entirely (or remove specified grobs)"""
+        self._index = None
         if not grobs:
             self._grobs = self._container = []
             self._stack = [self._container]
@@ -1713,10 +1762,12 @@ class Canvas(object):
         # when beziers, images, and text are added, they're placed in the current
         # tail of the container stack (see push/pop)
         self._container.append(el)
+        self._index = None
 
     def push(self, containerFrob):
         # when Frobs like Stencils or Effects are added, they become their own container
         # that applies to all grobs drawn until the frob is popped off the stack
+        self._index = None
         self._stack.insert(0, containerFrob)
         self._container.append(containerFrob)
         self._container = containerFrob
@@ -1728,6 +1779,37 @@ class Canvas(object):
         except IndexError as e:
             raise DeviceError("pop: too many canvas pops!")
 
+    def overlapping(self, *args):
+        """Returns a list of the grobs on the canvas whose bounds overlap a Region
+
+        Grobs are compared based on where their transforms have placed them on the canvas.
+        Beziers are only included if their outlines actually intersect the region (but
+        Images and Text are matched based on their bounding boxes). The grobs' bounds are
+        indexed in a spatial hash that's reused until grobs are added to or removed from the
+        canvas (or any of them are transformed or edited).
+        """
+        region = Region(*args)
+        grobs = [g for g in self._flattened(self._grobs) if hasattr(g, 'bounds')]
+        stamps = [(g, _placement_key(g)) for g in grobs]
+        if self._index is None or self._index[0] != stamps:
+            placed = [_placement(g) for g in grobs]
+            self._index = stamps, SpatialHash([bounds for bounds, outline in placed],
+                                              [(g, outline) for g, (bounds, outline) in zip(grobs, placed)])
+
+        found = self._index[1].query(region)
+        if any(outline is not None for g, outline in found):
+            box = Bezier()
+            box.rect(region.x, region.y, region.w, region.h)
+            found = [(g, outline) for g, outline in found if outline is None or outline.intersects(box)]
+        return [g for g, outline in found]
+
+    def _flattened(self, container):
+        for grob in container:
+            yield grob
+            if hasattr(grob, 'contents'):
+                for nested in self._flattened(grob.contents):
+                    yield nested
+
     def draw(self):
         if self.background is not None:
             rect = ((0,0), self.pagesize)
@@ -1,15 +1,20 @@
 # encoding: utf-8
 import warnings
+from collections import namedtuple
 from ..lib.cocoa import *
 from math import pi, sin, cos, sqrt
+import numpy as np
 
 from plotdevice import DeviceError
 from . import _cg_context
 from .atoms import PenMixin, TransformMixin, ColorMixin, EffectsMixin, Grob
 from .colors import Color, Gradient, Pattern
-from .geometry import CENTER, DEGREES, Transform, Region, Point
+from .geometry import CENTER, DEGREES, Transform, Region, Point, PointArray
 from ..util import trim_zeroes, _copy_attr, _copy_attrs, _flatten, numlike
-from ..lib import pathmatics
+from ..lib import pathmatics, kernels
+from ..lib.pathdata import PathData
+from ..lib.spatial import SpatialHash, bbox_overlaps
+from ..lib.delaunay import Delaunay
 
 _ctx = None
 __all__ = ("Bezier", "Curve", "BezierPath", "PathElement",
@@ -40,32 +45,42 @@ _CAPSTYLE={BUTT:kCGLineCapButt, ROUND:kCGLineCapRound, SQUARE:kCGLineCapSquare}
 NORMAL = "normal"
 FORTYFIVE = "fortyfive"
 
+# counts of cgPath lookups (and the ones that had to compile a new CGPath) for cache_info()
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses'])
+_CGPATH_TALLY = {'lookups':0, 'misses':0}
+
 class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
-    """A Bezier provides a wrapper around NSBezierPath."""
-    stateAttrs = ('_nsBezierPath', '_fulcrum')
+    """A Bezier stores its geometry in a PathData array and renders it via NSBezierPath."""
+    stateAttrs = ('_pathdata', '_fulcrum')
     opts = ('close', 'smooth')
 
     def __init__(self, path=None, **kwargs):
         super(Bezier, self).__init__(**kwargs)
-        self._segment_cache = {} # used by pathmatics
         self._fulcrum = None # centerpoint (set only for center-based primitives)
 
-        # path arg might contain a list of point tuples, a bezier to copy, or a raw
-        # nsbezier reference to use as the backing store. otherwise start with a
-        # fresh path with no points
+        # path arg might contain a list of point tuples, an (N,2) array or PointArray, a
+        # bezier to copy, a raw nsbezier whose elements should be copied, or a PathData
+        # to use as the backing store. otherwise start with a fresh path with no points
         if path is None:
-            self._nsBezierPath = NSBezierPath.bezierPath()
+            self._pathdata = PathData()
         elif isinstance(path, (list,tuple)):
             if isinstance(path[0], Curve):
-                self._nsBezierPath = NSBezierPath.bezierPath()
+                self._pathdata = PathData()
                 self.extend(path)
             else:
                 p = pathmatics.findpath(path, 1.0 if kwargs.get('smooth') else 0.0)
-                self._nsBezierPath = p._nsBezierPath
+                self._pathdata = p._pathdata
+        elif isinstance(path, (np.ndarray, PointArray)):
+            if kwargs.get('smooth'):
+                self._pathdata = pathmatics.findpath(np.asarray(path), 1.0)._pathdata
+            else:
+                self._pathdata = _pathdata_from(PathData.from_points, path)
         elif isinstance(path, Bezier):
             _copy_attrs(path, self, Bezier.stateAttrs)
         elif isinstance(path, NSBezierPath):
-            self._nsBezierPath = path.copy()
+            self._nsBezierPath = path
+        elif isinstance(path, PathData):
+            self._pathdata = path
         else:
             badpath = "Don't know what to do with %s." % path
             raise DeviceError(badpath)
@@ -89,19 +104,83 @@ class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
         clone.inherit(self)
         return clone
 
+    @classmethod
+    def from_points(cls, points, closed=False, **kwargs):
+        """Create a path of straight lines connecting a sequence of points in one pass.
+
+        The points can be an (N,2) numpy array or any object supporting the buffer protocol
+        (e.g., an array.array or memoryview) holding a flat sequence of x,y pairs. If `closed`
+        is True, a closepath will be added after the final point.
+        """
+        return cls(_pathdata_from(PathData.from_points, points, closed), **kwargs)
+
+    @classmethod
+    def voronoi(cls, points, clip=None, **kwargs):
+        """Create a list of paths tracing the Voronoi cell around each of a set of points.
+
+        The points can be a PointArray, an (N,2) array, or a list of Points or x/y tuples.
+        The cells are clipped to the `clip` Region (or, if it's a Bezier, to its outline) and
+        default to the bounding box of the points.
+        """
+        mesh = Delaunay(points)
+        shape = clip if isinstance(clip, Bezier) else None
+        cells = mesh.voronoi(shape.bounds if shape else clip)
+        paths = [PathData.from_points(cell, closed=True) for cell in cells]
+        if shape:
+            paths = [Bezier(path).intersect(shape)._pathdata for path in paths]
+        return [cls(path, **kwargs) for path in paths]
+
+    @classmethod
+    def from_commands(cls, cmds, coords, **kwargs):
+        """Create a path from a sequence of MOVETO, LINETO, CURVETO, & CLOSE commands and
+        an array of the points they consume (one for moves & lines, three for curves, and
+        none for closepaths).
+        """
+        return cls(_pathdata_from(PathData.from_commands, cmds, coords), **kwargs)
+
+    ### Backing store ###
+
+    @property
+    def arrays(self):
+        """A (commands, points) tuple of read-only numpy arrays viewing the path's geometry
+
+        The commands are a uint8 array of MOVETO, LINETO, CURVETO, and CLOSE values. The
+        points are an (N,2) float64 array with one row for each MOVETO or LINETO and three
+        rows (ctrl1, ctrl2, and the endpoint) for each CURVETO. Since the views share memory
+        with the path, they should be copied if they need to outlive subsequent changes.
+        """
+        return self._pathdata.arrays
+
+    def _get_nsBezierPath(self):
+        # the array store is the source of truth, so only assemble an NSBezierPath (and
+        # hang onto it until the next modification) once cocoa needs one for drawing
+        return self._pathdata.cached('nspath', _to_nspath)
+    def _set_nsBezierPath(self, nspath):
+        self._pathdata = _from_nspath(nspath)
+    _nsBezierPath = property(_get_nsBezierPath, _set_nsBezierPath)
+
+    def _append_nspath(self, build, connect=False):
+        """Pass a scratch NSBezierPath to the `build` function and copy the elements it adds
+        into the array store. If `connect` is True, the scratch path will begin with our
+        current point (allowing arcs to draw a line from it to their starting point)."""
+        nspath = NSBezierPath.bezierPath()
+        origin = self._pathdata.current if connect else None
+        if origin is not None:
+            nspath.moveToPoint_(origin)
+        build(nspath)
+        _from_nspath(nspath, self._pathdata, start=0 if origin is None else 1)
+
     ### Path methods ###
 
     def moveto(self, x, y):
-        self._nsBezierPath.moveToPoint_( (x, y) )
+        self._pathdata.moveto(x, y)
 
     def lineto(self, x, y):
-        if self._nsBezierPath.elementCount()==0:
-            # use an implicit 0,0 origin if path doesn't have a prior moveto
-            self._nsBezierPath.moveToPoint_( (0, 0) )
-        self._nsBezierPath.lineToPoint_( (x, y) )
+        # (uses an implicit 0,0 origin if path doesn't have a prior moveto)
+        self._pathdata.lineto(x, y)
 
     def curveto(self, x1, y1, x2, y2, x3, y3):
-        self._nsBezierPath.curveToPoint_controlPoint1_controlPoint2_( (x3, y3), (x1, y1), (x2, y2) )
+        self._pathdata.curveto(x1, y1, x2, y2, x3, y3)
 
     def arcto(self, x1, y1, x2=None, y2=None, radius=None, ccw=False):
         if x2 is not None and y2 is not None:
@@ -112,18 +191,18 @@ class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
             # Take a look at the Adding Arcs section of apple's docs for some important edge cases:
             # https://developer.apple.com/library/mac/documentation/Cocoa/Conceptual/CocoaDrawingGuide/Paths/Paths.html
             radius = 1.0 if radius is None else radius
-            self._nsBezierPath.appendBezierPathWithArcFromPoint_toPoint_radius_( (x1,y1), (x2,y2), radius)
-            self._nsBezierPath.lineToPoint_( (x2,y2) )
+            self._append_nspath(lambda p: p.appendBezierPathWithArcFromPoint_toPoint_radius_( (x1,y1), (x2,y2), radius), connect=True)
+            self.lineto(x2, y2)
         else:
             # create a unitary semicircle...
             k = 0.5522847498 / 2.0
-            p = NSBezierPath.bezierPath()
-            p.moveToPoint_((0,0))
-            p.curveToPoint_controlPoint1_controlPoint2_((.5,-.5), (0,-k), (.5-k,-.5))
-            p.curveToPoint_controlPoint1_controlPoint2_((1,0), (.5+k,-.5), (1,-k))
+            p = PathData()
+            p.moveto(0, 0)
+            p.curveto(0, -k, .5-k, -.5, .5, -.5)
+            p.curveto(.5+k, -.5, 1, -k, 1, 0)
 
             # ...and transform it to match the endpoints
-            src = self._nsBezierPath.currentPoint()
+            src = Point(self._pathdata.current or (0,0))
             theta = pathmatics.angle(src.x, src.y, x1, y1)
             dw = pathmatics.distance(src.x, src.y, x1, y1)
             dh = dw*(-1.0 if ccw else 1.0)
@@ -131,11 +210,11 @@ class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
             t.translate(src.x,src.y)
             t.rotate(-theta)
             t.scale(dw, dh)
-            p.transformUsingAffineTransform_(t._nsAffineTransform)
+            p.transform(t.matrix)
             self.extend(Bezier(p)[1:]) # omit the initial moveto in the semicircle
 
     def closepath(self):
-        self._nsBezierPath.closePath()
+        self._pathdata.closepath()
 
     def _autoclose(self):
         if self._needs_closure:
@@ -146,21 +225,26 @@ class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
 
     def rect(self, x, y, width, height, radius=None):
         if radius is None:
-            self._nsBezierPath.appendBezierPathWithRect_( ((x, y), (width, height)) )
+            # (matches the counterclockwise winding of NSBezierPath's appendBezierPathWithRect)
+            self._pathdata.moveto(x, y)
+            self._pathdata.lineto(x+width, y)
+            self._pathdata.lineto(x+width, y+height)
+            self._pathdata.lineto(x, y+height)
+            self._pathdata.closepath()
         else:
             if numlike(radius):
                 radius = (radius, radius)
             elif not isinstance(radius, (list, tuple)) or len(radius)!=2:
                 badradius = 'the radius for a rect must be either a number or an (x,y) tuple'
                 raise DeviceError(badradius)
-            self._nsBezierPath.appendBezierPathWithRoundedRect_xRadius_yRadius_( ((x,y), (width,height)), *radius)
+            self._append_nspath(lambda p: p.appendBezierPathWithRoundedRect_xRadius_yRadius_( ((x,y), (width,height)), *radius))
 
     def oval(self, x, y, width, height, rng=None, ccw=False, close=False):
         # range = None:      draw a full ellipse
         # range = 180:       draws a semicircle
         # range = (90, 180): draws a quadrant in the lower left
         if rng is None:
-            self._nsBezierPath.appendBezierPathWithOvalInRect_( ((x, y), (width, height)) )
+            self._append_nspath(lambda p: p.appendBezierPathWithOvalInRect_( ((x, y), (width, height)) ))
         else:
             # convert angles from canvas units to degrees
             if numlike(rng):
@@ -176,11 +260,12 @@ class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
             t = Transform()
             t.translate(x,y)
             t.scale(width, height)
-            p.transformUsingAffineTransform_(t._nsAffineTransform)
-            self._nsBezierPath.appendBezierPath_(p)
+            arc = _from_nspath(p)
+            arc.transform(t.matrix)
+            self._pathdata.extend(arc)
             if close:
                 # optionally close the path with a chord
-                self._nsBezierPath.closePath()
+                self.closepath()
             self._fulcrum = Point(x+width/2, y+width/2)
     ellipse = oval
 
@@ -189,8 +274,8 @@ class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
             self.moveto(x1,y1)
             self.arcto(x2,y2, ccw=ccw)
         else:
-            self._nsBezierPath.moveToPoint_( (x1, y1) )
-            self._nsBezierPath.lineToPoint_( (x2, y2) )
+            self.moveto(x1, y1)
+            self.lineto(x2, y2)
 
     ### Radial shapes (center + radius) ###
 
@@ -220,10 +305,10 @@ class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
 
         # walk around the circle adding points with proper scale/origin
         points = [ [radius*cos(theta)+x, radius*sin(theta)+y] for theta in angles]
-        self._nsBezierPath.moveToPoint_(points[0])
+        self.moveto(*points[0])
         for pt in points[1:]:
-            self._nsBezierPath.lineToPoint_(pt)
-        self._nsBezierPath.closePath()
+            self.lineto(*pt)
+        self.closepath()
         self._fulcrum = Point(x,y)
 
     def arc(self, x, y, r, rng=None, ccw=False, close=False):
@@ -240,11 +325,11 @@ class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
             start, end = _ctx._angle(start, DEGREES), _ctx._angle(end, DEGREES)
 
             # note that we're negating the ccw arg because the path is being drawn in flipped coords
-            self._nsBezierPath.appendBezierPathWithArcWithCenter_radius_startAngle_endAngle_clockwise_((x,y), r, start, end, ccw)
+            self._append_nspath(lambda p: p.appendBezierPathWithArcWithCenter_radius_startAngle_endAngle_clockwise_((x,y), r, start, end, ccw), connect=True)
         if close:
             # optionally close the path pac-man-style
-            self._nsBezierPath.lineToPoint_( (x,y) )
-            self._nsBezierPath.closePath()
+            self.lineto(x, y)
+            self.closepath()
         self._fulcrum = Point(x,y)
 
     def star(self, x, y, points=20, outer=100, inner=None):
@@ -252,12 +337,11 @@ class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
         if inner is None:
             inner = outer * 0.5
 
-        self._nsBezierPath.moveToPoint_( (x, y+outer) )
+        self.moveto(x, y+outer)
         for i in range(1, int(2 * points)):
           angle = i * pi / points
           radius = inner if i % 2 else outer
-          pt = (x+radius*sin(angle), y+radius*cos(angle))
-          self._nsBezierPath.lineToPoint_(pt)
+          self.lineto(x+radius*sin(angle), y+radius*cos(angle))
         self.closepath()
         self._fulcrum = Point(x,y)
 
@@ -298,21 +382,31 @@ class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
     def __getitem__(self, index):
         if isinstance(index, slice):
             # slice-based access
-            pts = [self._nsBezierPath.elementAtIndex_associatedPoints_(i) for i in range(*index.indices(len(self)))]
-            return [Curve(cmd, el) for cmd,el in pts]
+            return [Curve(cmd, pts) for cmd, pts in self._pathdata[index]]
         else:
             # index-based access
-            cmd, el = self._nsBezierPath.elementAtIndex_associatedPoints_(index)
-            return Curve(cmd, el)
+            cmd, pts = self._pathdata[index]
+            return Curve(cmd, pts)
 
     def __iter__(self):
-        for i in range(len(self)):
-            yield self[i]
+        for cmd, pts in self._pathdata:
+            yield Curve(cmd, pts)
 
     def __len__(self):
-        return self._nsBezierPath.elementCount()
+        return len(self._pathdata)
 
     def extend(self, pathElements):
+        if isinstance(pathElements, Bezier):
+            # copy the other path's arrays wholesale rather than element-by-element
+            self._pathdata.extend(pathElements._pathdata)
+            self._fulcrum = None
+            return
+        elif isinstance(pathElements, (np.ndarray, PointArray)):
+            # add the points as lines in bulk
+            _pathdata_from(self._pathdata.polyline, pathElements)
+            self._fulcrum = None
+            return
+
         for el in pathElements:
             if isinstance(el, (list, tuple)):
                 x, y = el
@@ -347,11 +441,18 @@ class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
 
     @property
     def bounds(self):
-        try:
-            return Region(self._nsBezierPath.bounds())
-        except:
-            # Path is empty -- no bounds
-            return Region()
+        """The smallest Region enclosing the path (but not necessarily its control points)"""
+        return self.tight_bounds
+
+    @property
+    def tight_bounds(self):
+        """The smallest Region enclosing the path (based on its curves' extrema)"""
+        return Region._from_rect(self._pathdata.cached('bounds', kernels.extents))
+
+    @property
+    def control_bounds(self):
+        """The smallest Region enclosing all of the path's points and control points"""
+        return Region._from_rect(self._pathdata.cached('control_bounds', _control_extents))
 
     @property
     def center(self):
@@ -364,6 +465,15 @@ class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
     def contains(self, x, y):
         return self._nsBezierPath.containsPoint_((x,y))
 
+    def contains_many(self, points, evenodd=False, tolerance=0.1):
+        """Returns a boolean array flagging which of a set of points fall inside the path
+
+        The points can be a PointArray, an (N,2) array, or a list of Points or x/y tuples.
+        They're tested with the nonzero winding rule (matching contains()) unless `evenodd`
+        is True. Curves are approximated by lines within `tolerance` of them.
+        """
+        return pathmatics.contains_many(self, points, evenodd, tolerance)
+
     @property
     def _screen_transform(self):
         """Returns the Transform object that will be used to draw the path."""
@@ -382,8 +492,23 @@ class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
 
     @property
     def cgPath(self):
-        # transform the path's points from canvas- to postscript-units and return a CGPathRef
-        return pathmatics.convert_path(self._to_px(self._nsBezierPath))
+        # transform the path's points from canvas- to postscript-units and return a CGPathRef.
+        # the result is cached with the geometry (which copies share until they're modified)
+        # so redrawing an unchanged path doesn't have to walk its elements again
+        def compile(data):
+            _CGPATH_TALLY['misses'] += 1
+            return pathmatics.convert_path(self._to_px(self._nsBezierPath))
+        _CGPATH_TALLY['lookups'] += 1
+        return self._pathdata.cached(('cgpath', self._grid.dpx), compile)
+
+    @classmethod
+    def cache_info(cls, reset=False):
+        """Returns a (hits, misses) tuple counting how often drawing reused a compiled CGPath
+        rather than building a new one (and zeroes the counts if `reset` is True)"""
+        info = CacheInfo(_CGPATH_TALLY['lookups'] - _CGPATH_TALLY['misses'], _CGPATH_TALLY['misses'])
+        if reset:
+            _CGPATH_TALLY.update(lookups=0, misses=0)
+        return info
 
     def _draw(self):
         with _cg_context() as port:
@@ -453,9 +578,18 @@ class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
             else:
                 t.scale(min(width /pw, height / ph))
         t.translate(-px, -py)
-        self._nsBezierPath = t.apply(self)._nsBezierPath
-        self._fulcrum = t.apply(self._fulcrum) if self._fulcrum else None
-        self._segment_cache = {}
+        self.transform_inplace(t)
+
+    def transform_inplace(self, t):
+        """Applies a Transform (or 6-element matrix) to the path's points in place.
+
+        Unlike Transform.apply(), no new Bezier is created: the coordinates are updated
+        within the path's existing buffer.
+        """
+        xf = t if isinstance(t, Transform) else Transform(t)
+        self._pathdata.transform(xf._matrix)
+        if self._fulcrum:
+            self._fulcrum = xf.transformPoint(self._fulcrum)
 
     def _get_x(self):
         return getattr(self._fulcrum or self.bounds.origin.x, 'x')
@@ -475,51 +609,157 @@ class Bezier(EffectsMixin, TransformMixin, ColorMixin, PenMixin, Grob):
 
     ### Mathematics ###
 
-    def segmentlengths(self, relative=False, n=10):
-        if relative: # Use the opportunity to store the segment cache.
-            key = (len(self), self.bounds)
-            if key not in self._segment_cache:
-                self._segment_cache = {key:pathmatics.segment_lengths(self, relative=True, n=n)}
-            return self._segment_cache[key]
-        else:
-            return pathmatics.segment_lengths(self, relative=False, n=n)
+    def segmentlengths(self, relative=False, n=None, tolerance=None):
+        # (the lengths are cached by the path's store until its next modification)
+        return pathmatics.segment_lengths(self, relative=relative, n=n, tolerance=tolerance)
+
+    @property
+    def length(self):
+        return pathmatics.length(self)
+
+    def point(self, t, tolerance=None):
+        return pathmatics.point(self, t, tolerance=tolerance)
+
+    def points(self, amount=100, tolerance=None):
+        return pathmatics.points(self, amount, tolerance=tolerance)
+
+    def sample(self, amount=None, spacing=None, tolerance=0.01):
+        return pathmatics.sample(self, amount, spacing, tolerance)
+
+    def flatten(self, tolerance=0.5):
+        return pathmatics.flatten(self, tolerance)
+
+    def simplify(self, tolerance=0.5):
+        """Replace runs of vertices with fitted curves (or lines) that pass within `tolerance`
+        of the originals. Returns the ratio of the old vertex count to the new one."""
+        return self._reduce(pathmatics.simplify(self, tolerance))
+
+    def decimate(self, tolerance=0.5):
+        """Remove vertices that can be dropped without moving the lines by more than
+        `tolerance`. Returns the ratio of the old vertex count to the new one."""
+        return self._reduce(pathmatics.decimate(self, tolerance))
+
+    def outline(self, width=None, join=None, cap=None, tolerance=0.1):
+        """Return a closed path covering the area that stroking this one would paint.
+
+        The `width`, `join`, and `cap` default to the path's strokewidth, joinstyle, and
+        capstyle. Curves & round joins are approximated to within `tolerance`.
+        """
+        return pathmatics.outline(self, width, join, cap, tolerance)
+
+    def offset(self, distance, join=MITER, tolerance=0.1):
+        """Return a path running parallel to this one at a given distance.
+
+        Closed contours grow by `distance` (or shrink if it's negative) while open ones are
+        shifted to their left (or right) side.
+        """
+        return pathmatics.offset(self, distance, join, tolerance)
+
+    def _reduce(self, path):
+        # swap in the reduced geometry and compare the number of on-curve points
+        before, after = [np.count_nonzero(p._pathdata.arrays[0] != CLOSE) for p in (self, path)]
+        self._pathdata = path._pathdata
+        return before / float(max(after, 1))
 
     @property
-    def length(self, segmented=False, n=10):
-        return pathmatics.length(self, segmented=segmented, n=n)
+    def area(self):
+        return pathmatics.area(self)
 
-    def point(self, t):
-        return pathmatics.point(self, t)
+    @property
+    def centroid(self):
+        return pathmatics.centroid(self)
 
-    def points(self, amount=100):
-        if len(self) == 0:
-            empty = "The given path is empty"
-            raise DeviceError(empty)
+    @property
+    def orientation(self):
+        return pathmatics.orientation(self)
 
-        count = int(amount) # make sure we don't choke on a float
-        delta = 1.0/max(1, count-1) # div by count-1 so the last point is at t=1.0
-        for i in range(count):
-            yield pathmatics.point(self, delta*i)
+    def hull(self, tolerance=0.5):
+        return pathmatics.hull(self, tolerance)
 
     def addpoint(self, t):
-        self._nsBezierPath = pathmatics.insert_point(self, t)._nsBezierPath
+        self._pathdata = pathmatics.insert_point(self, t)._pathdata
+
+    def addpoints(self, ts):
+        """Add a point at each of a sequence of t values without changing the path's shape"""
+        self._pathdata = pathmatics.insert_points(self, ts)._pathdata
 
     ### Clipping operations ###
 
     def intersects(self, other):
-        return pathmatics.intersects(self._nsBezierPath, other._nsBezierPath)
+        return pathmatics.intersects(self, other)
+
+    def intersects_any(self, others):
+        """Returns True if the path intersects any of the others
+
+        The `others` can be a sequence of Beziers or a SpatialHash whose items are Beziers.
+        The exact (and comparatively slow) intersection test is only run against paths
+        whose bounds overlap this one's.
+        """
+        bounds = self.bounds
+        if isinstance(others, SpatialHash):
+            candidates = others.query(bounds)
+        else:
+            others = list(others)
+            boxes = [o.bounds._rect for o in others]
+            candidates = [others[i] for i in np.flatnonzero(bbox_overlaps(boxes, bounds))]
+        return any(self.intersects(other) for other in candidates)
 
     def union(self, other, flatness=0.6):
-        return Bezier(pathmatics.union(self._nsBezierPath, other._nsBezierPath, flatness))
+        return pathmatics.union(self, other, flatness)
 
     def intersect(self, other, flatness=0.6):
-        return Bezier(pathmatics.intersect(self._nsBezierPath, other._nsBezierPath, flatness))
+        return pathmatics.intersect(self, other, flatness)
 
     def difference(self, other, flatness=0.6):
-        return Bezier(pathmatics.difference(self._nsBezierPath, other._nsBezierPath, flatness))
+        return pathmatics.difference(self, other, flatness)
 
     def xor(self, other, flatness=0.6):
-        return Bezier(pathmatics.xor(self._nsBezierPath, other._nsBezierPath, flatness))
+        return pathmatics.xor(self, other, flatness)
+
+    @classmethod
+    def union_all(cls, paths, flatness=0.6, **kwargs):
+        """Create a path covering the combined area of a sequence of Beziers.
+
+        All the paths are merged in a single pass, which is considerably faster than
+        calling union() on each of them in turn. Curves are flattened into line segments
+        lying within `flatness` of the originals.
+        """
+        return cls(pathmatics.union_all(paths, flatness)._pathdata, **kwargs)
+
+def _control_extents(data):
+    return kernels.extents(data, tight=False)
+
+def _pathdata_from(constructor, *args):
+    # report malformed array input as a DeviceError (like the rest of the drawing api)
+    try:
+        return constructor(*args)
+    except ValueError as e:
+        raise DeviceError(str(e))
+
+### NSBezierPath conversion ###
+
+def _to_nspath(pathdata):
+    """Returns an NSBezierPath with the same elements as a PathData"""
+    nspath = NSBezierPath.bezierPath()
+    for cmd, pts in pathdata:
+        if cmd == MOVETO:
+            nspath.moveToPoint_(pts[0])
+        elif cmd == LINETO:
+            nspath.lineToPoint_(pts[0])
+        elif cmd == CURVETO:
+            nspath.curveToPoint_controlPoint1_controlPoint2_(pts[2], pts[0], pts[1])
+        elif cmd == CLOSE:
+            nspath.closePath()
+    return nspath
+
+def _from_nspath(nspath, pathdata=None, start=0):
+    """Copies the elements of an NSBezierPath (beginning at index `start`) into a PathData"""
+    if pathdata is None:
+        pathdata = PathData(nspath.elementCount() or 1)
+    for i in range(start, nspath.elementCount()):
+        cmd, pts = nspath.elementAtIndex_associatedPoints_(i)
+        pathdata.append(cmd, [(pt.x, pt.y) for pt in pts])
+    return pathdata
 
 class Curve(object):
 
@@ -302,8 +302,14 @@ class Stencil(Frob):
         port = _cg_port()
 
         if hasattr(self, 'path'):
+            # hang onto the transformed path (and thus its compiled CGPath) between uses,
+            # keeping just the most recent one so a moving stencil doesn't accumulate copies
             path_xf = self.path._screen_transform
-            cg_path = path_xf.apply(self.path).cgPath
+            data = self.path._pathdata
+            placed = (data, data.version, path_xf._matrix)
+            if getattr(self, '_screen', (None,))[0] != placed:
+                self._screen = (placed, path_xf.apply(self.path))
+            cg_path = self._screen[1].cgPath
             CGContextBeginPath(port)
             if self.evenodd:
                 # if inverted, knock the path out of a full-screen rect and clip with that
@@ -4,18 +4,22 @@ import re
 import json
 import warnings
 import math
+import numpy as np
 from operator import neg
+from weakref import WeakValueDictionary
 from ..lib.cocoa import *
 
 from plotdevice import DeviceError
 from ..util import trim_zeroes, numlike
 from ..lib import pathmatics
+from ..lib.pathdata import affine, transform_all
+from ..lib.vectors import PairArray, PointArray, SizeArray, RegionArray, rect_union, rect_intersect
 
 _ctx = None
 __all__ = [
         "DEGREES", "RADIANS", "PERCENT",
         "px", "inch", "pica", "cm", "mm", "pi", "tau",
-        "Point", "Size", "Region",
+        "Point", "FixedPoint", "Size", "Region", "PointArray", "SizeArray", "RegionArray",
         "Transform", "CENTER", "CORNER",
         ]
 
@@ -36,19 +40,23 @@ tau = 2*pi
 
 def paired(func):
     def to_pair(self, other=None):
+        cls = self._arithmetic or self.__class__
         if other is None:
-            return self.__class__(func(self))
+            return cls(func(self))
+        if isinstance(other, PairArray):
+            return NotImplemented # let the array apply the op element-wise
         if numlike(other):
-            other = self.__class__(other, other)
-        elif not isinstance(other, self.__class__):
-            other = self.__class__(other)
-        return self.__class__(func(self, other))
+            other = cls(other, other)
+        elif not isinstance(other, cls):
+            other = cls(other)
+        return cls(func(self, other))
     return to_pair
 
 class Pair(object):
     """Base class for Point & Size objects (with basic arithmetic support)"""
     __slots__ = '_a', '_b'
     __hash__ = None
+    _arithmetic = None # the class of the results of math ops (if not the same as the operands')
 
     def __iter__(self):
         # allow for assignments like: x,y = Point()
@@ -169,6 +177,65 @@ class Point(Pair):
     y = property(_get_y, _set_y)
 
 
+class FixedPoint(Point):
+    """An immutable Point that can be used as a dict key or set member
+
+    FixedPoints hash & compare equal to (x, y) tuples with the same coordinates. Use the
+    FixedPoint.snap() classmethod to round coordinates to a grid and share a single
+    instance between all the points that land in the same cell.
+    """
+    __slots__ = '_hash', '__weakref__'
+    _interned = WeakValueDictionary()
+    _arithmetic = Point # sums, products, etc. are ordinary (mutable) Points
+
+    def __init__(self, *vals, **kwargs):
+        if len(vals) == 2:
+            x, y = vals
+        elif vals:
+            try:
+                x, y = vals[0]
+            except:
+                baddims = 'FixedPoint requires a single coordinate pair'
+                raise DeviceError(baddims)
+        else:
+            x, y = kwargs.get('x', 0), kwargs.get('y', 0)
+        if not (numlike(x) and numlike(y)):
+            raise DeviceError('FixedPoint: coordinates must be int or float (not %r)'%type(x if not numlike(x) else y))
+        self._a, self._b = float(x), float(y)
+        self._hash = hash((self._a, self._b))
+
+    @classmethod
+    def snap(cls, x, y=None, grid=1.0):
+        """Returns the shared FixedPoint for the grid position closest to x,y (or a Point)"""
+        if y is None:
+            x, y = x
+        key = (round(x/grid)*grid, round(y/grid)*grid)
+        try:
+            return cls._interned[key]
+        except KeyError:
+            pt = cls._interned[key] = cls(*key)
+            return pt
+
+    @trim_zeroes
+    def __repr__(self):
+        return "FixedPoint(%.3f, %.3f)" % (self._a, self._b)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if isinstance(other, FixedPoint):
+            return self._hash == other._hash and self._a == other._a and self._b == other._b
+        return Pair.__eq__(self, other)
+
+    def copy(self):
+        return self
+
+    def _frozen(self, val):
+        raise DeviceError('FixedPoint coordinates cannot be modified (use a Point instead)')
+    x = property(Point._get_x, _frozen)
+    y = property(Point._get_y, _frozen)
+
 class Size(Pair):
     """Represents a 2D area with `width` and `height` properties"""
     __slots__ = ()
@@ -213,6 +280,9 @@ class Size(Pair):
     h = height = property(_get_h, _set_h)
 
 
+# have the array types return individual elements as Points & Sizes
+PointArray._pair, SizeArray._pair = Point, Size
+
 class Region(object):
     """Represents a rectangular region combining a Point and a Size (as `origin` and `size`)
 
@@ -252,16 +322,13 @@ class Region(object):
                 return
 
             # try to unpack a full rect or at least an origin from the args
-            try:
-                self.origin, self.size = parse_coords(coords, [Point,Size])
-            except Exception as e_orig:
-                try:
-                    self.origin, self.width = parse_coords(coords, [Point,float])
-                except:
-                    try:
-                        self.origin = parse_coords(coords, [Point])
-                    except:
-                        raise e_orig
+            found = match_coords(coords, [Point,Size], [Point,float], [Point])
+            self.origin = found[0]
+            if len(found) > 1:
+                if isinstance(found[1], Size):
+                    self.size = found[1]
+                else:
+                    self.width = found[1]
 
     @trim_zeroes
     def __repr__(self):
@@ -286,28 +353,42 @@ class Region(object):
 
     def union(self, *args):
         """Return a new Region which fully encloses the existing Region and the arguments"""
-        other = Region(*args)
-        return Region(NSUnionRect(self, other))
+        other = _as_region(args)
+        return Region._from_rect(rect_union(self._rect, other._rect))
 
     def intersect(self, *args):
         """Return a new Region with the in-common portion of this Region and the arguments"""
-        other = Region(*args)
-        return Region(NSIntersectionRect(self, other))
+        other = _as_region(args)
+        return Region._from_rect(rect_intersect(self._rect, other._rect))
 
     def shift(self, dx, dy=None):
         """Return a new Region whose origin is shifted by dx/dy or a Point object"""
         try: dx, dy = dx # accept an x/y tuple as 1st arg
         except: dy = dx if dy is None else dy # also accept a single float and copy it
-        return Region(NSOffsetRect(self, dx, dy))
+        x, y, w, h = self._rect
+        return Region._from_rect((x+dx, y+dy, w, h))
 
     def inset(self, dx, dy=None):
         """Return a new Region whose edges are moved `inward' by dx/dy or a Point/Size object"""
         try: dx, dy = dx # accept an x/y tuple as 1st arg
         except: dy = dx if dy is None else dy # also accept a single float and copy it
-        return Region(NSInsetRect(self, dx, dy))
+        x, y, w, h = self._rect
+        return Region._from_rect((x+dx, y+dy, w-2*dx, h-2*dy))
 
     def copy(self):
-        return Region(self)
+        return Region._from_rect(self._rect)
+
+    @classmethod
+    def _from_rect(cls, rect):
+        # build a Region from an x, y, w, h tuple without going through the arg parser
+        x, y, w, h = rect
+        obj = cls.__new__(cls)
+        obj._origin, obj._size = _point(x, y), _size(w, h)
+        return obj
+
+    @property
+    def _rect(self):
+        return (self._origin._a, self._origin._b, self._size._a, self._size._b)
 
     def _get_origin(self):
         return self._origin
@@ -371,6 +452,15 @@ class Region(object):
         self._size.h = bottom - self._origin.y
     b = bottom = property(_get_bottom, _set_bottom)
 
+def _as_region(args):
+    # use a lone Region arg as-is rather than copying it
+    if len(args) == 1 and isinstance(args[0], Region):
+        return args[0]
+    return Region(*args)
+
+# have the array type return individual elements as Regions
+RegionArray._region = Region._from_rect
+
 ### argument destructuring madness (a.k.a. wouldn't multimethods be nice...) ###
 
 def _abort(stream, objs, types, orig):
@@ -379,6 +469,42 @@ def _abort(stream, objs, types, orig):
     invalid = 'Invalid coordinates (looking for %r, found %r in %r)' % (needed, got, orig)
     raise DeviceError(invalid)
 
+# plain number types whose args can be grouped by counting rather than trial & error
+_NUMBERS = frozenset([int, float, np.float64, np.int64])
+
+def _numeric(coords):
+    for c in coords:
+        if type(c) not in _NUMBERS:
+            return False
+    return True
+
+def _arity(types):
+    return sum(1 if cls is float else 2 for cls in types)
+
+def _point(x, y):
+    # skip the Point constructor's validation (the caller has already type-checked x & y)
+    pt = Point.__new__(Point)
+    pt._a, pt._b = float(x), float(y)
+    return pt
+
+def _size(w, h):
+    # mirror Size's setters, which leave zero dimensions as-is
+    sz = Size.__new__(Size)
+    sz._a, sz._b = float(w) if w else w, float(h) if h else h
+    return sz
+
+def _parse_numeric(coords, types):
+    # build the Points, Sizes, and floats for an all-numeric coords list of the proper length
+    objs, i = [], 0
+    for cls in types:
+        if cls is float:
+            objs.append(float(coords[i]))
+            i += 1
+        else:
+            objs.append((_point if cls is Point else _size)(coords[i], coords[i+1]))
+            i += 2
+    return objs
+
 def parse_coords(coords, types):
     """Unpacks (and validates) *args tuples representing sets of geometric or numeric types
 
@@ -388,6 +514,17 @@ def parse_coords(coords, types):
     precisely into the given sequence of types, an exception is raised.
     """
 
+    # when every arg is a plain number, the arg count alone determines whether they fit
+    if _numeric(coords):
+        if len(coords) != _arity(types):
+            _abort(list(coords), [], types, coords)
+        objs = _parse_numeric(coords, types)
+        return objs[0] if len(types) == 1 else objs
+    return _unpack(coords, types)
+
+def _unpack(coords, types):
+    # the general-purpose parser, which handles Regions, Points, Sizes, and tuples in the args
+
     # make a mutable copy we can traverse and an output list to shift into
     stream = list(coords)
     objs = []
@@ -424,6 +561,30 @@ def parse_coords(coords, types):
         return objs[0]
     return objs
 
+def match_coords(coords, *signatures):
+    """Unpacks an *args tuple using the first of several lists of types that fits it
+
+    Each of the `signatures` is a list of types in the form used by parse_coords. Returns the
+    list of objects parsed using the first matching signature (even if it contains just a
+    single type). If none of them match, the error from the first signature is raised.
+    """
+    if _numeric(coords):
+        # pick a signature by arg count rather than by trying each of them in turn
+        for types in signatures:
+            if len(coords) == _arity(types):
+                return _parse_numeric(coords, types)
+        _abort(list(coords), [], signatures[0], coords)
+
+    error = None
+    for types in signatures:
+        try:
+            objs = parse_coords(coords, types)
+        except DeviceError as e:
+            error = error or e
+            continue
+        return objs if len(types) > 1 else [objs]
+    raise error
+
 
 ### Unit-conversions for canvas measurements ###
 
@@ -505,22 +666,27 @@ globals().update({u:Unit(u) for u in Unit._dpx})
 ### NSAffineTransform wrapper used for positioning Grobs in a Context ###
 
 class Transform(object):
+    """An affine transformation matrix stored as a 6-tuple of the form
+    (m11, m12, m21, m22, tX, tY). An NSAffineTransform is only created when the matrix
+    needs to be handed off to Cocoa by set() or concat() (or is asked for by reading the
+    _nsAffineTransform property, after which the two stay linked)."""
 
     def __init__(self, transform=None):
         if transform is None:
-            transform = NSAffineTransform.transform()
+            matrix = _IDENTITY
         elif isinstance(transform, Transform):
-            transform = transform._nsAffineTransform.copy()
+            matrix = transform._matrix
         elif isinstance(transform, NSAffineTransform):
-            transform = transform.copy()
+            matrix = tuple(transform.transformStruct())
         elif isinstance(transform, (list, tuple, NSAffineTransformStruct)):
-            struct = tuple(transform)
-            transform = NSAffineTransform.transform()
-            transform.setTransformStruct_(struct)
+            matrix = tuple(map(float, transform))
+            if len(matrix) != 6:
+                wrongsize = "A transform matrix must have 6 values (got %r)." % (transform,)
+                raise DeviceError(wrongsize)
         else:
             wrongtype = "Don't know how to handle transform %s." % transform
             raise DeviceError(wrongtype)
-        self._nsAffineTransform = transform
+        self._matrix = matrix
 
     def __enter__(self):
         # Transform objects get _rollback attrs when they're derived from the graphics
@@ -550,22 +716,44 @@ class Transform(object):
                  + tuple(self))
 
     def __iter__(self):
-        for value in self._nsAffineTransform.transformStruct():
-            yield value
+        return iter(self._matrix)
 
     def copy(self):
-        return self.__class__(self)
+        return Transform(self)
 
     def _get_matrix(self):
-        return self._nsAffineTransform.transformStruct()
+        return self._matrix
     def _set_matrix(self, value):
-        self._nsAffineTransform.setTransformStruct_(value)
+        self._matrix = _matrix_of(value)
     matrix = property(_get_matrix, _set_matrix)
 
+    def _nsAffineTransformCopy(self):
+        # a new NSAffineTransform with the current matrix (whose later changes won't affect us)
+        xf = NSAffineTransform.transform()
+        xf.setTransformStruct_(self._matrix)
+        return xf
+
+    @property
+    def _nsAffineTransform(self):
+        # hand out an NSAffineTransform that is modified in place by our own mutators (and
+        # whose in-place modifications are reflected in our matrix) by switching over to
+        # keeping the matrix in the Cocoa object from now on
+        xf = self._nsAffineTransformCopy()
+        del self._matrix
+        self.__class__ = _LinkedTransform
+        self._ns = xf
+        return xf
+
     @property
     def inverse(self):
+        m11, m12, m21, m22, tX, tY = self._matrix
+        det = m11*m22 - m12*m21
+        if not det:
+            singular = "Can't invert a transform with a zero determinant: %r" % self
+            raise DeviceError(singular)
         inv = self.copy()
-        inv._nsAffineTransform.invert()
+        inv._matrix = (m22/det, -m12/det, -m21/det, m11/det,
+                       (m21*tY - m22*tX)/det, (m12*tX - m11*tY)/det)
         return inv
 
     def rotate(self, arg=None, **opt):
@@ -596,11 +784,9 @@ class Transform(object):
         if 'percent' in units:
             degrees, radians = 0, tau*units['percent']
 
-        xf = Transform()
-        if degrees:
-            xf._nsAffineTransform.rotateByDegrees_(-degrees)
-        else:
-            xf._nsAffineTransform.rotateByRadians_(-radians)
+        theta = -math.radians(degrees) if degrees else -radians
+        cos, sin = math.cos(theta), math.sin(theta)
+        xf = _transform(cos, sin, -sin, cos, 0.0, 0.0)
         if opt.get('rollback'):
             xf._rollback = {"_transform":self.copy()}
         self.prepend(xf)
@@ -609,8 +795,7 @@ class Transform(object):
     def translate(self, x=0, y=0, **opt):
         if isinstance(x, (Pair, list, tuple)):
             x, y = x
-        xf = Transform()
-        xf._nsAffineTransform.translateXBy_yBy_(x, y)
+        xf = _transform(1.0, 0.0, 0.0, 1.0, x, y)
         if opt.get('rollback'):
             xf._rollback = {"_transform":self.copy()}
         self.prepend(xf)
@@ -621,8 +806,7 @@ class Transform(object):
             x, y = x
         elif y is None:
             y = x
-        xf = Transform()
-        xf._nsAffineTransform.scaleXBy_yBy_(x, y)
+        xf = _transform(x, 0.0, 0.0, y, 0.0, 0.0)
         if opt.get('rollback'):
             xf._rollback = {"_transform":self.copy()}
         self.prepend(xf)
@@ -630,28 +814,25 @@ class Transform(object):
 
     def skew(self, x=0, y=0, **opt):
         x,y = map(_ctx._angle, [x,y]) # convert from canvas units to radians
-        xf = Transform()
-        xf.matrix = (1, math.tan(y), -math.tan(x), 1, 0, 0)
+        xf = _transform(1.0, math.tan(y), -math.tan(x), 1.0, 0.0, 0.0)
         if opt.get('rollback'):
             xf._rollback = {"_transform":self.copy()}
         self.prepend(xf)
         return xf
 
     def set(self):
-        self._nsAffineTransform.set()
+        self._nsAffineTransformCopy().set()
 
     def concat(self):
-        self._nsAffineTransform.concat()
+        self._nsAffineTransformCopy().concat()
 
     def append(self, other):
-        if isinstance(other, Transform):
-            other = other._nsAffineTransform
-        self._nsAffineTransform.appendTransform_(other)
+        """Apply the other transform after the receiver's existing transformation"""
+        self._matrix = _concat(self._matrix, _matrix_of(other))
 
     def prepend(self, other):
-        if isinstance(other, Transform):
-            other = other._nsAffineTransform
-        self._nsAffineTransform.prependTransform_(other)
+        """Apply the other transform before the receiver's existing transformation"""
+        self._matrix = _concat(_matrix_of(other), self._matrix)
 
     def apply(self, obj):
         from .bezier import Bezier
@@ -663,15 +844,61 @@ class Transform(object):
             return self.transformSize(obj)
         elif isinstance(obj, (Region, NSRect)):
             return self.transformRegion(obj)
+        elif isinstance(obj, np.ndarray):
+            return self.apply_array(obj)
+        elif isinstance(obj, PointArray):
+            return obj._wrap(self.apply_array(obj.array))
+        elif isinstance(obj, SizeArray):
+            # sizes are only scaled/rotated/skewed (not translated)
+            return obj._wrap(affine(obj.array, self._matrix[:4] + (0, 0)))
         else:
-            wrongtype = "Can only transform Beziers, Points, Sizes, and Regions"
+            wrongtype = "Can only transform Beziers, Points, Sizes, Regions, and arrays of points or sizes"
             raise DeviceError(wrongtype)
 
+    def apply_array(self, points, inplace=False):
+        """Transform an (N,2) array of points in a single pass
+
+        Returns a new float64 array unless `inplace` is True, in which case the points
+        array (which must be a writable float64 ndarray) is modified and returned.
+        """
+        if inplace and not (isinstance(points, np.ndarray) and points.dtype == np.float64
+                            and points.flags.writeable):
+            badarray = "In-place transformation requires a writable float64 array"
+            raise DeviceError(badarray)
+        try:
+            return affine(points, self._matrix, out=points if inplace else None)
+        except ValueError as e:
+            raise DeviceError(str(e))
+
+    def apply_many(self, paths, inplace=False):
+        """Transform a sequence of Beziers with one vectorized pass over all their points
+
+        Returns a list of transformed copies of the paths unless `inplace` is True, in which
+        case the original Beziers are modified (and returned in a list).
+        """
+        from .bezier import Bezier
+        paths = list(paths)
+        if not all(isinstance(p, Bezier) for p in paths):
+            wrongtype = "Can only transform Beziers"
+            raise DeviceError(wrongtype)
+        if not inplace:
+            paths = [p.copy() for p in paths]
+        transform_all([p._pathdata for p in paths], self._matrix)
+        for p in paths:
+            # keep center-based primitives' centerpoints in sync with their points
+            if p._fulcrum:
+                p._fulcrum = self.transformPoint(p._fulcrum)
+        return paths
+
     def transformPoint(self, point):
-        return Point(self._nsAffineTransform.transformPoint_(tuple(point)))
+        m11, m12, m21, m22, tX, tY = self._matrix
+        x, y = point
+        return Point(m11*x + m21*y + tX, m12*x + m22*y + tY)
 
     def transformSize(self, size):
-        return Size(self._nsAffineTransform.transformSize_(tuple(size)))
+        m11, m12, m21, m22, tX, tY = self._matrix
+        w, h = size
+        return Size(m11*w + m21*h, m12*w + m22*h)
 
     def transformRegion(self, rect):
         origin = self.transformPoint(rect.origin)
@@ -680,7 +907,7 @@ class Transform(object):
 
     def transformBezier(self, path):
         if isinstance(path, NSBezierPath):
-            return self._nsAffineTransform.transformBezierPath_(path)
+            return self._nsAffineTransformCopy().transformBezierPath_(path)
 
         from .bezier import Bezier
         if isinstance(path, Bezier):
@@ -688,7 +915,7 @@ class Transform(object):
         else:
             wrongtype = "Can only transform Beziers"
             raise DeviceError(wrongtype)
-        path._nsBezierPath = self._nsAffineTransform.transformBezierPath_(path._nsBezierPath)
+        path._pathdata.transform(self._matrix)
         return path
 
     def transformBezierPath(self, path):
@@ -699,3 +926,36 @@ class Transform(object):
         warnings.warn("The 'transform' attribute is deprecated. Please use _nsAffineTransform instead.", DeprecationWarning, stacklevel=2)
         return self._nsAffineTransform
 
+class _LinkedTransform(Transform):
+    """A Transform whose matrix lives in the NSAffineTransform that its _nsAffineTransform
+    property returned (so changes made through either one are seen by both)"""
+
+    def _get_linked(self):
+        return tuple(self._ns.transformStruct())
+    def _set_linked(self, matrix):
+        self._ns.setTransformStruct_(matrix)
+    _matrix = property(_get_linked, _set_linked)
+
+    @property
+    def _nsAffineTransform(self):
+        return self._ns
+
+_IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+def _transform(*matrix):
+    # create a Transform without the type-checking done by the constructor
+    xf = Transform.__new__(Transform)
+    xf._matrix = matrix
+    return xf
+
+def _matrix_of(obj):
+    return obj._matrix if isinstance(obj, Transform) else Transform(obj)._matrix
+
+def _concat(first, then):
+    """Returns the matrix that applies the `first` transformation followed by `then`"""
+    a11, a12, a21, a22, atX, atY = first
+    b11, b12, b21, b22, btX, btY = then
+    return (a11*b11 + a12*b21, a11*b12 + a12*b22,
+            a21*b11 + a22*b21, a21*b12 + a22*b22,
+            atX*b11 + atY*b21 + btX, atX*b12 + atY*b22 + btY)
+
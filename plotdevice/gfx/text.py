@@ -7,7 +7,7 @@ from ..lib.cocoa import *
 
 from plotdevice import DeviceError
 from .typography import *
-from .geometry import Transform, Region, Size, Point, Pair
+from .geometry import Transform, Region, RegionArray, Size, Point, Pair
 from .colors import Color
 from .bezier import Bezier
 from .atoms import TransformMixin, ColorMixin, EffectsMixin, StyleMixin, FrameMixin, Grob
@@ -350,18 +350,12 @@ class Text(EffectsMixin, TransformMixin, FrameMixin, StyleMixin, Grob):
     @property
     def frame(self):
         """Returns the bounding box in which the text will be laid out"""
-        box = Region()
-        for block in self._blocks:
-            box = box.union(block.frame)
-        return box
+        return RegionArray([block.frame for block in self._blocks]).union_all()
 
     @property
     def bounds(self):
         """Returns the size & position of the actual text (typically a subset of the bounds)"""
-        box = Region()
-        for block in self._blocks:
-            box = box.union(block.bounds)
-        return box
+        return RegionArray([block.bounds for block in self._blocks]).union_all()
 
     @property
     def metrics(self):
@@ -737,18 +731,12 @@ class TextFragment(object):
     @property
     def frame(self):
         """Returns the bounding box for the lines containing the match"""
-        box = Region()
-        for slug in self.slugs:
-            box = box.union(slug.frame)
-        return box
+        return RegionArray([slug.frame for slug in self.slugs]).union_all()
 
     @property
     def bounds(self):
         """Returns the bounding box of the matched characters"""
-        box = Region()
-        for slug in self.slugs:
-            box = box.union(slug.bounds)
-        return box
+        return RegionArray([slug.bounds for slug in self.slugs]).union_all()
 
     @property
     def metrics(self):
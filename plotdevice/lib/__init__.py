@@ -1,5 +1,10 @@
 import sys
-import _plotdevice # make sure the c-extensions are accessible for the submodules
+try:
+    import _plotdevice # make sure the c-extensions are accessible for the submodules
+except ImportError:
+    from plotdevice import headless
+    if not headless:
+        raise
 
 # allow Libraries to request a _ctx reference
 def register(module):
@@ -0,0 +1,330 @@
+# encoding: utf-8
+"""Boolean operations on paths without any Cocoa or c-extension dependencies
+
+The paths are flattened into polygons whose edges are split wherever they cross (or
+overlap) one another. Every resulting piece of an edge is then classified by computing
+the winding numbers of the input shapes just to either side of it: the pieces that
+separate the inside of the result from the outside are kept (oriented with the inside
+on their left) and chained together into the contours of the output.
+
+Since each piece is classified independently, any number of shapes can be merged in a
+single pass (see union_all) rather than by folding them together one pair at a time.
+Bezier.union_all is built on these routines. The pairwise operations on Beziers still use
+the gpc-based versions in the _plotdevice c-extension (which pathmatics can't be imported
+without), so the ones here are a standalone API for working with PathData objects directly.
+"""
+import numpy as np
+from .pathdata import PathData, MOVETO, LINETO, CLOSE
+from .kernels import flatten, _closed_segments
+
+def union(a, b, flatness=0.6):
+    """Returns a PathData with the area covered by either of two PathData objects"""
+    return combine([a, b], lambda inside: inside[:,0] | inside[:,1], flatness)
+
+def intersect(a, b, flatness=0.6):
+    """Returns a PathData with the area covered by both of two PathData objects"""
+    return combine([a, b], lambda inside: inside[:,0] & inside[:,1], flatness)
+
+def difference(a, b, flatness=0.6):
+    """Returns a PathData with the area covered by `a` but not `b`"""
+    return combine([a, b], lambda inside: inside[:,0] & ~inside[:,1], flatness)
+
+def xor(a, b, flatness=0.6):
+    """Returns a PathData with the area covered by exactly one of two PathData objects"""
+    return combine([a, b], lambda inside: inside[:,0] ^ inside[:,1], flatness)
+
+def intersects(a, b, flatness=0.6):
+    """Returns True if the areas covered by two PathData objects overlap"""
+    return len(intersect(a, b, flatness)) > 0
+
+def union_all(datas, flatness=0.6):
+    """Returns a PathData with the area covered by any of a sequence of PathData objects"""
+    return combine(datas, None, flatness)
+
+def combine(datas, rule, flatness=0.6):
+    """Returns a PathData with the region where `rule` is satisfied
+
+    The rule is passed an (N,M) boolean array flagging whether each of N sample points is
+    inside each of the M shapes (using the nonzero winding rule) and should return a
+    length-N mask of the points that are inside the result. A `rule` of None selects the
+    union of all the shapes (which is computed without building the full N×M array).
+    Curves are flattened into lines no more than `flatness` from the original.
+    """
+    datas = list(datas)
+    edges, labels = [], []
+    for i, data in enumerate(datas):
+        if len(data):
+            segs, _ = _closed_segments(flatten(data, flatness))
+            edges.append(segs[:,::3])
+            labels.append(np.full(len(segs), i, dtype=np.intp))
+    if not edges:
+        return PathData()
+    edges, labels = np.concatenate(edges), np.concatenate(labels)
+    solid = (edges[:,0] != edges[:,1]).any(axis=1)
+    edges, labels = edges[solid], labels[solid]
+    if not len(edges):
+        return PathData()
+
+    # snap coordinates to a (power of two) grid fine enough to be invisible but coarse enough to make the
+    # vertices computed by different edges coincide exactly
+    scale = max(abs(edges).max(), 1.0)
+    snap = 2.0 ** np.floor(np.log2(scale * 1e-10))
+    edges, labels = _split(edges, labels, snap)
+    if not len(edges):
+        return PathData()
+
+    # group identical pieces (from overlapping edges) and classify one of each
+    lo = np.where(_before(edges[:,0], edges[:,1])[:,None], edges[:,0], edges[:,1])
+    hi = np.where(_before(edges[:,0], edges[:,1])[:,None], edges[:,1], edges[:,0])
+    _, first, groups = np.unique(np.column_stack([lo, hi]), axis=0, return_index=True, return_inverse=True)
+    groups = groups.ravel()
+    reps = edges[first]
+
+    # test the horizontal pieces with rays running vertically by swapping x & y
+    left_in, right_in = np.zeros(len(reps), dtype=bool), np.zeros(len(reps), dtype=bool)
+    flat = reps[:,0,1] == reps[:,1,1]
+    for mask, axes in ((~flat, [0, 1]), (flat, [1, 0])):
+        which = np.flatnonzero(mask)
+        if not len(which):
+            continue
+        plus, minus = _sides(edges[...,axes], labels, groups, which, len(datas), rule)
+        rising = reps[which][:,1,axes[1]] > reps[which][:,0,axes[1]]
+        if axes[0] == 1:
+            rising = ~rising # swapping the axes reverses the sense of left & right
+        left_in[which] = np.where(rising, minus, plus)
+        right_in[which] = np.where(rising, plus, minus)
+
+    # keep the boundary pieces, oriented with the inside on their left
+    keep = left_in != right_in
+    kept = reps[keep]
+    kept[~left_in[keep]] = kept[~left_in[keep]][:,::-1]
+    return _chain(kept)
+
+def _before(p, q):
+    # lexicographic ordering of two (N,2) arrays of points
+    return (p[:,0] < q[:,0]) | ((p[:,0] == q[:,0]) & (p[:,1] < q[:,1]))
+
+def _split(edges, labels, snap):
+    """Divide the edges at every point where they cross or touch another edge and return
+    the pieces (with any that have zero length after snapping discarded)"""
+    starts, ends = edges[:,0], edges[:,1]
+    a, b = _candidate_pairs(edges)
+    splits = [(np.arange(len(edges)), np.zeros(len(edges)), starts),
+              (np.arange(len(edges)), np.ones(len(edges)), ends)]
+
+    if len(a):
+        p, r = starts[a], ends[a] - starts[a]
+        q, s = starts[b], ends[b] - starts[b]
+        qp = q - p
+        denom = _cross(r, s)
+        rr, ss = (r*r).sum(axis=1), (s*s).sum(axis=1)
+        tiny = 1e-12
+        parallel = abs(denom) <= tiny * np.sqrt(rr * ss)
+
+        # crossing edges (with points just past an edge's end snapped onto it)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = _cross(qp, s) / denom
+            u = _cross(qp, r) / denom
+        slop_t = snap / np.sqrt(np.maximum(rr, tiny))
+        slop_u = snap / np.sqrt(np.maximum(ss, tiny))
+        hit = ~parallel & (t >= -slop_t) & (t <= 1 + slop_t) & (u >= -slop_u) & (u <= 1 + slop_u)
+        t, u = np.clip(t[hit], 0, 1), np.clip(u[hit], 0, 1)
+        pt = p[hit] + t[:,None] * r[hit]
+
+        # use an existing vertex for intersections that land on one
+        for frac, slop, first, last in ((t, slop_t[hit], starts[a[hit]], ends[a[hit]]),
+                                        (u, slop_u[hit], starts[b[hit]], ends[b[hit]])):
+            pt = np.where((frac <= slop)[:,None], first, pt)
+            pt = np.where((frac >= 1 - slop)[:,None], last, pt)
+        splits.append((a[hit], t, pt))
+        splits.append((b[hit], u, pt))
+
+        # collinear overlaps split each edge at the other's endpoints
+        collinear = parallel & (abs(_cross(qp, r)) <= tiny * (rr + (qp*qp).sum(axis=1)))
+        ca, cb = a[collinear], b[collinear]
+        for this, other in ((ca, cb), (cb, ca)):
+            base, span = starts[this], ends[this] - starts[this]
+            length2 = np.maximum((span*span).sum(axis=1), tiny)
+            for pts in (starts[other], ends[other]):
+                frac = ((pts - base) * span).sum(axis=1) / length2
+                inner = (frac > 0) & (frac < 1)
+                splits.append((this[inner], frac[inner], pts[inner]))
+
+    idx, ts, pts = [np.concatenate(part) for part in zip(*splits)]
+    pts = np.round(pts / snap) * snap
+    order = np.lexsort([ts, idx])
+    idx, pts = idx[order], pts[order]
+
+    # consecutive points along the same edge bound its pieces
+    same = idx[1:] == idx[:-1]
+    pieces = np.stack([pts[:-1][same], pts[1:][same]], axis=1)
+    owners = idx[:-1][same]
+    solid = (pieces[:,0] != pieces[:,1]).any(axis=1)
+    return pieces[solid], labels[owners[solid]]
+
+def _cross(u, v):
+    return u[:,0] * v[:,1] - u[:,1] * v[:,0]
+
+def _candidate_pairs(edges, limit=64):
+    """Returns index arrays (a, b) with a < b for the pairs of edges whose bounding boxes
+    overlap, found by bucketing the edges in a uniform grid"""
+    n = len(edges)
+    lo, hi = edges.min(axis=1), edges.max(axis=1)
+    extent = (hi - lo).max(axis=1)
+    cell = max(np.median(extent) * 2, (hi.max(axis=0) - lo.min(axis=0)).max() / 4096, 1e-9)
+    c0, c1 = np.floor(lo / cell).astype(np.int64), np.floor(hi / cell).astype(np.int64)
+    nx, ny = c1[:,0] - c0[:,0] + 1, c1[:,1] - c0[:,1] + 1
+    counts = nx * ny
+
+    # edges spanning many cells are compared against every other edge directly
+    big = counts > limit
+    pairs = []
+    for i in np.flatnonzero(big):
+        near = (lo[:,0] <= hi[i,0]) & (lo[i,0] <= hi[:,0]) & (lo[:,1] <= hi[i,1]) & (lo[i,1] <= hi[:,1])
+        near[i] = False
+        others = np.flatnonzero(near)
+        pairs.append(np.column_stack([np.full(len(others), i), others]))
+
+    # the rest are listed once for each cell they touch, then paired with their cellmates
+    small = np.flatnonzero(~big)
+    counts = counts[small]
+    ids = np.repeat(small, counts)
+    local = np.arange(len(ids)) - np.repeat(np.cumsum(counts) - counts, counts)
+    cx = c0[ids,0] + local % nx[ids]
+    cy = c0[ids,1] + local // nx[ids]
+    order = np.lexsort([cy, cx])
+    ids, cx, cy = ids[order], cx[order], cy[order]
+    if len(ids):
+        fresh = np.concatenate([[True], (cx[1:] != cx[:-1]) | (cy[1:] != cy[:-1])])
+        group_start = np.maximum.accumulate(np.where(fresh, np.arange(len(ids)), 0))
+        group_end = np.repeat(np.append(np.flatnonzero(fresh)[1:], len(ids)), np.diff(np.append(np.flatnonzero(fresh), len(ids))))
+        partners = group_end - np.arange(len(ids)) - 1
+        i = np.repeat(np.arange(len(ids)), partners)
+        j = i + 1 + np.arange(len(i)) - np.repeat(np.cumsum(partners) - partners, partners)
+        pairs.append(np.column_stack([ids[i], ids[j]]))
+
+    if not pairs:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    pairs = np.concatenate(pairs)
+    a, b = pairs.min(axis=1), pairs.max(axis=1)
+    key = np.unique(a[a != b] * n + b[a != b])
+    a, b = key // n, key % n
+    overlap = (lo[a,0] <= hi[b,0]) & (lo[b,0] <= hi[a,0]) & (lo[a,1] <= hi[b,1]) & (lo[b,1] <= hi[a,1])
+    return a[overlap], b[overlap]
+
+def _sides(edges, labels, groups, which, count, rule, chunk=1<<22):
+    """Returns a pair of boolean arrays flagging whether the points just to the right (+x)
+    and left (-x) of the midpoint of each group's representative piece are inside the
+    result. The pieces in `which` must not be horizontal."""
+    x0, y0, x1, y1 = edges[:,0,0], edges[:,0,1], edges[:,1,0], edges[:,1,1]
+    ylo, yhi = np.minimum(y0, y1), np.maximum(y0, y1)
+    order = np.argsort(ylo, kind='stable')
+    sorted_lo, reach = ylo[order], (yhi - ylo).max()
+
+    # the contours are closed, so a shape can only wind around points within its x-range
+    xmin, xmax = np.full(count, np.inf), np.full(count, -np.inf)
+    np.minimum.at(xmin, labels, np.minimum(x0, x1))
+    np.maximum.at(xmax, labels, np.maximum(x0, x1))
+    xmin, xmax = xmin[labels], xmax[labels]
+
+    # the midpoint of each group's first piece
+    first = np.full(groups.max() + 1, -1)
+    first[groups[::-1]] = np.arange(len(groups))[::-1]
+    mids = edges[first[which]].mean(axis=1)
+
+    # a rightward ray from each midpoint crosses the upward edges it's left of (+1) and the
+    # downward edges it's right of (-1), not counting the pieces in the midpoint's own group
+    hits_pt, hits_label, hits_sign = [], [], []
+    by_y = np.argsort(mids[:,1], kind='stable')
+    band = max(64, chunk // max(len(edges), 1))
+    for start in range(0, len(by_y), band):
+        idx = by_y[start:start+band]
+        px, py = mids[idx,0,None], mids[idx,1,None]
+        window = order[np.searchsorted(sorted_lo, py[0,0] - reach, 'left'):
+                       np.searchsorted(sorted_lo, py[-1,0], 'right')]
+        near = window[(ylo[window] <= py[-1,0]) & (yhi[window] > py[0,0]) &
+                      (xmin[window] <= px.max()) & (xmax[window] >= px.min())]
+        if not len(near):
+            continue
+        ex0, ey0, ex1, ey1 = x0[near], y0[near], x1[near], y1[near]
+        side = (ex1 - ex0) * (py - ey0) - (px - ex0) * (ey1 - ey0)
+        up = (ey0 <= py) & (py < ey1) & (side > 0)
+        down = (ey1 <= py) & (py < ey0) & (side < 0)
+        own = groups[near] == which[idx][:,None]
+        around = (xmin[near] <= px) & (px <= xmax[near])
+        rows, cols = np.nonzero((up | down) & around & ~own)
+        hits_pt.append(idx[rows])
+        hits_label.append(labels[near[cols]])
+        hits_sign.append(np.where(up[rows, cols], 1, -1))
+
+    # crossing to the left side of the midpoint adds each of the group's own pieces
+    members = np.flatnonzero(np.isin(groups, which))
+    slot = np.full(groups.max() + 1, -1)
+    slot[which] = np.arange(len(which))
+    own_pt = slot[groups[members]]
+    own_sign = np.where(y1[members] > y0[members], 1, -1)
+
+    def inside(pts, labs, signs):
+        if rule is None:
+            # union: inside if any shape has a nonzero winding number
+            key, total = _tally(pts * count + labs, signs)
+            flags = np.zeros(len(which), dtype=bool)
+            flags[key[total != 0] // count] = True
+            return flags
+        winding = np.zeros((len(which), count), dtype=np.intp)
+        np.add.at(winding, (pts, labs), signs)
+        return np.asarray(rule(winding != 0), dtype=bool)
+
+    pts, labs, signs = [np.concatenate(part) if part else np.empty(0, dtype=np.intp)
+                        for part in (hits_pt, hits_label, hits_sign)]
+    plus = inside(pts, labs, signs)
+    minus = inside(np.concatenate([pts, own_pt]), np.concatenate([labs, labels[members]]),
+                   np.concatenate([signs, own_sign]))
+    return plus, minus
+
+def _tally(keys, values):
+    # sum the values sharing each key
+    keys, inverse = np.unique(keys, return_inverse=True)
+    return keys, np.bincount(inverse.ravel(), weights=values, minlength=len(keys))
+
+def _chain(edges):
+    """Link directed edges into closed contours and return them as a PathData"""
+    if not len(edges):
+        return PathData()
+    starts = [tuple(p) for p in edges[:,0].tolist()]
+    ends = [tuple(p) for p in edges[:,1].tolist()]
+    outgoing = {}
+    for i, p in enumerate(starts):
+        outgoing.setdefault(p, []).append(i)
+
+    contours = []
+    used = [False] * len(edges)
+    for i in range(len(edges)):
+        if used[i]:
+            continue
+        loop, seen, j = [], {}, i
+        while j is not None and not used[j]:
+            used[j] = True
+            pt = starts[j]
+            if pt in seen:
+                # split off the loop that closed at a vertex the walk already passed through
+                k = seen[pt]
+                for prev in loop[k:]:
+                    del seen[prev]
+                contours.append(loop[k:])
+                del loop[k:]
+            seen[pt] = len(loop)
+            loop.append(pt)
+            exits = outgoing.get(ends[j])
+            while exits and used[exits[-1]]:
+                exits.pop()
+            j = exits.pop() if exits else None
+        contours.append(loop)
+
+    contours = [c for c in contours if len(c) > 2]
+    if not contours:
+        return PathData()
+
+    cmds = np.concatenate([[MOVETO] + [LINETO] * (len(c) - 1) + [CLOSE] for c in contours])
+    pts = [pt for c in contours for pt in c]
+    return PathData.from_arrays(cmds, pts)
@@ -0,0 +1,373 @@
+# encoding: utf-8
+"""Delaunay triangulations & Voronoi diagrams of large sets of points
+
+The triangulation uses a sweep-hull algorithm: after picking a seed triangle, the rest of
+the points are added in order of their distance from its circumcenter. Each new point lies
+outside the hull of the points before it, so it can be joined to the hull edges it 'sees'
+(found via a hash of the hull vertices' angles around the center) and the new triangles
+made Delaunay with a few edge flips. Apart from the initial sort each insertion takes a
+roughly constant amount of work, making the whole triangulation O(n log n).
+
+Everything here works on numpy arrays (without any Cocoa dependencies). Voronoi cells are
+returned as (K,2) arrays of polygon vertices which Bezier.voronoi() wraps in paths.
+"""
+from math import ceil, sqrt, hypot
+import numpy as np
+from .vectors import _as_pairs, _rect_tuple
+
+class Delaunay(object):
+    """The Delaunay triangulation of a set of 2D points
+
+    Attributes:
+      points: a read-only (N,2) array of the points that were triangulated
+      triangles: a (T,3) array of point indices, one row per triangle. The vertices are
+                 listed counterclockwise (when the y axis points up)
+      neighbors: a (T,3) array with the index of the triangle across the edge opposite
+                 each vertex (or -1 if the edge is on the convex hull)
+      hull: an array with the indices of the points on the convex hull (in the same order
+            as the triangles' vertices)
+
+    The points can be a PointArray, an (N,2) array, or a list of Points or x/y tuples. Only
+    the first of any duplicate points is used in the triangles. If all the points are
+    collinear there are no triangles and the hull lists them from one end to the other.
+    """
+
+    def __init__(self, points):
+        pts = _as_pairs(points)
+        self._points = pts
+        if len(pts):
+            _, firsts, self._canonical = np.unique(pts, axis=0, return_index=True, return_inverse=True)
+            self._canonical = firsts[self._canonical.ravel()]
+            sites = np.sort(firsts)
+        else:
+            self._canonical = sites = np.empty(0, dtype=np.intp)
+
+        verts, twins, hull, self._spokes = _triangulate(pts, sites)
+        self.triangles = np.array(verts, dtype=np.intp).reshape(-1, 3)
+        self.hull = np.array(hull, dtype=np.intp)
+
+        # halfedge j of a triangle runs from vertex j to j+1 and is opposite vertex j+2
+        self._twins = np.array(twins, dtype=np.intp)
+        across = np.where(self._twins < 0, -1, self._twins // 3).reshape(-1, 3)
+        self.neighbors = np.roll(across, -1, axis=1)
+
+    def __len__(self):
+        return len(self.triangles)
+
+    @property
+    def points(self):
+        """A read-only (N,2) view of the triangulated points"""
+        view = self._points.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def edges(self):
+        """An (E,2) array with the endpoints of each edge in the triangulation"""
+        tri = self.triangles
+        pairs = np.concatenate([tri[:,[0,1]], tri[:,[1,2]], tri[:,[2,0]]])
+        if not len(pairs) and len(self.hull) > 1:
+            pairs = np.column_stack([self.hull[:-1], self.hull[1:]])
+        return np.unique(np.sort(pairs, axis=1), axis=0)
+
+    @property
+    def circumcenters(self):
+        """A (T,2) array with the center of each triangle's circumcircle"""
+        a, b, c = (self._points[self.triangles[:,i]] for i in range(3))
+        return _circumcenters(a, b, c)
+
+    def voronoi(self, clip=None):
+        """Returns a list with the Voronoi cell around each point
+
+        Each cell is a (K,2) array with the vertices of a convex polygon (in the same order
+        as the triangles). The cells are clipped to the `clip` rect (a Region or x, y, w, h
+        tuple) which defaults to the bounding box of the points. Duplicate points share the
+        cell of the first point at their location.
+        """
+        pts = self._points
+        if not len(pts):
+            return []
+        if clip is None:
+            lo, hi = pts.min(axis=0), pts.max(axis=0)
+            x0, y0, x1, y1 = lo[0], lo[1], hi[0], hi[1]
+        else:
+            x, y, w, h = _rect_tuple(clip)
+            x0, x1 = sorted([x, x+w])
+            y0, y1 = sorted([y, y+h])
+        bounds = [(-1.0, 0.0, -x0), (1.0, 0.0, x1), (0.0, -1.0, -y0), (0.0, 1.0, y1)]
+
+        if len(self.triangles):
+            polys = self._cells((x0 + x1) / 2.0, (y0 + y1) / 2.0, hypot(x1 - x0, y1 - y0))
+        else:
+            polys = self._slabs(x0, y0, x1, y1)
+
+        cells = {}
+        for site, poly in polys:
+            for nx, ny, c in bounds:
+                poly = _clip(poly, nx, ny, c)
+            cells[site] = np.array(poly, dtype=np.float64).reshape(-1, 2)
+        return [cells[site] for site in self._canonical.tolist()]
+
+    def _cells(self, cx, cy, diag):
+        # generate the (unclipped) polygon around each site by visiting the circumcenters of
+        # the triangles sharing it. cells on the hull are capped by a pair of long rays
+        # extending from the circumcenters of the hull edges' triangles
+        centers = self.circumcenters.tolist()
+        twins = self._twins.tolist()
+        verts = self.triangles.ravel().tolist()
+        xs, ys = self._points[:,0].tolist(), self._points[:,1].tolist()
+        for site, start in self._spokes.items():
+            ring, h = [], start
+            while True:
+                ring.append(h // 3)
+                prev = h + 2 if h % 3 == 0 else h - 1
+                h = twins[prev]
+                if h < 0 or h == start:
+                    break
+            poly = [centers[t] for t in ring]
+
+            if h < 0:
+                # `start` runs along the hull from the site and `prev` runs back to it
+                nxt = start + 1 if start % 3 < 2 else start - 2
+                for edge, t in ((prev, ring[-1]), (start, ring[0])):
+                    a, b = (verts[edge], verts[nxt]) if edge == start else (verts[edge], site)
+                    dx, dy = xs[b] - xs[a], ys[b] - ys[a]
+                    norm = hypot(dx, dy) or 1.0
+                    ox, oy = centers[t]
+                    reach = hypot(ox - cx, oy - cy) + diag + 1.0
+                    poly.append((ox + dy / norm * reach, oy - dx / norm * reach))
+            yield site, poly
+
+    def _slabs(self, x0, y0, x1, y1):
+        # without triangles, the cells are bounded by the bisectors between the neighboring
+        # points along the line (or the whole clip rect for a single point)
+        line = self.hull.tolist()
+        pts = self._points
+        rect = [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+        for i, site in enumerate(line):
+            poly = rect
+            for other in line[max(i-1, 0):i] + line[i+1:i+2]:
+                (sx, sy), (ox, oy) = pts[site], pts[other]
+                nx, ny = ox - sx, oy - sy
+                poly = _clip(poly, nx, ny, (ox*ox + oy*oy - sx*sx - sy*sy) / 2.0)
+            yield site, poly
+
+def _circumcenters(a, b, c):
+    # the circumcenters of the triangles formed by parallel (N,2) arrays of vertices
+    (bx, by), (cx, cy) = (b - a).T, (c - a).T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d = 2 * (bx * cy - by * cx)
+        b2, c2 = bx*bx + by*by, cx*cx + cy*cy
+        ux = (cy * b2 - by * c2) / d
+        uy = (bx * c2 - cx * b2) / d
+    return np.column_stack([ux, uy]) + a
+
+def _clip(poly, nx, ny, c):
+    # keep the part of a convex polygon (a list of x,y pairs) where nx*x + ny*y <= c
+    if not poly:
+        return poly
+    kept = []
+    px, py = poly[-1]
+    pd = nx*px + ny*py - c
+    for x, y in poly:
+        d = nx*x + ny*y - c
+        if (d < 0 and pd > 0) or (d > 0 and pd < 0):
+            t = pd / (pd - d)
+            kept.append((px + t * (x - px), py + t * (y - py)))
+        if d <= 0:
+            kept.append((x, y))
+        px, py, pd = x, y, d
+    return kept
+
+def _triangulate(pts, sites):
+    """Returns the (verts, twins, hull, spokes) of the triangulation of pts[sites]
+
+    The triangles are stored as 'halfedges' with halfedge 3t+j running from verts[3t+j] to
+    the triangle's next vertex and twins[3t+j] holding the index of the oppositely-directed
+    halfedge in the neighboring triangle (or -1 on the hull). The spokes map each site to
+    the index of a halfedge that starts there (which, for sites on the hull, is the
+    halfedge running along the hull to the next site).
+    """
+    if len(sites) < 3:
+        return [], [], _line(pts, sites), {}
+
+    # seed with the point nearest the center, its nearest neighbor, and whichever point
+    # forms the smallest circumcircle with them
+    sub = pts[sites]
+    mid = (sub.min(axis=0) + sub.max(axis=0)) / 2
+    i0 = int(np.argmin(((sub - mid)**2).sum(axis=1)))
+    dist = ((sub - sub[i0])**2).sum(axis=1)
+    dist[i0] = np.inf
+    i1 = int(np.argmin(dist))
+    centers = _circumcenters(sub[i0], sub[i1], sub)
+    radii = ((centers - sub[i0])**2).sum(axis=1)
+    radii[[i0, i1]] = np.inf
+    radii[~np.isfinite(radii)] = np.inf
+    i2 = int(np.argmin(radii))
+    if not np.isfinite(radii[i2]):
+        return [], [], _line(pts, sites), {}
+
+    cx, cy = centers[i2]
+    order = sites[np.argsort(((sub - centers[i2])**2).sum(axis=1), kind='stable')].tolist()
+    i0, i1, i2 = int(sites[i0]), int(sites[i1]), int(sites[i2])
+    xs, ys = pts[:,0].tolist(), pts[:,1].tolist()
+
+    def cross(a, b, c):
+        # positive if c is to the left of the line from a to b
+        return (xs[b]-xs[a]) * (ys[c]-ys[a]) - (ys[b]-ys[a]) * (xs[c]-xs[a])
+
+    if cross(i0, i1, i2) < 0:
+        i1, i2 = i2, i1
+
+    verts, twins = [], []
+    n = len(pts)
+    hull_next, hull_prev, hull_edge = [-1]*n, [-1]*n, [-1]*n
+    hash_size = int(ceil(sqrt(len(sites))))
+    hull_hash = [-1] * hash_size
+
+    def bucket(i):
+        # hash the points by their pseudo-angle around the seed's circumcenter
+        dx, dy = xs[i] - cx, ys[i] - cy
+        p = dx / (abs(dx) + abs(dy)) if dx or dy else 0.0
+        angle = (3 - p if dy > 0 else 1 + p) / 4.0
+        return int(angle * hash_size) % hash_size
+
+    def add(a, b, c, ta, tb, tc):
+        t = len(verts)
+        verts.extend((a, b, c))
+        twins.extend((ta, tb, tc))
+        for h, twin in enumerate((ta, tb, tc)):
+            if twin >= 0:
+                twins[twin] = t + h
+        return t
+
+    def legalize(a):
+        # flip edges (starting with halfedge a) until all the triangles they border have
+        # empty circumcircles. the newly added point is always opposite the edge in a's
+        # triangle, so after a flip the two edges facing away from it need checking
+        stack = [a]
+        while stack:
+            a = stack.pop()
+            b = twins[a]
+            if b < 0:
+                continue
+            a0, b0 = a - a % 3, b - b % 3
+            ap = a0 + (a + 2) % 3
+            bn, bp = b0 + (b + 1) % 3, b0 + (b + 2) % 3
+            p, q, l, r = verts[a], verts[b], verts[ap], verts[bp]
+
+            # flip if r is inside the circumcircle of p, q, & l
+            ax, ay = xs[p] - xs[r], ys[p] - ys[r]
+            bx, by = xs[q] - xs[r], ys[q] - ys[r]
+            lx, ly = xs[l] - xs[r], ys[l] - ys[r]
+            det = (ax*ax + ay*ay) * (bx*ly - by*lx) \
+                - (bx*bx + by*by) * (ax*ly - ay*lx) \
+                + (lx*lx + ly*ly) * (ax*by - ay*bx)
+            if det <= 0:
+                continue
+
+            verts[a], verts[b] = r, l
+            tbp, tap = twins[bp], twins[ap]
+            twins[a], twins[b] = tbp, tap
+            for h, twin, start in ((a, tbp, r), (b, tap, l)):
+                if twin >= 0:
+                    twins[twin] = h
+                else:
+                    hull_edge[start] = h # a hull edge changed triangles
+            twins[ap], twins[bp] = bp, ap
+            stack.extend((a, bn))
+
+    def split(i):
+        # the rare point that falls inside the hull (e.g., within the seed triangle) is
+        # added by splitting the triangle containing it into three
+        tri = np.array(verts).reshape(-1, 3)
+        a, b, c = (pts[tri[:,j]] for j in range(3))
+        p = pts[i]
+        inside = np.ones(len(tri), dtype=bool)
+        for u, v in ((a, b), (b, c), (c, a)):
+            inside &= (v[:,0]-u[:,0]) * (p[1]-u[:,1]) - (v[:,1]-u[:,1]) * (p[0]-u[:,0]) >= 0
+        if not inside.any():
+            return
+        t = 3 * int(np.flatnonzero(inside)[0])
+        a, b, c = verts[t:t+3]
+        tb, tc = twins[t+1], twins[t+2]
+        verts[t+2] = i
+        t1 = add(b, c, i, tb, -1, t+1)
+        t2 = add(c, a, i, tc, t+2, t1+1)
+        for h, twin, start in ((t1, tb, b), (t2, tc, c)):
+            if twin < 0:
+                hull_edge[start] = h
+        for h in (t, t1, t2):
+            legalize(h)
+
+    add(i0, i1, i2, -1, -1, -1)
+    hull_next[i0], hull_next[i1], hull_next[i2] = i1, i2, i0
+    hull_prev[i0], hull_prev[i1], hull_prev[i2] = i2, i0, i1
+    hull_edge[i0], hull_edge[i1], hull_edge[i2] = 0, 1, 2
+    for i in (i0, i1, i2):
+        hull_hash[bucket(i)] = i
+
+    anchor = i0 # a point that's still on the hull
+    for i in order:
+        if i == i0 or i == i1 or i == i2:
+            continue
+
+        # find a hull vertex at a similar angle, then walk forward to a visible edge
+        key = bucket(i)
+        for j in range(hash_size):
+            start = hull_hash[(key + j) % hash_size]
+            if start >= 0 and hull_next[start] != start:
+                break
+        start = e = hull_prev[start]
+        while cross(e, hull_next[e], i) >= 0:
+            e = hull_next[e]
+            if e == start:
+                e = -1
+                break
+        if e < 0:
+            split(i)
+            continue
+
+        # join the point to the first visible edge, then to any others on either side
+        q = hull_next[e]
+        t = add(e, i, q, -1, -1, hull_edge[e])
+        hull_edge[e], hull_edge[i] = t, t + 1
+        legalize(t + 2)
+
+        while cross(q, hull_next[q], i) < 0:
+            nq = hull_next[q]
+            t = add(q, i, nq, hull_edge[i], -1, hull_edge[q])
+            hull_edge[i] = t + 1
+            legalize(t + 2)
+            hull_next[q] = q # remove q from the hull
+            q = nq
+
+        while cross(hull_prev[e], e, i) < 0:
+            pe = hull_prev[e]
+            t = add(pe, i, e, -1, hull_edge[e], hull_edge[pe])
+            hull_edge[pe] = t
+            legalize(t + 2)
+            hull_next[e] = e
+            e = pe
+
+        hull_next[e], hull_prev[i] = i, e
+        hull_next[i], hull_prev[q] = q, i
+        hull_hash[bucket(i)] = i
+        hull_hash[bucket(e)] = e
+        anchor = i
+
+    hull = [anchor]
+    while hull_next[hull[-1]] != hull[0]:
+        hull.append(hull_next[hull[-1]])
+
+    spokes = {v:h for h, v in enumerate(verts)}
+    spokes.update((v, hull_edge[v]) for v in hull)
+    return verts, twins, hull, spokes
+
+def _line(pts, sites):
+    # order a set of collinear points from one end to the other
+    sub = pts[sites]
+    if len(sites) < 2:
+        return sites.tolist()
+    axis = sub[np.argmax(((sub - sub[0])**2).sum(axis=1))] - sub[0]
+    return sites[np.argsort(sub.dot(axis), kind='stable')].tolist()
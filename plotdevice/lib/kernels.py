@@ -0,0 +1,783 @@
+# encoding: utf-8
+"""Vectorized numerics for cubic Bezier segments
+
+The routines in here operate on (N,4,2) arrays of control points (in the form returned by
+PathData.segments) and process every segment at once with numpy rather than looping over
+them in Python. Straight lines can be included as 'cubics' whose handles sit on their
+endpoints.
+"""
+import numpy as np
+from .pathdata import PathData, MOVETO, LINETO, CURVETO, CLOSE
+
+# default accuracy (in canvas units) of arc-length measurements
+LENGTH_TOLERANCE = 0.01
+
+# Gauss-Legendre abscissae & weights, rescaled from [-1,1] to [0,1]
+_gl_x, _gl_w = np.polynomial.legendre.leggauss(8)
+_GL_T, _GL_W = (_gl_x + 1) / 2, _gl_w / 2
+
+# integrals over [0,1] of t^(i+j) and t^(i+j+k) for multiplying out cubic polynomials
+_POLY_W2 = 1.0 / (np.add.outer(np.arange(4), np.arange(3)) + 1)
+_POLY_W3 = 1.0 / (np.add.outer(np.add.outer(np.arange(4), np.arange(4)), np.arange(3)) + 1)
+
+def _as_segments(segs):
+    return np.asarray(segs, dtype=np.float64).reshape(-1, 4, 2)
+
+def coefficients(segs):
+    """Returns the (a, b, c, d) polynomial coefficients of each cubic such that
+    B(t) = a·t³ + b·t² + c·t + d (as four (N,2) arrays)"""
+    p0, p1, p2, p3 = np.moveaxis(_as_segments(segs), 1, 0)
+    return p3 - 3*p2 + 3*p1 - p0, 3*(p2 - 2*p1 + p0), 3*(p1 - p0), p0
+
+def _speed(a, b, c, t):
+    # magnitude of the first derivative (3at² + 2bt + c) with coefficients of shape (N,2)
+    # and t values of shape (N,K)
+    t = t[..., None]
+    d = (3*a[:,None]*t + 2*b[:,None])*t + c[:,None]
+    return np.hypot(d[...,0], d[...,1])
+
+def _quadrature(a, b, c, lo, hi):
+    # integrate the speed of each cubic over its [lo,hi] interval
+    width = hi - lo
+    t = lo[:,None] + width[:,None]*_GL_T
+    return width * _speed(a, b, c, t).dot(_GL_W)
+
+def roots(c3, c2, c1, c0):
+    """Returns an (N,3) array with the real roots of the polynomials c3·t³ + c2·t² + c1·t + c0
+    (where the coefficients are length-N arrays). Missing roots are filled with nan."""
+    c3, c2, c1, c0 = np.broadcast_arrays(*[np.asarray(c, dtype=np.float64) for c in (c3, c2, c1, c0)])
+    found = np.full(c3.shape + (3,), np.nan)
+    scale = np.maximum.reduce([abs(c3), abs(c2), abs(c1), abs(c0)])
+    eps = 1e-12 * scale
+    cubic = abs(c3) > eps
+    quad = ~cubic & (abs(c2) > eps)
+    linear = ~cubic & ~quad & (abs(c1) > eps)
+
+    if cubic.any():
+        # reduce to a depressed cubic x³ + px + q = 0 (where t = x - A/3) and solve with
+        # cardano's formula or (when there are three real roots) the trigonometric method
+        A, B, C = c2[cubic]/c3[cubic], c1[cubic]/c3[cubic], c0[cubic]/c3[cubic]
+        p, q = B - A*A/3, 2*A**3/27 - A*B/3 + C
+        disc = (q/2)**2 + (p/3)**3
+        x = np.full((len(A), 3), np.nan)
+
+        one = disc > 0
+        sq = np.sqrt(disc[one])
+        x[one, 0] = np.cbrt(-q[one]/2 + sq) + np.cbrt(-q[one]/2 - sq)
+
+        three = ~one
+        r = np.sqrt(-p[three]/3)
+        cos_phi = np.divide(-q[three]/2, r**3, out=np.ones_like(r), where=r>0)
+        phi = np.arccos(np.clip(cos_phi, -1, 1))
+        x[three] = 2*r[:,None] * np.cos((phi[:,None] - 2*np.pi*np.arange(3)) / 3)
+
+        found[cubic] = x - A[:,None]/3
+
+    if quad.any():
+        qa, qb, qc = c2[quad], c1[quad], c0[quad]
+        disc = qb*qb - 4*qa*qc
+        sq = np.sqrt(np.where(disc >= 0, disc, np.nan))
+        found[quad, 0] = (-qb - sq) / (2*qa)
+        found[quad, 1] = (-qb + sq) / (2*qa)
+
+    if linear.any():
+        found[linear, 0] = -c0[linear] / c1[linear]
+
+    return found
+
+def curve_lengths(segs, tolerance=LENGTH_TOLERANCE, max_depth=24):
+    """Returns an array with the arc length of each cubic.
+
+    Uses adaptive Gauss-Legendre quadrature: each interval's estimate is compared against
+    the sum of its two halves and the interval is subdivided until the two agree to within
+    a tenth of its share of `tolerance` (or `max_depth` subdivisions have been made). The
+    agreement only estimates the error, so the margin is what keeps the actual error of
+    each length below `tolerance`.
+    """
+    segs = _as_segments(segs)
+    a, b, c, _ = coefficients(segs)
+    lengths = np.zeros(len(segs))
+
+    # the intervals still being refined: their segment index, bounds, and estimated length.
+    # start by splitting the curves wherever their speed hits a local minimum or maximum
+    # (i.e., where B'·B'' = 0) so a near-cusp can't sit in the middle of an interval
+    # whose whole & halves happen to agree by coincidence
+    ab, ac, bb, bc = [np.einsum('ij,ij->i', u, v) for u, v in ((a,b), (a,c), (b,b), (b,c))]
+    aa = np.einsum('ij,ij->i', a, a)
+    stops = roots(18*aa, 18*ab, 4*bb + 6*ac, 2*bc)
+    stops[~((stops > 0) & (stops < 1))] = 1.0
+    stops = np.sort(np.column_stack([np.zeros(len(segs)), stops, np.ones(len(segs))]), axis=1)
+    lo, hi = stops[:,:-1].ravel(), stops[:,1:].ravel()
+    idx = np.repeat(np.arange(len(segs)), stops.shape[1]-1)
+    nonempty = hi > lo
+    idx, lo, hi = idx[nonempty], lo[nonempty], hi[nonempty]
+    est = _quadrature(a[idx], b[idx], c[idx], lo, hi)
+
+    for depth in range(max_depth):
+        if not len(idx):
+            break
+        mid = (lo + hi) / 2
+        left = _quadrature(a[idx], b[idx], c[idx], lo, mid)
+        right = _quadrature(a[idx], b[idx], c[idx], mid, hi)
+        done = np.abs(left + right - est) <= tolerance * (hi - lo) / 10
+        np.add.at(lengths, idx[done], (left + right)[done])
+
+        todo = ~done
+        idx = np.concatenate([idx[todo], idx[todo]])
+        lo, hi = np.concatenate([lo[todo], mid[todo]]), np.concatenate([mid[todo], hi[todo]])
+        est = np.concatenate([left[todo], right[todo]])
+
+    # accept the best estimate for any intervals that never converged
+    np.add.at(lengths, idx, est)
+    return lengths
+
+def curvepoints(ts, segs):
+    """Evaluates many cubics at many t values at once, returning a (points, tangents) pair
+    of arrays (where the tangents are the curves' unnormalized first derivatives).
+
+    The t values can be an (N,) array with one t for each of the N segments or an (N,K)
+    array with K t's per segment (in which case the results are (N,K,2) arrays). A single
+    segment will be evaluated at every t value.
+    """
+    a, b, c, d = coefficients(segs)
+    t = np.asarray(ts, dtype=np.float64)[..., None]
+    if t.ndim == 3:
+        a, b, c, d = a[:,None], b[:,None], c[:,None], d[:,None]
+    points = ((a*t + b)*t + c)*t + d
+    tangents = (3*a*t + 2*b)*t + c
+    return points, tangents
+
+def linepoints(ts, lines):
+    """Returns the points at parameter t along lines given as an (N,2,2) array of start and
+    end points (with the same broadcasting behavior as curvepoints)"""
+    lines = np.asarray(lines, dtype=np.float64).reshape(-1, 2, 2)
+    p0, p1 = lines[:,0], lines[:,1]
+    t = np.asarray(ts, dtype=np.float64)[..., None]
+    if t.ndim == 3:
+        p0, p1 = p0[:,None], p1[:,None]
+    return p0 + t*(p1 - p0)
+
+def linelengths(lines):
+    """Returns the length of each line in an (N,2,2) array of start and end points"""
+    lines = np.asarray(lines, dtype=np.float64).reshape(-1, 2, 2)
+    return np.hypot(*(lines[:,1] - lines[:,0]).T)
+
+def chord_lengths(segs, n=20):
+    """Approximates the length of each cubic by summing the lengths of n chords along it (the
+    fixed-resolution method used by curvelength)"""
+    segs = _as_segments(segs)
+    t = np.linspace(0, 1, n+1)
+    pts, _ = curvepoints(np.broadcast_to(t, (len(segs), n+1)), segs)
+    steps = np.diff(pts, axis=1)
+    return np.hypot(steps[...,0], steps[...,1]).sum(axis=1)
+
+def subdivisions(segs, tolerance):
+    """Returns the number of equal steps in t needed for a polyline to approximate each
+    cubic with a maximum deviation of `tolerance` (using Wang's formula)"""
+    segs = _as_segments(segs)
+    dd = segs[:,:2] - 2*segs[:,1:3] + segs[:,2:]
+    m = np.hypot(dd[...,0], dd[...,1]).max(axis=1)
+    return np.maximum(1, np.ceil(np.sqrt(0.75 * m / tolerance))).astype(np.intp)
+
+def flatten(data, tolerance=0.5):
+    """Returns a PathData in which every curve of `data` has been replaced by a series of
+    lines that deviate from it by no more than `tolerance`"""
+    cmds, pts = data.arrays
+    segcmds, segs = data.segments()
+    curves = np.flatnonzero(segcmds==CURVETO)
+    if not len(curves):
+        return data.copy()
+    steps = subdivisions(segs[curves], tolerance)
+
+    # each curve becomes `steps` lines; everything else passes through unchanged
+    counts = np.ones(len(cmds), dtype=np.intp)
+    counts[curves+1] = steps
+    new_cmds = np.repeat(cmds, counts)
+    new_cmds[new_cmds==CURVETO] = LINETO
+
+    # figure out where each element's points will land in the output
+    npts = counts.copy()
+    npts[cmds==CLOSE] = 0
+    dest = np.zeros(len(cmds), dtype=np.intp)
+    np.cumsum(npts[:-1], out=dest[1:])
+    new_pts = np.empty((npts.sum(), 2))
+
+    # copy over the move & line points
+    keep = np.flatnonzero((npts==1) & (cmds!=CURVETO))
+    new_pts[dest[keep]] = pts[data.offsets[keep]]
+
+    # then sample each curve at t = 1/n, 2/n, … 1
+    first = np.cumsum(steps) - steps
+    k = np.arange(steps.sum()) - np.repeat(first, steps) + 1
+    which = np.repeat(curves, steps)
+    t = k / np.repeat(steps, steps)
+    new_pts[np.repeat(dest[curves+1], steps) + k - 1] = curvepoints(t, segs[which])[0]
+
+    return PathData.from_arrays(new_cmds, new_pts)
+
+def arclength_table(data, tolerance=0.01):
+    """Returns a trio of arrays describing knots along the path: the index of the segment
+    each lies on, its t value within that segment, and its distance from the start of the
+    path. Curves get enough knots for their polyline to stay within `tolerance` of them,
+    lines just get their endpoints, and moves (or zero-length segments) get none at all."""
+    segcmds, segs = data.segments()
+    steps = np.zeros(len(segcmds), dtype=np.intp)
+    steps[(segcmds==LINETO) | (segcmds==CLOSE)] = 1
+    curves = segcmds==CURVETO
+    steps[curves] = subdivisions(segs[curves], tolerance)
+    steps[(segs == segs[:,:1]).all(axis=(1,2))] = 0 # nowhere to go, so no direction either
+    counts = np.where(steps > 0, steps + 1, 0)
+
+    which = np.repeat(np.arange(len(segcmds)), counts)
+    k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    t = k / np.repeat(steps, counts).astype(float)
+    pts, _ = curvepoints(t, segs[which])
+
+    # measure the chords between knots within the same segment
+    chords = np.zeros(len(t))
+    chords[1:] = np.hypot(*np.diff(pts, axis=0).T)
+    chords[k==0] = 0
+    return which, t, np.cumsum(chords)
+
+SAMPLE = np.dtype([('xy', np.float64, 2), ('tangent', np.float64, 2), ('normal', np.float64, 2),
+                   ('t', np.float64), ('contour_index', np.intp)])
+
+def sample(data, amount=None, spacing=None, tolerance=0.01, table=None):
+    """Returns a structured array (with the fields in SAMPLE) describing points spaced
+    evenly along the path by arc length.
+
+    Either `amount` points are placed between the path's start and end (inclusive), or
+    they're placed every `spacing` units starting from the beginning. Each has a unit
+    tangent pointing in the drawing direction, a normal rotated 90° counterclockwise from
+    it, its distance along the path as a fraction of the total length, and the index of
+    the contour it lies on. A precomputed arclength_table can be passed as `table`.
+    """
+    which, knot_t, dist = table if table is not None else arclength_table(data, tolerance)
+    if not len(dist):
+        return np.zeros(0, dtype=SAMPLE)
+    total = dist[-1]
+    if spacing is not None:
+        targets = np.arange(0, total + spacing * 1e-9, spacing) if total else np.zeros(1)
+    else:
+        targets = np.linspace(0, total, max(int(amount), 0))
+
+    # find the knots bracketing each distance and interpolate a t value between them (a
+    # distance shared by two segments lands at the end of the first, just like in points())
+    hi = np.clip(np.searchsorted(dist, targets, side='left'), 1, len(dist) - 1)
+    lo = hi - 1
+    same = which[lo] == which[hi]
+    span = dist[hi] - dist[lo]
+    joined = same & (span > 0)
+    frac = np.zeros(len(lo))
+    frac[joined] = (targets[joined] - dist[lo][joined]) / span[joined]
+    seg = which[lo]
+    t = knot_t[lo] + frac * np.where(same, knot_t[hi] - knot_t[lo], 0)
+
+    segcmds, segs = data.segments()
+    segs = segs[seg]
+    xy, tangent = curvepoints(t, segs)
+    lines = segcmds[seg] != CURVETO
+    xy[lines] = linepoints(t[lines], segs[lines][:,::3])
+    tangent[lines] = segs[lines][:,3] - segs[lines][:,0]
+
+    # curves whose handles sit on their endpoints have no derivative there, so fall back
+    # on the direction between points just to either side
+    speed = np.hypot(*tangent.T)
+    stalled = speed < 1e-12
+    if stalled.any():
+        lo, hi = np.clip(t[stalled] - 1e-6, 0, 1), np.clip(t[stalled] + 1e-6, 0, 1)
+        tangent[stalled] = curvepoints(hi, segs[stalled])[0] - curvepoints(lo, segs[stalled])[0]
+        speed[stalled] = np.hypot(*tangent[stalled].T)
+    tangent /= np.where(speed > 0, speed, 1)[:,None]
+
+    cmds, _ = data.arrays
+    contour = np.cumsum(cmds==MOVETO) - 1
+
+    samples = np.zeros(len(t), dtype=SAMPLE)
+    samples['xy'] = xy
+    samples['tangent'] = tangent
+    samples['normal'] = np.column_stack([-tangent[:,1], tangent[:,0]])
+    samples['t'] = targets / total if total else 0
+    samples['contour_index'] = contour[seg + 1]
+    return samples
+
+def _blossom(segs, u, v, w):
+    # evaluate the cubics' polar forms by running de Casteljau with a different t per level
+    lerp = lambda p, q, t: p + t[:,None,None] * (q - p)
+    pts = lerp(segs[:,:-1], segs[:,1:], u)
+    pts = lerp(pts[:,:-1], pts[:,1:], v)
+    return lerp(pts[:,:1], pts[:,1:], w)[:,0]
+
+def split_segments(data, indices, ts):
+    """Returns a PathData with a new point added at each of the given (segment index, t)
+    locations (where the indices refer to the segments returned by PathData.segments).
+
+    Curves are divided into pieces meeting at their new points and lines (or closepaths)
+    are preceded by lines to each of them, leaving the path's shape unchanged.
+    """
+    cmds, pts = data.arrays
+    segcmds, segs = data.segments()
+    indices = np.asarray(indices, dtype=np.intp).ravel()
+    ts = np.clip(np.asarray(ts, dtype=np.float64).ravel(), 0, 1)
+    order = np.lexsort([ts, indices])
+    indices, ts = indices[order], ts[order]
+    elems = indices + 1
+
+    # the pieces of each curve run from one split (or its start) to the next (or its end)
+    curved = segcmds[indices] == CURVETO
+    first = np.concatenate([[True], indices[1:] != indices[:-1]])
+    last = np.concatenate([indices[1:] != indices[:-1], [True]])
+    starts = np.where(first, 0.0, np.roll(ts, 1))
+    rank = np.arange(len(ts)) - np.maximum.accumulate(np.where(first, np.arange(len(ts)), 0))
+    piece_seg = np.concatenate([indices[curved], indices[curved & last]])
+    piece_lo = np.concatenate([starts[curved], ts[curved & last]])
+    piece_hi = np.concatenate([ts[curved], np.ones((curved & last).sum())])
+    piece_rank = np.concatenate([rank[curved], rank[curved & last] + 1])
+    seg = segs[piece_seg]
+    lo, hi = piece_lo, piece_hi
+    piece_pts = np.stack([_blossom(seg, lo, lo, hi), _blossom(seg, lo, hi, hi), _blossom(seg, hi, hi, hi)], axis=1)
+
+    # every element is listed with room for up to three points (sorted by its position
+    # in the original and its rank among the additions to that element)
+    keep = np.ones(len(cmds), dtype=bool)
+    keep[elems[curved]] = False
+    keep_idx = np.flatnonzero(keep)
+    npts = np.diff(np.append(data.offsets, len(pts)))
+    slots = np.zeros((len(cmds), 3, 2))
+    for i in range(3):
+        has = npts > i
+        slots[has, i] = pts[data.offsets[has] + i]
+    lines = ~curved
+    line_pts = linepoints(ts[lines], segs[indices[lines]][:,::3])
+
+    key_elem = np.concatenate([keep_idx, elems[lines], piece_seg + 1])
+    key_rank = np.concatenate([np.full(len(keep_idx), len(ts) + 1), rank[lines], piece_rank])
+    out_cmds = np.concatenate([cmds[keep_idx], np.full(lines.sum(), LINETO), np.full(len(piece_seg), CURVETO)])
+    out_slots = np.concatenate([slots[keep_idx], np.pad(line_pts[:,None], ((0, 0), (0, 2), (0, 0))), piece_pts])
+    out_npts = np.concatenate([npts[keep_idx], np.ones(lines.sum(), dtype=np.intp), np.full(len(piece_seg), 3)])
+
+    order = np.lexsort([key_rank, key_elem])
+    out_slots, out_npts = out_slots[order], out_npts[order]
+    return PathData.from_arrays(out_cmds[order], out_slots[np.arange(3) < out_npts[:,None]])
+
+def extents(data, tight=True):
+    """Returns the x, y, w, h bounding box of a PathData's geometry as a tuple of floats
+
+    If `tight` is True, the box encloses just the path itself (using the roots of each
+    curve's derivative to find its extrema). Otherwise it encloses all of the control
+    points. Empty paths have a zero-size box at the origin.
+    """
+    cmds, pts = data.arrays
+    if not len(pts):
+        return (0.0, 0.0, 0.0, 0.0)
+    if tight:
+        segcmds, segs = data.segments()
+        curves = segs[segcmds==CURVETO]
+        on_curve = np.ones(len(pts), dtype=bool)
+        offsets = data.offsets[np.flatnonzero(cmds==CURVETO)]
+        on_curve[offsets] = on_curve[offsets+1] = False
+        found = [pts[on_curve]]
+
+        if len(curves):
+            # the extrema are where the derivative 3at² + 2bt + c crosses zero in each dimension
+            a, b, c, d = coefficients(curves)
+            ts = roots(np.zeros(a.size), 3*a.ravel(), 2*b.ravel(), c.ravel()).reshape(len(curves), 6)
+            inside = (ts > 0) & (ts < 1)
+            which, col = np.nonzero(inside)
+            found.append(curvepoints(ts[which, col], curves[which])[0])
+        pts = np.concatenate(found)
+    (x0, y0), (x1, y1) = pts.min(axis=0), pts.max(axis=0)
+    return (float(x0), float(y0), float(x1 - x0), float(y1 - y0))
+
+def _closed_segments(data):
+    """Returns the path's segments (as in PathData.segments) followed by a straight segment
+    closing each contour, along with the index of the contour each one belongs to. The
+    closing segments have zero length for contours that already end with a CLOSE."""
+    cmds, pts = data.arrays
+    segcmds, segs = data.segments()
+
+    # number each element by contour and find the start & end of each one
+    contour = np.maximum(np.cumsum(cmds==MOVETO) - 1, 0)
+    count = contour[-1] + 1
+    firsts = np.flatnonzero(np.diff(contour, prepend=-1))
+    lasts = np.concatenate([firsts[1:] - 1, [len(cmds) - 1]])
+    ends = np.concatenate([pts[:1], segs[:,3]])
+
+    closing = np.empty((count, 4, 2))
+    closing[:,0] = closing[:,1] = ends[lasts]
+    closing[:,2] = closing[:,3] = pts[data.offsets[firsts]]
+    return np.concatenate([segs, closing]), np.concatenate([contour[1:], np.arange(count)])
+
+def moments(data):
+    """Returns an (M,3) array with the signed area and first moments of area (∬x dA, ∬y dA)
+    of each of a PathData's M contours (omitting any that consist of just a MOVETO).
+
+    The integrals are exact for curves as well as lines since they're found by applying
+    Green's theorem to the polynomial form of each segment. Open contours are treated as if
+    they'd been closed with a straight line (as they are when filled). Areas are positive
+    for contours winding in the same direction as those drawn by rect() and oval().
+    """
+    cmds, pts = data.arrays
+    if not len(cmds):
+        return np.zeros((0, 3))
+    segs, labels = _closed_segments(data)
+    count = labels[-1] + 1
+
+    # integrate relative to the first point to avoid losing precision far from the origin.
+    # with each coordinate as a polynomial in t (with coefficients in ascending order), the
+    # integral over [0,1] of a product of terms is a sum weighted by 1/(i+j+…+1)
+    origin = pts[0]
+    a, b, c, d = coefficients(segs - origin)
+    x, y = [np.stack(dim, axis=1) for dim in zip(*(d.T, c.T, b.T, a.T))]
+    dx, dy = [np.stack(dim, axis=1) for dim in zip(*(c.T, 2*b.T, 3*a.T))]
+    area = np.einsum('si,sj,ij->s', x, dy, _POLY_W2) - np.einsum('si,sj,ij->s', y, dx, _POLY_W2)
+    mx = np.einsum('si,sj,sk,ijk->s', x, x, dy, _POLY_W3)
+    my = -np.einsum('si,sj,sk,ijk->s', y, y, dx, _POLY_W3)
+    area, mx, my = area / 2, mx / 2, my / 2
+
+    result = np.column_stack([np.bincount(labels, weights=w, minlength=count) for w in (area, mx, my)])
+    result[:,1:] += result[:,:1] * origin
+    drawn = (cmds==LINETO) | (cmds==CURVETO)
+    drawn = np.bincount(np.maximum(np.cumsum(cmds==MOVETO) - 1, 0), weights=drawn, minlength=count) > 0
+    return result[drawn]
+
+def edge_table(data, tolerance=0.1):
+    """Returns an (E,2,2) array with the start & end points of the non-horizontal edges of
+    the polygons approximating each of a PathData's contours (closing any open ones). Curves
+    are flattened to lines within `tolerance` of them."""
+    if not len(data):
+        return np.zeros((0, 2, 2))
+    segs, _ = _closed_segments(flatten(data, tolerance))
+    edges = segs[:,::3]
+    return edges[edges[:,0,1] != edges[:,1,1]]
+
+def winding_numbers(edges, points, chunk=1<<22):
+    """Returns the winding number of a set of polygon edges (in the form returned by
+    edge_table) around each point in an (N,2) array
+
+    The points are sorted into horizontal bands so each one only has to be tested against
+    the edges that span its band. No more than about `chunk` point/edge pairs are compared
+    at once.
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    edges = np.asarray(edges, dtype=np.float64).reshape(-1, 2, 2)
+    found = np.zeros(len(pts), dtype=np.intp)
+    if not len(edges) or not len(pts):
+        return found
+
+    x0, y0, x1, y1 = edges[:,0,0], edges[:,0,1], edges[:,1,0], edges[:,1,1]
+    lo, hi = np.minimum(y0, y1), np.maximum(y0, y1)
+    order = np.argsort(pts[:,1], kind='stable')
+    band = max(64, chunk // len(edges))
+    for start in range(0, len(pts), band):
+        idx = order[start:start+band]
+        px, py = pts[idx,0,None], pts[idx,1,None]
+        near = np.flatnonzero((lo <= py[-1,0]) & (hi > py[0,0]))
+        if not len(near):
+            continue
+
+        # an upward edge counts +1 if the point is to its left and a downward one counts
+        # -1 if it's to the right (including each edge's start but not its end)
+        ex0, ey0, ex1, ey1 = x0[near], y0[near], x1[near], y1[near]
+        side = (ex1 - ex0) * (py - ey0) - (px - ex0) * (ey1 - ey0)
+        up = (ey0 <= py) & (py < ey1) & (side > 0)
+        down = (ey1 <= py) & (py < ey0) & (side < 0)
+        found[idx] = up.sum(axis=1) - down.sum(axis=1)
+    return found
+
+def convex_hull(points):
+    """Returns the vertices of the convex hull of an (N,2) array of points as a (K,2) array
+    (wound in the same direction as a rect() with positive area)"""
+    pts = np.unique(np.asarray(points, dtype=np.float64).reshape(-1, 2), axis=0)
+    if len(pts) < 3:
+        return pts
+
+    # andrew's monotone chain (the points are already sorted by x, then y)
+    def chain(coords):
+        found = []
+        for x, y in coords:
+            while len(found) > 1:
+                (ax, ay), (bx, by) = found[-2], found[-1]
+                if (bx - ax) * (y - ay) - (by - ay) * (x - ax) > 0:
+                    break
+                found.pop()
+            found.append((x, y))
+        return found[:-1]
+
+    coords = pts.tolist()
+    return np.array(chain(coords) + chain(coords[::-1]))
+
+def _polylines(data, tolerance):
+    """Returns the vertices of the (flattened) path's contours as a list of (K,2) arrays and
+    a matching list of flags marking the closed ones. Closed contours repeat their first
+    point at the end and repeated vertices are dropped."""
+    cmds, _ = data.arrays
+    if (cmds==CURVETO).any():
+        data = flatten(data, tolerance)
+    cmds, pts = data.arrays
+    contour = np.cumsum(cmds==MOVETO) - 1
+    drawn = cmds != CLOSE
+    closed = np.zeros(contour[-1] + 1 if len(cmds) else 0, dtype=bool)
+    closed[contour[~drawn]] = True
+
+    lines, flags = [], []
+    bounds = np.flatnonzero(np.diff(contour[drawn], prepend=-1, append=-2))
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        line = pts[start:stop]
+        is_closed = closed[contour[drawn][start]]
+        if is_closed:
+            line = np.concatenate([line, line[:1]])
+        # drop repeated points (including ones that differ only by rounding error)
+        eps = 1e-9 * max(abs(line).max(), 1)
+        line = line[np.concatenate([[True], abs(np.diff(line, axis=0)).max(axis=1) > eps])]
+        if is_closed:
+            line[-1] = line[0]
+        if len(line) > 1:
+            lines.append(line)
+            flags.append(bool(is_closed))
+    return lines, flags
+
+def _from_polylines(cmds, pts):
+    # assemble a PathData from per-contour lists of commands and (K,2) point arrays
+    if not cmds:
+        return PathData()
+    return PathData.from_arrays(np.concatenate(cmds), np.concatenate(pts))
+
+def _segment_distances(pts, a, b):
+    # distance from each point to the line segment between the corresponding a & b
+    ab, ap = b - a, pts - a
+    length2 = (ab*ab).sum(axis=1)
+    t = np.clip((ap*ab).sum(axis=1) / np.where(length2 > 0, length2, 1), 0, 1)
+    return np.hypot(*(ap - t[:,None] * ab).T)
+
+def decimate(data, tolerance=0.5):
+    """Returns a PathData in which runs of nearly-collinear vertices have been reduced to
+    the few needed to stay within `tolerance` of the original (using the Ramer–Douglas–
+    Peucker algorithm). Curves are flattened into lines first."""
+    cmds, _ = data.arrays
+    curved = (cmds==CURVETO).any()
+    lines, closed = _polylines(data, tolerance / 2)
+    if not lines:
+        return PathData()
+    limit = tolerance / 2 if curved else tolerance
+
+    # process every contour at once, always keeping their first & last vertices
+    pts = np.concatenate(lines)
+    ends = np.cumsum([len(line) for line in lines])
+    keep = np.zeros(len(pts), dtype=bool)
+    keep[ends - 1] = keep[ends - np.diff(ends, prepend=0)] = True
+    while True:
+        # measure each dropped vertex's distance from the line between the kept ones on
+        # either side, then keep the farthest vertex of every span that strays too far
+        kept = np.flatnonzero(keep)
+        span = np.searchsorted(kept, np.arange(len(pts)), 'right') - 1
+        a, b = kept[span], kept[np.minimum(span + 1, len(kept) - 1)]
+        dist = np.where(keep, 0, _segment_distances(pts, pts[a], pts[b]))
+        worst = np.maximum.reduceat(dist, kept)
+        far = np.flatnonzero((dist > limit) & (dist == worst[span]))
+        if not len(far):
+            break
+        keep[far[np.unique(span[far], return_index=True)[1]]] = True
+
+    out_cmds, out_pts = [], []
+    for line, is_closed, mask in zip(lines, closed, np.split(keep, ends[:-1])):
+        line = line[mask]
+        if is_closed:
+            line = line[:-1]
+        out_cmds.append([MOVETO] + [LINETO] * (len(line) - 1) + [CLOSE] * is_closed)
+        out_pts.append(line)
+    return _from_polylines(out_cmds, out_pts)
+
+def simplify(data, tolerance=0.5, max_iterations=4):
+    """Returns a PathData in which runs of vertices have been replaced by cubic curves that
+    pass within `tolerance` of each of them (using Schneider's curve-fitting algorithm).
+    Runs that are straight to within the tolerance become lines. Curves in the original
+    are flattened into lines first."""
+    cmds, _ = data.arrays
+    curved = (cmds==CURVETO).any()
+    lines, closed = _polylines(data, tolerance / 2)
+    limit = tolerance / 2 if curved else tolerance
+
+    out_cmds, out_pts = [], []
+    for line, is_closed in zip(lines, closed):
+        # estimate tangents from the points within a few tolerances (rather than just the
+        # adjacent ones) so noise in densely sampled input doesn't throw them off
+        arc = np.concatenate([[0], np.cumsum(np.hypot(*np.diff(line, axis=0).T))])
+        def tangent(i, lo, hi):
+            ahead = min(max(np.searchsorted(arc, arc[i] + 2 * limit), i + 1), hi)
+            behind = max(min(np.searchsorted(arc, arc[i] - 2 * limit, 'right') - 1, i - 1), lo)
+            return _unit(line[max(behind, lo)] - line[min(ahead, hi)])
+
+        cmds, pts = [MOVETO], [line[:1]]
+        todo = [(0, len(line) - 1, -tangent(0, 0, len(line) - 1), tangent(len(line) - 1, 0, len(line) - 1))]
+        while todo:
+            first, last, left, right = todo.pop()
+            run = line[first:last+1]
+            if _segment_distances(run, run[:1], run[-1:]).max() <= limit:
+                cmds.append(LINETO)
+                pts.append(run[-1:])
+                continue
+
+            # fit a cubic, reparameterizing a few times if it's close to good enough
+            u = _chord_params(run)
+            for i in range(max_iterations + 1):
+                ctrl = _fit_cubic(run, u, left, right)
+                err, split = _fit_error(run, u, ctrl)
+                if err <= limit or err > 4 * limit or i == max_iterations:
+                    break
+                u = _reparameterize(run, u, ctrl)
+
+            if err <= limit:
+                cmds.append(CURVETO)
+                pts.append(ctrl[1:])
+            else:
+                # divide the run at its worst point and fit each half (with matching tangents)
+                split = min(max(split, 1), len(run) - 2)
+                center = tangent(first + split, first, last)
+                todo.append((first + split, last, -center, right))
+                todo.append((first, first + split, left, center))
+
+        if is_closed:
+            if cmds[-1] == LINETO:
+                cmds.pop() # let the closepath draw the final line
+                pts.pop()
+            cmds.append(CLOSE)
+        out_cmds.append(cmds)
+        out_pts.append(np.concatenate(pts))
+    return _from_polylines(out_cmds, out_pts)
+
+def _unit(vec):
+    norm = np.hypot(*vec)
+    return vec / norm if norm else vec
+
+def _chord_params(run):
+    dist = np.concatenate([[0], np.cumsum(np.hypot(*np.diff(run, axis=0).T))])
+    return dist / dist[-1]
+
+def _bernstein(u):
+    mt = 1 - u
+    return np.column_stack([mt**3, 3*mt*mt*u, 3*mt*u*u, u**3])
+
+def _fit_cubic(run, u, left, right):
+    """Least-squares fit of a cubic's handle lengths given its endpoints & tangents"""
+    p0, p3 = run[0], run[-1]
+    basis = _bernstein(u)
+    a1, a2 = basis[:,1,None] * left, basis[:,2,None] * right
+    c = np.array([[(a1*a1).sum(), (a1*a2).sum()], [(a1*a2).sum(), (a2*a2).sum()]])
+    rest = run - np.outer(basis[:,0] + basis[:,1], p0) - np.outer(basis[:,2] + basis[:,3], p3)
+    x = np.array([(a1*rest).sum(), (a2*rest).sum()])
+
+    det = c[0,0] * c[1,1] - c[0,1] * c[1,0]
+    chord = np.hypot(*(p3 - p0))
+    if abs(det) > 1e-12 * max(chord, 1) ** 4:
+        alpha_l = (x[0] * c[1,1] - x[1] * c[0,1]) / det
+        alpha_r = (c[0,0] * x[1] - c[1,0] * x[0]) / det
+    else:
+        alpha_l = alpha_r = 0
+
+    # fall back to handles a third of the chord long if the solution is degenerate
+    if alpha_l < 1e-6 * chord or alpha_r < 1e-6 * chord:
+        alpha_l = alpha_r = chord / 3
+    return np.array([p0, p0 + left * alpha_l, p3 + right * alpha_r, p3])
+
+def _fit_error(run, u, ctrl):
+    # the largest distance between a point and its counterpart on the curve
+    dist = np.hypot(*(_bernstein(u).dot(ctrl) - run).T)
+    worst = int(dist.argmax())
+    return dist[worst], worst
+
+def _reparameterize(run, u, ctrl):
+    # take a newton-raphson step toward each point's closest parameter on the curve
+    basis = _bernstein(u)
+    mt = 1 - u
+    d1 = 3 * (np.outer(mt*mt, ctrl[1] - ctrl[0]) + np.outer(2*mt*u, ctrl[2] - ctrl[1]) + np.outer(u*u, ctrl[3] - ctrl[2]))
+    d2 = 6 * (np.outer(mt, ctrl[2] - 2*ctrl[1] + ctrl[0]) + np.outer(u, ctrl[3] - 2*ctrl[2] + ctrl[1]))
+    diff = basis.dot(ctrl) - run
+    num = (diff * d1).sum(axis=1)
+    den = (d1 * d1).sum(axis=1) + (diff * d2).sum(axis=1)
+    step = np.where(den != 0, num / np.where(den != 0, den, 1), 0)
+    return np.clip(u - step, 0, 1)
+
+def findpath(points, curvature=1.0):
+    """Returns a PathData with a smooth curve passing through each of an (N,2) array of
+    points (or straight lines between them if the curvature is 0).
+
+    The control points are found by solving the same tridiagonal system as the original
+    pathmatics.findpath, with the curvature (between 0 & 1) setting its diagonal weight.
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    n = len(pts)
+    if n < 3:
+        return PathData.from_points(pts)
+
+    curvature = max(0, min(1, curvature))
+    if curvature == 0:
+        cmds = [MOVETO] + [LINETO] * n
+        return PathData.from_arrays(cmds, np.concatenate([pts[:1], pts]))
+
+    # the forward-elimination factors converge to a fixed point after a few dozen steps
+    # (regardless of n), so only the first handful need to be computed individually
+    weight = 4 + (1.0 - curvature) * 40
+    bi = np.zeros(n)
+    bi[1] = -0.25
+    for i in range(2, n-1):
+        bi[i] = -1.0 / (weight + bi[i-1])
+        if bi[i] == bi[i-1]:
+            bi[i:n-1] = bi[i]
+            break
+
+    # forward-eliminate, then back-substitute to find each point's tangent offset
+    d = np.zeros_like(pts)
+    a = _recurrence(bi[1:n-1], -bi[1:n-1,None] * (pts[2:] - pts[:-2]))
+    d[1:n-1] = _recurrence(bi[1:n-1][::-1], a[::-1])[::-1]
+
+    ctrl = np.stack([pts[:-1] + d[:-1], pts[1:] - d[1:], pts[1:]], axis=1)
+    cmds = [MOVETO] + [CURVETO] * (n - 1)
+    return PathData.from_arrays(cmds, np.concatenate([pts[:1], ctrl.reshape(-1, 2)]))
+
+def _recurrence(coeffs, terms):
+    # solve x[i] = coeffs[i] * x[i-1] + terms[i] (with x[-1] = 0) using a parallel prefix
+    # scan: each pass folds in the partial sums from twice as far back as the last one
+    a, x = coeffs.copy(), terms.copy()
+    step = 1
+    while step < len(x):
+        x[step:] = x[step:] + a[step:,None] * x[:-step]
+        a[step:] = a[step:] * a[:-step]
+        step *= 2
+    return x
+
+### Scalar versions of the pathmatics c-extension functions ###
+
+def linepoint(t, x0, y0, x1, y1):
+    """Returns coordinates for point at t on the line."""
+    return (x0 + t * (x1-x0), y0 + t * (y1-y0))
+
+def linelength(x0, y0, x1, y1):
+    """Returns the length of the line."""
+    return float(np.hypot(x1-x0, y1-y0))
+
+def curvepoint(t, x0, y0, x1, y1, x2, y2, x3, y3, handles=False):
+    """Returns coordinates for point at t on the spline.
+
+    Calculates the coordinates of x and y for a point
+    at t on the cubic bezier spline, and its control points,
+    based on the de Casteljau interpolation algorithm.
+
+    If the handles parameter is set, returns not only the point at t,
+    but the modified control points of p0 and p3 should this point
+    split the path as well.
+    """
+    mint = 1 - t
+    x01, y01 = x0*mint + x1*t, y0*mint + y1*t
+    x12, y12 = x1*mint + x2*t, y1*mint + y2*t
+    x23, y23 = x2*mint + x3*t, y2*mint + y3*t
+    c1x, c1y = x01*mint + x12*t, y01*mint + y12*t
+    c2x, c2y = x12*mint + x23*t, y12*mint + y23*t
+    x, y = c1x*mint + c2x*t, c1y*mint + c2y*t
+    if not handles:
+        return (x, y, c1x, c1y, c2x, c2y)
+    return (x, y, c1x, c1y, c2x, c2y, x01, y01, x23, y23)
+
+def curvelength(x0, y0, x1, y1, x2, y2, x3, y3, n=20):
+    """Returns the length of the spline (as the sum of n chords along it)."""
+    return float(chord_lengths([x0, y0, x1, y1, x2, y2, x3, y3], n)[0])
@@ -0,0 +1,433 @@
+# encoding: utf-8
+"""Array-backed storage for Bezier geometry
+
+A PathData holds a path as a pair of parallel buffers: a uint8 array of path commands
+and a float64 array of (x,y) points. Each command consumes a fixed number of points
+(MOVETO & LINETO use one, CURVETO uses three, and CLOSE uses none). The buffers grow
+geometrically so incremental construction stays cheap, and views onto them can be handed
+to numpy-based routines without copying.
+
+Nothing in here depends on PyObjC: the Bezier class only converts its PathData to an
+NSBezierPath at the point where Cocoa needs one for drawing.
+"""
+import numpy as np
+
+# path commands (using the same values as their NSBezierPathElement counterparts)
+MOVETO, LINETO, CURVETO, CLOSE = 0, 1, 2, 3
+QUADTO = 4 # accepted by append() but stored as an equivalent CURVETO
+
+# the number of points associated with each command
+POINTS_PER = np.array([1, 1, 3, 0], dtype=np.intp)
+_points_per = POINTS_PER.tolist()
+
+class PathData(object):
+    """Growable command & coordinate buffers describing a sequence of path elements
+
+    The store maintains the same invariants as an NSBezierPath: every contour begins with
+    a MOVETO (lines or curves added to an empty path start from an implicit 0,0 origin,
+    and ones added after a CLOSE begin a new contour at the closed contour's start).
+    """
+    __slots__ = ('_cmds', '_pts', '_ncmds', '_npts', '_start', '_cache', '_version')
+
+    def __init__(self, capacity=8):
+        self._cmds = np.empty(capacity, dtype=np.uint8)
+        self._pts = np.empty((capacity, 2), dtype=np.float64)
+        self._ncmds = self._npts = 0
+        self._start = 0   # offset of the current contour's MOVETO point
+        self._cache = {}  # values derived from the geometry (cleared by any mutation)
+        self._version = 0 # incremented by every mutation
+
+    @classmethod
+    def from_arrays(cls, cmds, pts):
+        """Create a store holding copies of a command array and an (N,2) point array.
+
+        The arrays are trusted to be consistent with one another (i.e., the commands'
+        point-counts sum to the number of points and the first command is a MOVETO).
+        """
+        cmds = np.asarray(cmds, dtype=np.uint8).ravel()
+        pts = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+        data = cls(max(len(cmds), len(pts), 1))
+        data._cmds[:len(cmds)] = cmds
+        data._pts[:len(pts)] = pts
+        data._ncmds, data._npts = len(cmds), len(pts)
+        moves = np.flatnonzero(cmds==MOVETO)
+        if len(moves):
+            data._start = int(data.offsets[moves[-1]])
+        return data
+
+    @classmethod
+    def from_points(cls, points, closed=False):
+        """Create a store with a single contour of straight lines connecting a sequence of
+        points. The points can be an (N,2) array-like or a flat buffer of x,y pairs."""
+        pts = _as_points(points)
+        if not len(pts):
+            return cls()
+        cmds = np.full(len(pts) + bool(closed), LINETO, dtype=np.uint8)
+        cmds[0] = MOVETO
+        if closed:
+            cmds[-1] = CLOSE
+        return cls.from_arrays(cmds, pts)
+
+    @classmethod
+    def from_commands(cls, cmds, points):
+        """Create a store from a sequence of path commands and the points they consume.
+
+        Unlike from_arrays, the input is validated and made consistent with the behavior of
+        the incremental methods: QUADTOs aren't allowed, but missing MOVETOs at the start of
+        the path or after a CLOSE are inserted automatically.
+        """
+        cmds = np.asarray(cmds).ravel()
+        pts = _as_points(points)
+        if len(cmds) and (cmds.min() < MOVETO or cmds.max() > CLOSE):
+            raise ValueError("Unknown path command in %r" % np.setdiff1d(cmds, np.arange(4)))
+        cmds = cmds.astype(np.uint8)
+        needed = POINTS_PER[cmds].sum()
+        if needed != len(pts):
+            raise ValueError("Path commands require %i points (got %i)" % (needed, len(pts)))
+
+        # drop leading closepaths and begin with a moveto to the origin if necessary
+        drawn = np.flatnonzero(cmds!=CLOSE)
+        if not len(drawn):
+            return cls()
+        cmds = cmds[drawn[0]:]
+        if cmds[0] != MOVETO:
+            cmds = np.concatenate([[MOVETO], cmds]).astype(np.uint8)
+            pts = np.concatenate([[(0.0, 0.0)], pts])
+
+        # reopen contours that have lines or curves following their closepath
+        reopen = np.flatnonzero((cmds[1:]==LINETO) | (cmds[1:]==CURVETO)) + 1
+        reopen = reopen[cmds[reopen-1]==CLOSE]
+        if len(reopen):
+            offsets = _point_offsets(cmds)
+            moves = np.where(cmds==MOVETO, np.arange(len(cmds)), 0)
+            np.maximum.accumulate(moves, out=moves)
+            origins = pts[offsets[moves[reopen]]]
+            pts = np.insert(pts, offsets[reopen], origins, axis=0)
+            cmds = np.insert(cmds, reopen, MOVETO)
+
+        return cls.from_arrays(cmds, pts)
+
+    def copy(self):
+        clone = PathData.from_arrays(*self.arrays)
+        # the cache is shared since its contents describe identical geometry (which is
+        # also why cached values must never be views onto the _cmds or _pts buffers). both
+        # copies add to the same dict until one of them is modified and gets a fresh one
+        clone._cache = self._cache
+        return clone
+
+    def _reserve(self, ncmds, npts):
+        """Make sure there's room in the buffers for additional commands & points"""
+        if self._ncmds + ncmds > len(self._cmds):
+            cmds = np.empty(max(2*len(self._cmds), self._ncmds+ncmds), dtype=np.uint8)
+            cmds[:self._ncmds] = self._cmds[:self._ncmds]
+            self._cmds = cmds
+        if self._npts + npts > len(self._pts):
+            pts = np.empty((max(2*len(self._pts), self._npts+npts), 2), dtype=np.float64)
+            pts[:self._npts] = self._pts[:self._npts]
+            self._pts = pts
+
+    def _changed(self):
+        self._version += 1
+        self._cache = {} # (rather than clearing a dict that copies may still be using)
+
+    @property
+    def version(self):
+        """A counter that's incremented every time the path is modified (allowing values
+        derived from its geometry to be cached outside of the store itself)"""
+        return self._version
+
+    def cached(self, key, builder):
+        """Return a value derived from the geometry, calling builder(self) to create it
+        if it hasn't been computed since the last time the path was modified"""
+        try:
+            return self._cache[key]
+        except KeyError:
+            val = self._cache[key] = builder(self)
+            return val
+
+    ### Path construction ###
+
+    def moveto(self, x, y):
+        self._reserve(1, 1)
+        self._cmds[self._ncmds] = MOVETO
+        self._pts[self._npts] = x, y
+        self._start = self._npts
+        self._ncmds += 1
+        self._npts += 1
+        self._changed()
+
+    def lineto(self, x, y):
+        self._continue()
+        self._reserve(1, 1)
+        self._cmds[self._ncmds] = LINETO
+        self._pts[self._npts] = x, y
+        self._ncmds += 1
+        self._npts += 1
+        self._changed()
+
+    def curveto(self, x1, y1, x2, y2, x3, y3):
+        self._continue()
+        self._reserve(1, 3)
+        self._cmds[self._ncmds] = CURVETO
+        self._pts[self._npts:self._npts+3] = (x1, y1), (x2, y2), (x3, y3)
+        self._ncmds += 1
+        self._npts += 3
+        self._changed()
+
+    def polyline(self, points):
+        """Add a LINETO for each of a sequence of points (beginning with a MOVETO to the
+        first point if the path is empty)"""
+        pts = _as_points(points)
+        if not len(pts):
+            return
+        if not self._ncmds:
+            self.moveto(*pts[0])
+            pts = pts[1:]
+        self._continue()
+        n = len(pts)
+        self._reserve(n, n)
+        self._cmds[self._ncmds:self._ncmds+n] = LINETO
+        self._pts[self._npts:self._npts+n] = pts
+        self._ncmds += n
+        self._npts += n
+        self._changed()
+
+    def closepath(self):
+        if not self._ncmds:
+            return
+        self._reserve(1, 0)
+        self._cmds[self._ncmds] = CLOSE
+        self._ncmds += 1
+        self._changed()
+
+    def _continue(self):
+        # lines & curves need a current point: use an implicit 0,0 origin for empty paths
+        # and begin a new contour at the closed one's origin if following a CLOSE
+        if not self._ncmds:
+            self.moveto(0, 0)
+        elif self._cmds[self._ncmds-1] == CLOSE:
+            self.moveto(*self._pts[self._start])
+
+    def append(self, cmd, pts=()):
+        """Add an element given its command and a sequence of associated (x,y) points"""
+        if cmd == MOVETO:
+            (x, y), = pts
+            self.moveto(x, y)
+        elif cmd == LINETO:
+            (x, y), = pts
+            self.lineto(x, y)
+        elif cmd == CURVETO:
+            (x1, y1), (x2, y2), (x3, y3) = pts
+            self.curveto(x1, y1, x2, y2, x3, y3)
+        elif cmd == CLOSE:
+            self.closepath()
+        elif cmd == QUADTO:
+            # degree-elevate quadratics (which newer versions of macOS use in glyph outlines)
+            (qx, qy), (x3, y3) = pts
+            x0, y0 = self.current or (0.0, 0.0)
+            self.curveto(x0 + 2/3*(qx-x0), y0 + 2/3*(qy-y0),
+                         x3 + 2/3*(qx-x3), y3 + 2/3*(qy-y3), x3, y3)
+        else:
+            raise ValueError("Unknown path command: %r" % cmd)
+
+    def extend(self, other):
+        """Append all the elements of another PathData"""
+        cmds, pts = other.arrays
+        if not len(cmds):
+            return
+        ncmds, npts = len(cmds), len(pts)
+        self._reserve(ncmds, npts)
+        self._cmds[self._ncmds:self._ncmds+ncmds] = cmds
+        self._pts[self._npts:self._npts+npts] = pts
+        self._start = self._npts + other._start
+        self._ncmds += ncmds
+        self._npts += npts
+        self._changed()
+
+    def transform(self, matrix):
+        """Apply an affine transformation (a 6-tuple of the form [m11, m12, m21, m22, tX, tY])
+        to all of the path's points in place"""
+        pts = self._pts[:self._npts]
+        affine(pts, matrix, out=pts)
+        self._changed()
+
+    ### Element access ###
+
+    def __len__(self):
+        return self._ncmds
+
+    def __iter__(self):
+        cmds, pts = self._cmds[:self._ncmds].tolist(), self._pts[:self._npts].tolist()
+        i = 0
+        for cmd in cmds:
+            n = _points_per[cmd]
+            yield cmd, tuple(map(tuple, pts[i:i+n]))
+            i += n
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._ncmds))]
+
+        if index < 0:
+            index += self._ncmds
+        if not 0 <= index < self._ncmds:
+            raise IndexError("path element index out of range")
+        cmd = int(self._cmds[index])
+        offset = self.offsets[index]
+        pts = self._pts[offset:offset+_points_per[cmd]].tolist()
+        return cmd, tuple(map(tuple, pts))
+
+    @property
+    def current(self):
+        """The path's current point (or None if it's empty)"""
+        if not self._ncmds:
+            return None
+        if self._cmds[self._ncmds-1] == CLOSE:
+            return tuple(self._pts[self._start].tolist())
+        return tuple(self._pts[self._npts-1].tolist())
+
+    @property
+    def arrays(self):
+        """A (commands, points) tuple of read-only views onto the path's buffers.
+
+        The views are only valid until the next modification of the path (since adding
+        elements may move the geometry to a newly allocated buffer)."""
+        cmds, pts = self._cmds[:self._ncmds], self._pts[:self._npts]
+        cmds.flags.writeable = pts.flags.writeable = False
+        return cmds, pts
+
+    @property
+    def offsets(self):
+        """An array with the index of each command's first point"""
+        return self.cached('offsets', _offsets)
+
+    def contour_start(self, index):
+        """Returns the MOVETO point that begins the contour containing the given element"""
+        moves = np.flatnonzero(self._cmds[:index+1]==MOVETO)
+        return tuple(self._pts[self.offsets[moves[-1]]].tolist())
+
+    def segments(self):
+        """Returns a (cmds, segs) tuple describing every element after the first as a cubic
+
+        `cmds` holds the commands for elements 1…N and `segs` is an (N-1, 4, 2) array of the
+        control points for the segment leading to each. Lines and closepaths have their
+        handles placed on their endpoints and MOVETOs are represented as zero-length
+        segments at the new origin.
+        """
+        return self.cached('segments', _segments)
+
+    def contours(self):
+        """Returns a list of PathData objects with each of the path's subpaths.
+
+        MOVETOs that aren't followed by a line or curve are omitted."""
+        spans = []
+        begin, empty = 0, True
+        for i, cmd in enumerate(self._cmds[:self._ncmds].tolist()):
+            if cmd == MOVETO:
+                if not empty:
+                    spans.append((begin, i))
+                begin, empty = i, True
+            elif cmd != CLOSE:
+                empty = False
+        if not empty:
+            spans.append((begin, self._ncmds))
+        return [self.slice(start, stop) for start, stop in spans]
+
+    def slice(self, start, stop):
+        """Returns a new PathData with the elements in the range start…stop (which should
+        begin with a MOVETO)"""
+        offsets = self.offsets
+        first = offsets[start]
+        last = offsets[stop] if stop < self._ncmds else self._npts
+        return PathData.from_arrays(self._cmds[start:stop], self._pts[first:last])
+
+    def spliced(self, index, count, cmds, pts):
+        """Returns a new PathData in which `count` elements starting at `index` have been
+        replaced by the given commands & points"""
+        offsets = self.offsets
+        first = offsets[index] if index < self._ncmds else self._npts
+        last = offsets[index+count] if index+count < self._ncmds else self._npts
+        return PathData.from_arrays(
+            np.concatenate([self._cmds[:index], np.asarray(cmds, dtype=np.uint8), self._cmds[index+count:self._ncmds]]),
+            np.concatenate([self._pts[:first], np.asarray(pts, dtype=np.float64).reshape(-1,2), self._pts[last:self._npts]])
+        )
+
+def affine(points, matrix, out=None):
+    """Applies an affine transformation (a 6-tuple of the form [m11, m12, m21, m22, tX, tY])
+    to an (N,2) array of points, writing the results to `out` (which may be the input array)
+    or a newly allocated array"""
+    m11, m12, m21, m22, tX, tY = matrix
+    pts = np.asarray(points, dtype=np.float64)
+    if pts.shape[-1:] != (2,):
+        raise ValueError("Expected an (N,2) array of points (got shape %r)" % (pts.shape,))
+    # a single (N,2) temporary holds the rotated/scaled points before they're written out
+    moved = np.matmul(pts, np.array([[m11, m12], [m21, m22]]))
+    moved += (tX, tY)
+    if out is None:
+        return moved
+    out[...] = moved
+    return out
+
+def transform_all(datas, matrix):
+    """Applies an affine transformation to several PathData objects in place, using a single
+    vectorized pass over their combined points"""
+    datas = [data for data in datas if data._npts]
+    if not datas:
+        return
+    pts = affine(np.concatenate([data._pts[:data._npts] for data in datas]), matrix)
+    start = 0
+    for data in datas:
+        data._pts[:data._npts] = pts[start:start+data._npts]
+        data._changed()
+        start += data._npts
+
+def _as_points(points):
+    """Coerce an (N,2) array-like or a flat buffer of x,y pairs to an (N,2) float64 array"""
+    pts = np.asarray(points, dtype=np.float64)
+    if pts.ndim == 1 and len(pts) % 2 == 0:
+        pts = pts.reshape(-1, 2)
+    if pts.ndim != 2 or pts.shape[1] != 2:
+        raise ValueError("Expected an (N,2) array of points (got shape %r)" % (pts.shape,))
+    return pts
+
+def _point_offsets(cmds):
+    """Returns the index of each command's first point in the corresponding point array"""
+    counts = POINTS_PER[cmds]
+    offsets = np.zeros(len(counts), dtype=np.intp)
+    np.cumsum(counts[:-1], out=offsets[1:])
+    return offsets
+
+### cache builders ###
+
+def _offsets(data):
+    return _point_offsets(data._cmds[:data._ncmds])
+
+def _segments(data):
+    cmds, pts = data._cmds[:data._ncmds], data._pts[:data._npts]
+    n = len(cmds)
+    segs = np.empty((max(n-1, 0), 4, 2))
+    if n > 1:
+        offsets = data.offsets
+
+        # find the moveto that began each element's contour
+        moves = np.where(cmds==MOVETO, np.arange(n), 0)
+        np.maximum.accumulate(moves, out=moves)
+
+        # every element's final point (closepaths end at their contour's origin)
+        ends = np.where(cmds==CLOSE, offsets[moves], offsets + POINTS_PER[cmds] - 1)
+        ends = pts[ends]
+
+        # default to straight lines between consecutive endpoints
+        segs[:,0] = segs[:,1] = ends[:-1]
+        segs[:,2] = segs[:,3] = ends[1:]
+
+        # pull in the handles for curves and collapse movetos to a point
+        curves = np.flatnonzero(cmds[1:]==CURVETO)
+        segs[curves,1] = pts[offsets[curves+1]]
+        segs[curves,2] = pts[offsets[curves+1]+1]
+        jumps = cmds[1:]==MOVETO
+        segs[jumps,0] = segs[jumps,1] = segs[jumps,3]
+
+    cmds = cmds[1:].copy()
+    cmds.flags.writeable = segs.flags.writeable = False
+    return cmds, segs
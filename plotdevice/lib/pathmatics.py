@@ -1,8 +1,12 @@
 import objc
+import numpy as np
 from collections import namedtuple
 from .cocoa import CGPathRelease
 from ..gfx.geometry import Point
 from ..gfx.bezier import Bezier, Curve
+from . import kernels, booleans, strokes
+from .pathdata import PathData
+from .vectors import _as_pairs
 
 # Quartz loop speedups
 
@@ -51,108 +55,40 @@ def reflect(x0, y0, x1, y1, d=1.0, a=180):
 
 # Ye olde polymagic
 
-from _plotdevice import intersects, union, intersect, difference, xor
-try:
-    from _plotdevice import linepoint, linelength, curvepoint, curvelength
-except ImportError:
-    from math import sqrt, pow
-
-    def linepoint(t, x0, y0, x1, y1):
-
-        """Returns coordinates for point at t on the line.
-
-        Calculates the coordinates of x and y for a point
-        at t on a straight line.
-
-        The t parameter is a number between 0.0 and 1.0,
-        x0 and y0 define the starting point of the line,
-        x1 and y1 the ending point of the line,
+import _plotdevice as gpc
 
-        """
+def _clip(op, path, other, flatness):
+    return Bezier(getattr(gpc, op)(path._nsBezierPath, other._nsBezierPath, flatness))
 
-        out_x = x0 + t * (x1-x0)
-        out_y = y0 + t * (y1-y0)
-        return (out_x, out_y)
+def intersects(path, other):
+    """Returns True if the areas covered by two Beziers overlap"""
+    return gpc.intersects(path._nsBezierPath, other._nsBezierPath)
 
-    def linelength(x0, y0, x1, y1):
+def union(path, other, flatness=0.6):
+    return _clip('union', path, other, flatness)
 
-        """Returns the length of the line."""
+def intersect(path, other, flatness=0.6):
+    return _clip('intersect', path, other, flatness)
 
-        a = pow(abs(x0 - x1), 2)
-        b = pow(abs(y0 - y1), 2)
-        return sqrt(a+b)
+def difference(path, other, flatness=0.6):
+    return _clip('difference', path, other, flatness)
 
-    def curvepoint(t, x0, y0, x1, y1, x2, y2, x3, y3, handles=False):
+def xor(path, other, flatness=0.6):
+    return _clip('xor', path, other, flatness)
 
-        """Returns coordinates for point at t on the spline.
-
-        Calculates the coordinates of x and y for a point
-        at t on the cubic bezier spline, and its control points,
-        based on the de Casteljau interpolation algorithm.
-
-        The t parameter is a number between 0.0 and 1.0,
-        x0 and y0 define the starting point of the spline,
-        x1 and y1 its control point,
-        x3 and y3 the ending point of the spline,
-        x2 and y2 its control point.
-
-        If the handles parameter is set,
-        returns not only the point at t,
-        but the modified control points of p0 and p3
-        should this point split the path as well.
-        """
-
-        mint = 1 - t
-
-        x01   = x0 * mint + x1 * t
-        y01   = y0 * mint + y1 * t
-        x12   = x1 * mint + x2 * t
-        y12   = y1 * mint + y2 * t
-        x23   = x2 * mint + x3 * t
-        y23   = y2 * mint + y3 * t
-
-        out_c1x = x01 * mint + x12 * t
-        out_c1y = y01 * mint + y12 * t
-        out_c2x = x12 * mint + x23 * t
-        out_c2y = y12 * mint + y23 * t
-        out_x = out_c1x * mint + out_c2x * t
-        out_y = out_c1y * mint + out_c2y * t
-
-        if not handles:
-            return (out_x, out_y, out_c1x, out_c1y, out_c2x, out_c2y)
-        else:
-            return (out_x, out_y, out_c1x, out_c1y, out_c2x, out_c2y, x01, y01, x23, y23)
+def union_all(paths, flatness=0.6):
+    """Returns a Bezier covering the combined area of a sequence of Beziers.
 
-    def curvelength(x0, y0, x1, y1, x2, y2, x3, y3, n=20):
-
-        """Returns the length of the spline.
-
-        Integrates the estimated length of the cubic bezier spline
-        defined by x0, y0, ... x3, y3, by adding the lengths of
-        lineair lines between points at t.
-
-        The number of points is defined by n
-        (n=10 would add the lengths of lines between 0.0 and 0.1,
-        between 0.1 and 0.2, and so on).
-
-        The default n=20 is fine for most cases, usually
-        resulting in a deviation of less than 0.01.
-        """
-
-        length = 0
-        xi = x0
-        yi = y0
-
-        for i in range(n):
-            t = 1.0 * (i+1) / n
-            pt_x, pt_y, pt_c1x, pt_c1y, pt_c2x, pt_c2y = \
-                curvepoint(t, x0, y0, x1, y1, x2, y2, x3, y3)
-            c = sqrt(pow(abs(xi-pt_x),2) + pow(abs(yi-pt_y),2))
-            length += c
-            xi = pt_x
-            yi = pt_y
+    Rather than folding the paths together one pair at a time, all of their edges are
+    classified in a single pass (see lib/booleans.py).
+    """
+    return Bezier(booleans.union_all([p._pathdata for p in paths], flatness))
 
-        return length
+try:
+    from _plotdevice import linepoint, linelength, curvepoint, curvelength
+except ImportError:
+    # fall back to the numpy versions
+    from .kernels import linepoint, linelength, curvepoint, curvelength
 
 
 
@@ -166,9 +102,11 @@ from plotdevice import DeviceError
 from Quartz import NSMoveToBezierPathElement as MOVETO, NSLineToBezierPathElement as LINETO
 from Quartz import NSCurveToBezierPathElement as CURVETO, NSClosePathBezierPathElement as CLOSE
 
-def segment_lengths(path, relative=False, n=20):
+def segment_lengths(path, relative=False, n=None, tolerance=None):
     """Returns a list with the lengths of each segment in the path.
 
+    Curves are measured to within `tolerance` canvas units (see arclengths).
+
     >>> path = Bezier(None)
     >>> segment_lengths(path)
     []
@@ -190,43 +128,63 @@ def segment_lengths(path, relative=False, n=20):
     [8.4852813742385695]
     """
 
-    lengths = []
-    first = True
-
-    for el in path:
-        if first == True:
-            close_x, close_y = el.x, el.y
-            first = False
-        elif el.cmd == MOVETO:
-            close_x, close_y = el.x, el.y
-            lengths.append(0.0)
-        elif el.cmd == CLOSE:
-            lengths.append(linelength(x0, y0, close_x, close_y))
-        elif el.cmd == LINETO:
-            lengths.append(linelength(x0, y0, el.x, el.y))
-        elif el.cmd == CURVETO:
-            x3, y3, x1, y1, x2, y2 = el.x, el.y, el.ctrl1.x, el.ctrl1.y, el.ctrl2.x, el.ctrl2.y
-            lengths.append(curvelength(x0, y0, x1, y1, x2, y2, x3, y3, n))
-
-        if el.cmd != CLOSE:
-            x0 = el.x
-            y0 = el.y
+    lengths, cumulative = arclengths(path, n=n, tolerance=tolerance)
 
     if relative:
-        length = sum(lengths)
-        try:
-            return [l / length for l in lengths]
-        except ZeroDivisionError: # If the length is zero, just return zero for all segments
+        length = cumulative[-1] if len(cumulative) else 0.0
+        if length == 0: # If the length is zero, just return zero for all segments
             return [0.0] * len(lengths)
+        return (lengths / length).tolist()
+    else:
+        return lengths.tolist()
+
+def arclengths(path, n=None, tolerance=None):
+    """Returns a pair of arrays with the length of each segment in the path and the
+    cumulative length of the path at the end of each segment.
+
+    Curves are measured using adaptive Gauss-Legendre quadrature with an error of no more
+    than `tolerance` (defaulting to kernels.LENGTH_TOLERANCE). Passing a sample count as
+    `n` instead selects the older (and less accurate) approach of summing the lengths of
+    n chords along each curve.
+
+    The table is cached by the path (until its next modification) and is what allows
+    point() and insert_point() to locate t values with a binary search.
+
+    >>> path = Bezier(None)
+    >>> path.moveto(0, 0)
+    >>> path.lineto(100, 0)
+    >>> path.lineto(100, 300)
+    >>> arclengths(path)
+    (array([100., 300.]), array([100., 400.]))
+    """
+    if tolerance is None:
+        tolerance = kernels.LENGTH_TOLERANCE
+    key = ('arclengths', tolerance if n is None else int(n))
+    return path._pathdata.cached(key, lambda data: _measure(data, n, tolerance))
+
+def _measure(data, n, tolerance):
+    cmds, segs = data.segments()
+    lengths = np.zeros(len(cmds))
+
+    lines = (cmds==LINETO) | (cmds==CLOSE)
+    lengths[lines] = kernels.linelengths(segs[lines][:,::3])
+    curves = cmds==CURVETO
+    if n is None:
+        lengths[curves] = kernels.curve_lengths(segs[curves], tolerance)
     else:
-        return lengths
+        lengths[curves] = kernels.chord_lengths(segs[curves], int(n))
 
-def length(path, segmented=False, n=20):
+    cumulative = np.cumsum(lengths)
+    lengths.flags.writeable = cumulative.flags.writeable = False
+    return lengths, cumulative
+
+def length(path, segmented=False, n=None, tolerance=None):
 
     """Returns the length of the path.
 
-    Calculates the length of each spline in the path,
-    using n as a number of points to measure.
+    Calculates the length of each spline in the path
+    to within the given tolerance (or, if n is specified,
+    using n as a number of points to measure).
 
     When segmented is True, returns a list
     containing the individual length of each spline
@@ -254,11 +212,90 @@ def length(path, segmented=False, n=20):
     """
 
     if not segmented:
-        return sum(segment_lengths(path, n=n), 0.0)
+        lengths, cumulative = arclengths(path, n=n, tolerance=tolerance)
+        return float(cumulative[-1]) if len(cumulative) else 0.0
     else:
-        return segment_lengths(path, relative=True, n=n)
+        return segment_lengths(path, relative=True, n=n, tolerance=tolerance)
+
+def moments(path):
+    """Returns the (cached) signed areas & first moments of the path's contours (see
+    kernels.moments)"""
+    return path._pathdata.cached('moments', kernels.moments)
+
+def area(path):
+    """Returns the area enclosed by the path.
+
+    Curves are measured exactly and open contours are treated as closed. Contours winding
+    in opposite directions (like the holes in a letterform) have their areas subtracted.
+
+    >>> path = Bezier(None)
+    >>> path.rect(0, 0, 100, 50)
+    >>> area(path)
+    5000.0
+    """
+    return abs(float(moments(path)[:,0].sum()))
+
+def centroid(path):
+    """Returns the center of mass of the area enclosed by the path.
+
+    Paths that don't enclose any area fall back to the center of their bounds.
+
+    >>> path = Bezier(None)
+    >>> path.rect(0, 0, 100, 50)
+    >>> centroid(path)
+    Point(x=50.0, y=25.0)
+    """
+    a, mx, my = moments(path).sum(axis=0)
+    if abs(a) < 1e-12:
+        (x, y), (w, h) = path.bounds
+        return Point(x + w/2.0, y + h/2.0)
+    return Point(mx / a, my / a)
+
+def orientation(path):
+    """Returns 1 if the path (on balance) winds in the same direction as rect() and oval(),
+    -1 if it winds in the opposite direction, and 0 if it doesn't enclose any area.
+
+    >>> path = Bezier(None)
+    >>> path.rect(0, 0, 100, 50)
+    >>> orientation(path)
+    1
+    """
+    return int(np.sign(moments(path)[:,0].sum()))
+
+def hull(path, tolerance=0.5):
+    """Returns a closed path tracing the convex hull of the path.
+
+    Curves are flattened before finding the hull, so it may fall inside the true hull by
+    no more than `tolerance`.
+
+    >>> path = Bezier(None)
+    >>> path.moveto(0, 0)
+    >>> path.lineto(100, 0)
+    >>> path.lineto(50, 10)
+    >>> path.lineto(50, 100)
+    >>> len(hull(path))
+    4
+    """
+    _, pts = kernels.flatten(path._pathdata, tolerance).arrays
+    return Bezier(PathData.from_points(kernels.convex_hull(pts), closed=True))
+
+def contains_many(path, points, evenodd=False, tolerance=0.1):
+    """Returns a boolean array flagging which of an (N,2) array of points fall inside the path.
 
-def _locate(path, t, segments=None):
+    By default points are tested using the nonzero winding rule (as when the path is filled
+    or tested with contains()). Pass evenodd=True to use the even-odd rule instead. Curves
+    are flattened to within `tolerance` of their true positions first.
+
+    >>> path = Bezier(None)
+    >>> path.rect(0, 0, 100, 50)
+    >>> contains_many(path, [(50, 25), (150, 25)]).tolist()
+    [True, False]
+    """
+    edges = path._pathdata.cached(('edges', tolerance), lambda data: kernels.edge_table(data, tolerance))
+    winding = kernels.winding_numbers(edges, _as_pairs(points))
+    return winding % 2 == 1 if evenodd else winding != 0
+
+def _locate(path, t, segments=None, tolerance=None):
 
     """Locates t on a specific segment in the path.
 
@@ -273,13 +310,10 @@ def _locate(path, t, segments=None):
     The returned point is the last MOVETO,
     any subsequent CLOSETO after i closes to that point.
 
-    When you supply the list of segment lengths yourself,
-    as returned from length(path, segmented=True),
-    point() works about thirty times faster in a for-loop,
-    since it doesn't need to recalculate the length
-    during each iteration. Note that this has been deprecated:
-    the Bezier now caches the segment lengths the moment you use
-    them.
+    The segment is found with a binary search of the path's
+    (cached) arc-length table. Passing a list of relative
+    segment lengths via the `segments` arg is still supported,
+    but has been deprecated.
 
     >>> path = Bezier(None)
     >>> _locate(path, 0.0)
@@ -298,25 +332,42 @@ def _locate(path, t, segments=None):
     (0, 1.0, Point(x=0.0, y=0.0))
     """
 
-    if segments == None:
-        segments = path.segmentlengths(relative=True)
+    idx, ts = _locate_all(path, [t], segments=segments, tolerance=tolerance)
+    i, t = int(idx[0]), float(ts[0])
+    closeto = Point(path._pathdata.contour_start(i))
+    return (i, t, closeto)
+
+def _locate_all(path, ts, segments=None, tolerance=None):
+    """Vectorized version of _locate that returns arrays of segment indices and segment-t's
+    (but omits the closeto points)"""
+    if segments is None:
+        lengths, cumulative = arclengths(path, tolerance=tolerance)
+    else:
+        lengths = np.asarray(segments, dtype=float)
+        cumulative = np.cumsum(lengths)
 
-    if len(segments) == 0:
+    if len(lengths) == 0:
         raise DeviceError("The given path is empty")
 
-    for i, el in enumerate(path):
-        if i == 0 or el.cmd == MOVETO:
-            closeto = Point(el.x, el.y)
-        if t <= segments[i] or i == len(segments)-1: break
-        else: t -= segments[i]
+    # convert the t values to distances along the path (unless it has no length, in which
+    # case everything gets pushed to the end just like the old linear scan used to do)
+    ts = np.asarray(ts, dtype=float)
+    total = cumulative[-1]
+    dist = ts * total if total else ts
 
-    try: t /= segments[i]
-    except ZeroDivisionError: pass
-    if i == len(segments)-1 and segments[i] == 0: i -= 1
+    # find the first segment whose end is at or beyond each distance
+    last = len(lengths) - 1
+    idx = np.minimum(np.searchsorted(cumulative, dist, side='left'), last)
+    offset = dist - (cumulative[idx] - lengths[idx])
+    seglen = lengths[idx]
+    ts = np.divide(offset, seglen, out=offset.copy(), where=seglen!=0)
 
-    return (i, t, closeto)
+    # a zero-length final segment is a trailing moveto, so use the one preceding it
+    if lengths[last] == 0:
+        idx[idx==last] -= 1
+    return idx, ts
 
-def point(path, t, segments=None):
+def point(path, t, segments=None, tolerance=None):
 
     """Returns coordinates for point at t on the path.
 
@@ -353,26 +404,25 @@ def point(path, t, segments=None):
     if len(path) == 0:
         raise DeviceError("The given path is empty")
 
-    i, t, closeto = _locate(path, t, segments=segments)
+    i, t, closeto = _locate(path, t, segments=segments, tolerance=tolerance)
+    return _segment_point(path, i, t)
 
-    x0, y0 = path[i].x, path[i].y
-    p1 = path[i+1]
+def _segment_point(path, i, t):
+    # segment i leads from element i to element i+1 (closepaths end at their contour's origin)
+    cmds, segs = path._pathdata.segments()
+    cmd = cmds[i]
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = segs[i].tolist()
 
-    if p1.cmd == CLOSE:
-        x, y = linepoint(t, x0, y0, closeto.x, closeto.y)
-        return Curve(LINETO, ((x, y),))
-    elif p1.cmd == LINETO:
-        x1, y1 = p1.x, p1.y
-        x, y = linepoint(t, x0, y0, x1, y1)
+    if cmd in (LINETO, CLOSE):
+        x, y = linepoint(t, x0, y0, x3, y3)
         return Curve(LINETO, ((x, y),))
-    elif p1.cmd == CURVETO:
-        x3, y3, x1, y1, x2, y2 = p1.x, p1.y, p1.ctrl1.x, p1.ctrl1.y, p1.ctrl2.x, p1.ctrl2.y
+    elif cmd == CURVETO:
         x, y, c1x, c1y, c2x, c2y = curvepoint(t, x0, y0, x1, y1, x2, y2, x3, y3)
         return Curve(CURVETO, ((c1x, c1y), (c2x, c2y), (x, y)))
     else:
-        raise DeviceError("Unknown cmd for p1 %s" % p1)
+        raise DeviceError("Unknown cmd for p1 %s" % path[i+1])
 
-def points(path, amount=100):
+def points(path, amount=100, tolerance=None):
     """Returns an iterator with a list of calculated points for the path.
     This method calls the point method <amount> times, increasing t,
     distributing point spacing linearly.
@@ -399,13 +449,137 @@ def points(path, amount=100):
     # If I wouldn't use amount - 1, I fall one point short of the end.
     # E.g. if amount = 4, I want point at t 0.0, 0.33, 0.66 and 1.0,
     # if amount = 2, I want point at t 0.0 and t 1.0
+    amount = int(amount) # make sure we don't choke on a float
     try:
         delta = 1.0/(amount-1)
     except ZeroDivisionError:
         delta = 1.0
 
-    for i in range(amount):
-        yield point(path, delta*i)
+    # locate & evaluate all the t values in a single pass
+    idx, ts = _locate_all(path, delta*np.arange(max(amount, 0)), tolerance=tolerance)
+    cmds, segs = path._pathdata.segments()
+    cmds, segs = cmds[idx], segs[idx]
+    pts, tangents = kernels.curvepoints(ts, segs)
+    lines = cmds != CURVETO
+    pts[lines] = kernels.linepoints(ts[lines], segs[lines][:,::3])
+
+    # recover the split handles that curvepoint() would have returned for curves
+    ctrl1 = pts - ts[:,None] * tangents / 3
+    ctrl2 = pts + (1 - ts[:,None]) * tangents / 3
+
+    for i, cmd, pt, c1, c2 in zip(idx.tolist(), cmds.tolist(), pts.tolist(), ctrl1.tolist(), ctrl2.tolist()):
+        if cmd in (LINETO, CLOSE):
+            yield Curve(LINETO, (tuple(pt),))
+        elif cmd == CURVETO:
+            yield Curve(CURVETO, (tuple(c1), tuple(c2), tuple(pt)))
+        else:
+            raise DeviceError("Unknown cmd for p1 %s" % path[i+1])
+
+def sample(path, amount=None, spacing=None, tolerance=0.01):
+    """Returns a structured array of evenly spaced points along the path with fields for
+    their `xy` coordinates, unit `tangent` & `normal` vectors, fractional distance along
+    the path `t`, and `contour_index` (see kernels.sample).
+
+    Points are distributed by arc length (using a table cached by the path until its next
+    modification), with either `amount` points running from start to end or a point every
+    `spacing` units. If neither is given, 100 points are returned.
+
+    >>> path = Bezier(None)
+    >>> path.moveto(0, 0)
+    >>> path.lineto(100, 0)
+    >>> samples = sample(path, spacing=25)
+    >>> samples['xy'][:,0].tolist(), samples['normal'][0].tolist()
+    ([0.0, 25.0, 50.0, 75.0, 100.0], [-0.0, 1.0])
+    """
+    if amount is not None and spacing is not None:
+        raise DeviceError("sample() takes either an amount or a spacing (not both)")
+    if spacing is not None and not spacing > 0:
+        raise DeviceError("The sample spacing must be a positive number (not %r)" % spacing)
+    if amount is None and spacing is None:
+        amount = 100
+
+    data = path._pathdata
+    table = data.cached(('arclength_table', tolerance), lambda d: kernels.arclength_table(d, tolerance))
+    if not len(table[0]):
+        raise DeviceError("The given path is empty")
+    return kernels.sample(data, amount, spacing, table=table)
+
+def flatten(path, tolerance=0.5):
+    """Returns a copy of the path with its curves replaced by straight lines.
+
+    Each curve is divided into enough lines that the polyline never
+    strays more than `tolerance` canvas units from the original.
+
+    >>> path = Bezier(None)
+    >>> path.moveto(0, 0)
+    >>> path.curveto(0, 50, 100, 50, 100, 0)
+    >>> len(flatten(path, tolerance=0.5))
+    16
+    """
+    return Bezier(kernels.flatten(path._pathdata, tolerance))
+
+def simplify(path, tolerance=0.5):
+    """Returns a copy of the path with its vertices replaced by a smaller number of curves.
+
+    Runs of points are fitted with cubics (or lines, where they're straight) that pass
+    within `tolerance` canvas units of every one of the original vertices.
+
+    >>> path = Bezier(None)
+    >>> path.moveto(0, 0)
+    >>> for i in range(1, 100): path.lineto(i, 0)
+    >>> [curve.cmd for curve in simplify(path)]
+    [0, 1]
+    """
+    return Bezier(kernels.simplify(path._pathdata, tolerance))
+
+def decimate(path, tolerance=0.5):
+    """Returns a copy of the path with any vertices that can be removed without moving its
+    lines more than `tolerance` canvas units (via Ramer–Douglas–Peucker) left out.
+
+    >>> path = Bezier(None)
+    >>> path.moveto(0, 0)
+    >>> for i in range(1, 100): path.lineto(i, i % 2 * 0.1)
+    >>> len(decimate(path, tolerance=0.5))
+    2
+    """
+    return Bezier(kernels.decimate(path._pathdata, tolerance))
+
+def outline(path, width=None, join=None, cap=None, tolerance=0.1):
+    """Returns a closed path covering the area that stroking the path would paint.
+
+    The `width`, `join`, and `cap` default to the path's strokewidth, joinstyle, and
+    capstyle. Curves, round joins, and round caps are approximated with lines lying within
+    `tolerance` canvas units of the ideal outline.
+
+    >>> path = Bezier(None)
+    >>> path.moveto(0, 0)
+    >>> path.lineto(100, 0)
+    >>> outline(path, 10, cap='square').bounds
+    Region(x=-5, y=-5, w=110, h=10)
+    """
+    join = path.joinstyle if join is None else join
+    cap = path.capstyle if cap is None else cap
+    if join not in ('miter', 'round', 'bevel'):
+        raise DeviceError('Line join style should be MITER, ROUND or BEVEL.')
+    if cap not in ('butt', 'round', 'square'):
+        raise DeviceError('Line cap style should be BUTT, ROUND or SQUARE.')
+    width = path.strokewidth if width is None else width
+    return Bezier(strokes.outline(path._pathdata, width, join, cap, tolerance=tolerance))
+
+def offset(path, distance, join='miter', tolerance=0.1):
+    """Returns a path whose outline runs parallel to the original at a given distance.
+
+    Closed contours grow by `distance` (or shrink if it's negative) and open ones are
+    shifted to the left (or right, if negative) of the direction they were drawn in.
+
+    >>> path = Bezier(None)
+    >>> path.rect(0, 0, 100, 50)
+    >>> offset(path, 10).bounds
+    Region(x=-10, y=-10, w=120, h=70)
+    """
+    if join not in ('miter', 'round', 'bevel'):
+        raise DeviceError('Line join style should be MITER, ROUND or BEVEL.')
+    return Bezier(strokes.offset(path._pathdata, distance, join, tolerance=tolerance))
 
 def contours(path):
     """Returns a list of contours in the path.
@@ -440,28 +614,7 @@ def contours(path):
     2
     """
 
-    contours = []
-    current_contour = None
-    empty = True
-    for i, el in enumerate(path):
-        if el.cmd == MOVETO:
-            if not empty:
-                contours.append(current_contour)
-            current_contour = Bezier()
-            current_contour.moveto(el.x, el.y)
-            empty = True
-        elif el.cmd == LINETO:
-            empty = False
-            current_contour.lineto(el.x, el.y)
-        elif el.cmd == CURVETO:
-            empty = False
-            current_contour.curveto(el.ctrl1.x, el.ctrl1.y,
-                el.ctrl2.x, el.ctrl2.y, el.x, el.y)
-        elif el.cmd == CLOSE:
-            current_contour.closepath()
-    if not empty:
-        contours.append(current_contour)
-    return contours
+    return [Bezier(contour) for contour in path._pathdata.contours()]
 
 def findpath(points, curvature=1.0):
 
@@ -476,64 +629,11 @@ def findpath(points, curvature=1.0):
     Curvature is only useful if the path has more than three points.
     """
 
-    # The list of points consists of Point objects,
-    # but it shouldn't crash on something straightforward
-    # such as someone supplying a list of (x,y)-tuples.
-    points = list(points)  # copy to avoid modifying the input
-    for i, pt in enumerate(points):
-        if isinstance(pt, (tuple, list)):
-            points[i] = Point(pt[0], pt[1])
-
+    # The list of points may consist of Point objects, (x,y)-tuples, or an (N,2) array
+    # (all of which get solved for their control points at once)
+    points = _as_pairs(points if isinstance(points, np.ndarray) else list(points))
     if len(points) == 0: return None
-    if len(points) == 1:
-        path = Bezier(None)
-        pt = points[0]
-        path.moveto(pt.x, pt.y)
-        return path
-    if len(points) == 2:
-        path = Bezier(None)
-        pt1, pt2 = points[:2]
-        path.moveto(pt1.x, pt1.y)
-        path.lineto(pt2.x, pt2.y)
-        return path
-
-    # Zero curvature means straight lines.
-
-    curvature = max(0, min(1, curvature))
-    if curvature == 0:
-        path = Bezier(None)
-        path.moveto(points[0].x, points[0].y)
-        for i in range(len(points)):
-            path.lineto(points[i].x, points[i].y)
-        return path
-
-    curvature = 4 + (1.0-curvature)*40
-    dx = {0: 0, len(points)-1: 0}
-    dy = {0: 0, len(points)-1: 0}
-    bi = {1: -0.25}
-    ax = {1: (points[2].x-points[0].x-dx[0]) / 4.0}
-    ay = {1: (points[2].y-points[0].y-dy[0]) / 4.0}
-
-    for i in range(2, len(points)-1):
-        bi[i] = -1.0 / (curvature + bi[i-1])
-        ax[i] = -(points[i+1].x-points[i-1].x-ax[i-1]) * bi[i]
-        ay[i] = -(points[i+1].y-points[i-1].y-ay[i-1]) * bi[i]
-
-    for i in reversed(range(1, len(points)-1)):
-        dx[i] = ax[i] + dx[i+1] * bi[i]
-        dy[i] = ay[i] + dy[i+1] * bi[i]
-
-    path = Bezier(None)
-    path.moveto(points[0].x, points[0].y)
-    for i in range(len(points)-1):
-        path.curveto(points[i].x + dx[i],
-                     points[i].y + dy[i],
-                     points[i+1].x - dx[i+1],
-                     points[i+1].y - dy[i+1],
-                     points[i+1].x,
-                     points[i+1].y)
-
-    return path
+    return Bezier(kernels.findpath(points, curvature))
 
 def insert_point(path, t):
 
@@ -567,54 +667,39 @@ def insert_point(path, t):
 
     i, t, closeto = _locate(path, t)
 
-    x0 = path[i].x
-    y0 = path[i].y
-    p1 = path[i+1]
-    p1cmd, x3, y3, x1, y1, x2, y2 = p1.cmd, p1.x, p1.y, p1.ctrl1.x, p1.ctrl1.y, p1.ctrl2.x, p1.ctrl2.y
+    cmds, segs = path._pathdata.segments()
+    cmd = cmds[i]
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = segs[i].tolist()
 
-    if p1cmd == CLOSE:
-        pt_cmd = LINETO
-        pt_x, pt_y = linepoint(t, x0, y0, closeto.x, closeto.y)
-    elif p1cmd == LINETO:
-        pt_cmd = LINETO
+    if cmd in (LINETO, CLOSE):
+        # add a line to the new point ahead of the existing element
         pt_x, pt_y = linepoint(t, x0, y0, x3, y3)
-    elif p1cmd == CURVETO:
-        pt_cmd = CURVETO
+        new_path = path._pathdata.spliced(i+1, 0, [LINETO], [(pt_x, pt_y)])
+    elif cmd == CURVETO:
+        # replace the curve with a pair of curves meeting at the new point
         pt_x, pt_y, pt_c1x, pt_c1y, pt_c2x, pt_c2y, pt_h1x, pt_h1y, pt_h2x, pt_h2y = \
             curvepoint(t, x0, y0, x1, y1, x2, y2, x3, y3, True)
+        new_path = path._pathdata.spliced(i+1, 1, [CURVETO, CURVETO], [
+            (pt_h1x, pt_h1y), (pt_c1x, pt_c1y), (pt_x, pt_y),
+            (pt_c2x, pt_c2y), (pt_h2x, pt_h2y), (x3, y3)
+        ])
     else:
         raise DeviceError("Locate should not return a MOVETO")
 
-    new_path = Bezier(None)
-    new_path.moveto(path[0].x, path[0].y)
-    for j in range(1, len(path)):
-        if j == i+1:
-            if pt_cmd == CURVETO:
-                new_path.curveto(pt_h1x, pt_h1y,
-                             pt_c1x, pt_c1y,
-                             pt_x, pt_y)
-                new_path.curveto(pt_c2x, pt_c2y,
-                             pt_h2x, pt_h2y,
-                             path[j].x, path[j].y)
-            elif pt_cmd == LINETO:
-                new_path.lineto(pt_x, pt_y)
-                if path[j].cmd != CLOSE:
-                    new_path.lineto(path[j].x, path[j].y)
-                else:
-                    new_path.closepath()
-            else:
-                raise DeviceError("Didn't expect pt_cmd %s here" % pt_cmd)
+    return Bezier(new_path)
 
-        else:
-            if path[j].cmd == MOVETO:
-                new_path.moveto(path[j].x, path[j].y)
-            if path[j].cmd == LINETO:
-                new_path.lineto(path[j].x, path[j].y)
-            if path[j].cmd == CURVETO:
-                new_path.curveto(path[j].ctrl1.x, path[j].ctrl1.y,
-                             path[j].ctrl2.x, path[j].ctrl2.y,
-                             path[j].x, path[j].y)
-            if path[j].cmd == CLOSE:
-                new_path.closepath()
-    return new_path
+def insert_points(path, ts):
+    """Returns a path copy with an extra point at each of the t values.
 
+    The t values are located on the path in a single pass and every affected segment is
+    split at once (rather than rebuilding the path after each insertion).
+
+    >>> path = Bezier(None)
+    >>> path.moveto(0, 0)
+    >>> path.lineto(100, 0)
+    >>> path = insert_points(path, [0.75, 0.25])
+    >>> [curve.x for curve in path]
+    [0.0, 25.0, 75.0, 100.0]
+    """
+    idx, ts = _locate_all(path, np.atleast_1d(ts))
+    return Bezier(kernels.split_segments(path._pathdata, idx, ts))
@@ -0,0 +1,367 @@
+# encoding: utf-8
+"""Spatial indexes for fast proximity queries on large sets of points & rectangles
+
+The indexes are written in plain numpy (without any Cocoa dependencies). The KDTree
+accepts PointArrays, (N,2) arrays, or lists of Point objects or x/y tuples. The
+SpatialHash accepts Regions or x, y, w, h tuples.
+"""
+import numpy as np
+from .vectors import PairArray, _as_pairs, _rect_tuple
+
+class KDTree(object):
+    """A k-d tree of 2D points supporting nearest-neighbor and fixed-radius queries
+
+    Points are identified by their index in the sequence used to build the tree (with any
+    points added later via insert() numbered sequentially after them). Points added with
+    insert() or repositioned with move() are searched exhaustively until the tree is next
+    rebuilt, which happens automatically once they make up `rebuild_ratio` of the total.
+    """
+
+    def __init__(self, points, leafsize=32, rebuild_ratio=0.25):
+        self.leafsize = max(1, int(leafsize))
+        self.rebuild_ratio = rebuild_ratio
+        self._points = _as_pairs(points)
+        self.rebuild()
+
+    def __len__(self):
+        return len(self._points)
+
+    @property
+    def points(self):
+        """A read-only (N,2) view of the points' current coordinates"""
+        view = self._points.view()
+        view.flags.writeable = False
+        return view
+
+    ### Construction & updates ###
+
+    def rebuild(self, points=None):
+        """Rebuild the tree from scratch (optionally replacing all of the points)"""
+        if points is not None:
+            self._points = _as_pairs(points)
+        pts = self._points
+        order = np.arange(len(pts))
+
+        # the nodes are stored as parallel lists (which are faster to index into than
+        # arrays when traversing the tree one node at a time). leaves have a dim of -1
+        dims, splits, lefts, rights, starts, ends = [], [], [], [], [], []
+
+        # split nodes at the median of their cell's wider dimension until they fit in a leaf
+        coords = pts.T.copy()
+        lo, hi = (pts.min(axis=0), pts.max(axis=0)) if len(pts) else (np.zeros(2), np.zeros(2))
+        todo = [(0, len(pts), -1, lefts, tuple(lo), tuple(hi))]
+        while todo:
+            start, end, parent, side, lo, hi = todo.pop()
+            node = len(dims)
+            if parent >= 0:
+                side[parent] = node
+            starts.append(start)
+            ends.append(end)
+            lefts.append(-1)
+            rights.append(-1)
+
+            if end - start <= self.leafsize:
+                dims.append(-1)
+                splits.append(0.0)
+                continue
+
+            idx = order[start:end]
+            dim = 0 if hi[0] - lo[0] >= hi[1] - lo[1] else 1
+            vals = coords[dim][idx]
+            mid = (end - start) // 2
+            part = np.argpartition(vals, mid)
+            order[start:end] = idx[part]
+            split = float(vals[part[mid]])
+            dims.append(dim)
+            splits.append(split)
+            if dim == 0:
+                todo.append((start + mid, end, node, rights, (split, lo[1]), hi))
+                todo.append((start, start + mid, node, lefts, lo, (split, hi[1])))
+            else:
+                todo.append((start + mid, end, node, rights, (lo[0], split), hi))
+                todo.append((start, start + mid, node, lefts, lo, (hi[0], split)))
+
+        self._dims, self._splits, self._lefts, self._rights = dims, splits, lefts, rights
+        self._starts, self._ends = starts, ends
+        self._order = order
+        self._sorted = pts[order]
+        self._rank = np.empty_like(order)    # each point's position in the tree order
+        self._rank[order] = np.arange(len(order))
+        self._stale = np.zeros(len(pts), dtype=bool) # flags moved points (in tree order)
+        self._pending = np.empty(0, dtype=np.intp)   # points outside of the tree
+        return self
+
+    def insert(self, points):
+        """Add points to the index, returning their indices"""
+        new = _as_pairs(points)
+        first = len(self._points)
+        self._points = np.concatenate([self._points, new])
+        added = np.arange(first, len(self._points))
+        self._pending = np.concatenate([self._pending, added])
+        self._maybe_rebuild()
+        return added
+
+    def move(self, indices, points):
+        """Update the coordinates of existing points"""
+        indices = np.atleast_1d(np.asarray(indices, dtype=np.intp))
+        self._points[indices] = _as_pairs(points)
+        in_tree = indices[indices < len(self._order)]
+        self._stale[self._rank[in_tree]] = True
+        self._pending = np.union1d(self._pending, in_tree)
+        self._maybe_rebuild()
+
+    def _maybe_rebuild(self):
+        if len(self._pending) > max(self.leafsize, self.rebuild_ratio * len(self._points)):
+            self.rebuild()
+
+    ### Queries ###
+
+    def nearest(self, point, k=1):
+        """Find the k points closest to a Point or (x,y) pair
+
+        Returns an (indices, distances) tuple of arrays ordered from nearest to farthest.
+        If the query is a PointArray or (M,2) array, the results are (M,k) arrays with one
+        row per query point.
+        """
+        queries, single = _queries(point)
+        k = min(int(k), len(self._points))
+        found = [self._nearest(qx, qy, k) for qx, qy in queries.tolist()]
+        if single:
+            return found[0]
+        if not found:
+            return np.empty((0, k), dtype=np.intp), np.empty((0, k))
+        indices, distances = zip(*found)
+        return np.array(indices), np.array(distances)
+
+    def within(self, point, radius):
+        """Find the indices of all the points within `radius` of a Point or (x,y) pair
+
+        The indices are ordered from nearest to farthest. If the query is a PointArray or
+        (M,2) array, returns a list with an array of indices for each query point.
+        """
+        queries, single = _queries(point)
+        found = [self._within(qx, qy, radius) for qx, qy in queries.tolist()]
+        return found[0] if single else found
+
+    def _leaves(self, qx, qy, limit):
+        # generate the (start, end) ranges of the leaves that might hold points within
+        # sqrt(limit()) of the query point, visiting nearer leaves first
+        dims, splits, lefts, rights = self._dims, self._splits, self._lefts, self._rights
+        stack = [(0, 0.0)] if len(self._order) else []
+        while stack:
+            node, bound = stack.pop()
+            if bound > limit():
+                continue
+            dim = dims[node]
+            if dim < 0:
+                yield self._starts[node], self._ends[node]
+                continue
+            diff = (qx if dim == 0 else qy) - splits[node]
+            near, far = (lefts[node], rights[node]) if diff < 0 else (rights[node], lefts[node])
+            stack.append((far, max(bound, diff*diff)))
+            stack.append((near, bound))
+
+    def _dist2(self, pts, qx, qy):
+        dx, dy = pts[:,0] - qx, pts[:,1] - qy
+        return dx*dx + dy*dy
+
+    def _nearest(self, qx, qy, k):
+        best_d, best_i = np.empty(0), np.empty(0, dtype=np.intp)
+        if not k:
+            return best_i, best_d
+        worst = [np.inf]
+        stale = self._stale.any()
+
+        def merge(d, idx):
+            cand_d, cand_i = np.concatenate([best_d, d]), np.concatenate([best_i, idx])
+            if len(cand_d) > k:
+                keep = np.argpartition(cand_d, k-1)[:k]
+                cand_d, cand_i = cand_d[keep], cand_i[keep]
+            if len(cand_d) == k:
+                worst[0] = cand_d.max()
+            return cand_d, cand_i
+
+        # search the points outside the tree first (to tighten the bound) then the leaves
+        if len(self._pending):
+            best_d, best_i = merge(self._dist2(self._points[self._pending], qx, qy), self._pending)
+        for start, end in self._leaves(qx, qy, lambda: worst[0]):
+            d = self._dist2(self._sorted[start:end], qx, qy)
+            if stale:
+                d[self._stale[start:end]] = np.inf
+            if d.min() < worst[0]:
+                best_d, best_i = merge(d, self._order[start:end])
+
+        # drop any moved points that filled out a too-small result set
+        ordering = np.lexsort([best_i, best_d])
+        ordering = ordering[np.isfinite(best_d[ordering])]
+        return best_i[ordering], np.sqrt(best_d[ordering])
+
+    def _within(self, qx, qy, radius):
+        r2 = radius * radius
+        limit = lambda: r2
+        hits_d, hits_i = [], []
+        stale = self._stale.any()
+
+        if len(self._pending):
+            d = self._dist2(self._points[self._pending], qx, qy)
+            hits_d.append(d[d <= r2])
+            hits_i.append(self._pending[d <= r2])
+        for start, end in self._leaves(qx, qy, limit):
+            d = self._dist2(self._sorted[start:end], qx, qy)
+            close = d <= r2
+            if stale:
+                close &= ~self._stale[start:end]
+            if close.any():
+                hits_d.append(d[close])
+                hits_i.append(self._order[start:end][close])
+
+        if not hits_i:
+            return np.empty(0, dtype=np.intp)
+        hits_d, hits_i = np.concatenate(hits_d), np.concatenate(hits_i)
+        return hits_i[np.lexsort([hits_i, hits_d])]
+
+def _queries(point):
+    # returns an (M,2) array of query points and whether a single point was passed
+    if not isinstance(point, (PairArray, np.ndarray)) or np.ndim(point) == 1:
+        coords = tuple(point)
+        if len(coords) == 2 and np.isscalar(coords[0]) and np.isscalar(coords[1]):
+            return np.array([coords], dtype=np.float64), True
+    return _as_pairs(point), False
+
+class SpatialHash(object):
+    """A uniform grid that buckets rectangles by the cells they overlap
+
+    Each rectangle is stored along with an arbitrary item (which defaults to the id returned
+    by insert). Queries return the items whose rectangles overlap or touch the query rect
+    and can be used as a broadphase before running more costly exact tests.
+
+    If no `cellsize` is given, it's set to the median dimension of the first batch of
+    rectangles added to the grid. Rectangles spanning more than `max_span` cells aren't
+    bucketed at all and are instead checked against every query.
+    """
+
+    def __init__(self, rects=None, items=None, cellsize=None, max_span=256):
+        self.cellsize = cellsize
+        self.max_span = max_span
+        self._cells = {}
+        self._rects = []
+        self._items = []
+        self._oversized = set() # ids of the rects that were too big to bucket
+        self._occupied = None   # the range of cells holding anything (as x0, x1, y0, y1)
+        self._array = np.empty((0, 4)) # a copy of the rects for linear scans (see _scan)
+        if rects is not None:
+            self.insert_many(rects, items)
+
+    def __len__(self):
+        return len(self._rects) - self._rects.count(None)
+
+    def _span(self, rect):
+        # the range of cells covered by an x, y, w, h rect
+        x, y, w, h = rect
+        cs = self.cellsize
+        return int(x // cs), int((x + max(w, 0)) // cs), int(y // cs), int((y + max(h, 0)) // cs)
+
+    def insert(self, rect, item=None):
+        """Add a rectangle (a Region or x, y, w, h tuple) to the grid and return its id"""
+        return self.insert_many([rect], None if item is None else [item])[0]
+
+    def insert_many(self, rects, items=None):
+        """Add a sequence of rectangles (and, optionally, a matching sequence of items) and
+        return a list of their ids"""
+        rects = [tuple(map(float, _rect_tuple(r))) for r in rects]
+        if self.cellsize is None and rects:
+            dims = [max(w, h) for x, y, w, h in rects]
+            self.cellsize = float(np.median(dims)) or max(max(dims), 1.0)
+
+        ids = list(range(len(self._rects), len(self._rects) + len(rects)))
+        self._rects.extend(rects)
+        self._items.extend(ids if items is None else items)
+        cells = self._cells
+        for i, rect in zip(ids, rects):
+            x0, x1, y0, y1 = self._span(rect)
+            if (x1 - x0 + 1) * (y1 - y0 + 1) > self.max_span:
+                self._oversized.add(i)
+                continue
+            occ = self._occupied
+            if occ is None:
+                self._occupied = [x0, x1, y0, y1]
+            else:
+                if x0 < occ[0]: occ[0] = x0
+                if x1 > occ[1]: occ[1] = x1
+                if y0 < occ[2]: occ[2] = y0
+                if y1 > occ[3]: occ[3] = y1
+            for cx in range(x0, x1+1):
+                for cy in range(y0, y1+1):
+                    cells.setdefault((cx, cy), []).append(i)
+        return ids
+
+    def remove(self, id):
+        """Remove a rectangle from the grid given the id returned when it was inserted"""
+        if id in self._oversized:
+            self._oversized.discard(id)
+        else:
+            x0, x1, y0, y1 = self._span(self._rects[id])
+            for cx in range(x0, x1+1):
+                for cy in range(y0, y1+1):
+                    self._cells[(cx, cy)].remove(id)
+        self._rects[id] = self._items[id] = None
+        if id < len(self._array):
+            self._array[id] = np.nan
+
+    def _scan(self):
+        # bring the array copy of the rects up to date with any that have been inserted
+        # since the last linear scan (with removed rects' rows filled with nan)
+        synced = len(self._array)
+        if synced < len(self._rects):
+            added = [(np.nan,)*4 if r is None else r for r in self._rects[synced:]]
+            self._array = np.concatenate([self._array, np.array(added, dtype=np.float64)])
+        return self._array
+
+    def query(self, rect):
+        """Return a list of the items whose rectangles overlap (or touch) a Region or
+        x, y, w, h tuple"""
+        if self.cellsize is None:
+            return []
+        qx, qy, qw, qh = map(float, _rect_tuple(rect))
+        x0, x1, y0, y1 = self._span((qx, qy, qw, qh))
+
+        # only the part of the grid that's been filled in needs to be visited
+        occ = self._occupied
+        if occ is None:
+            x1, y1 = x0 - 1, y0 - 1
+        else:
+            if x0 < occ[0]: x0 = occ[0]
+            if x1 > occ[1]: x1 = occ[1]
+            if y0 < occ[2]: y0 = occ[2]
+            if y1 > occ[3]: y1 = occ[3]
+        ncells = (x1 - x0 + 1) * (y1 - y0 + 1) if x1 >= x0 and y1 >= y0 else 0
+
+        # if that's still more cells than rects, it's quicker to check all of them at once
+        rects, items = self._rects, self._items
+        if ncells > len(rects):
+            return [items[i] for i in np.flatnonzero(bbox_overlaps(self._scan(), (qx, qy, qw, qh)))]
+
+        seen, found = set(), []
+        cells = self._cells
+        for cx in range(x0, x1+1):
+            for cy in range(y0, y1+1):
+                for i in cells.get((cx, cy), ()):
+                    if i in seen:
+                        continue
+                    seen.add(i)
+                    x, y, w, h = rects[i]
+                    if x <= qx + qw and qx <= x + w and y <= qy + qh and qy <= y + h:
+                        found.append(items[i])
+        for i in sorted(self._oversized):
+            x, y, w, h = rects[i]
+            if x <= qx + qw and qx <= x + w and y <= qy + qh and qy <= y + h:
+                found.append(items[i])
+        return found
+
+def bbox_overlaps(rects, rect):
+    """Returns a boolean mask flagging which rows of an (N,4) array of x, y, w, h values
+    overlap (or touch) a single rect"""
+    rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+    qx, qy, qw, qh = map(float, _rect_tuple(rect))
+    x, y, w, h = rects.T
+    return (x <= qx + qw) & (qx <= x + w) & (y <= qy + qh) & (qy <= y + h)
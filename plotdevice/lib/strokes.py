@@ -0,0 +1,153 @@
+# encoding: utf-8
+"""Conversion of stroked paths into fillable outlines
+
+The paths are flattened into polylines whose sides are offset by half the stroke width.
+Where a polyline turns, the outer side gets a miter, round, or bevel join while the inner
+side doubles back through the vertex. The resulting polygons overlap themselves in all
+the places a pen tracing the path would have painted twice, but wind in a consistent
+direction, so merging them with the boolean engine leaves just the stroke's outline.
+
+The join & cap styles are given as the same strings used by the MITER, ROUND, BEVEL, BUTT,
+and SQUARE constants in plotdevice.gfx.
+"""
+import numpy as np
+from .pathdata import PathData, MOVETO, LINETO, CLOSE
+from .kernels import _polylines, _from_polylines
+from . import booleans
+
+def outline(data, width, join='miter', cap='butt', miterlimit=10, tolerance=0.1):
+    """Returns a PathData with closed contours covering the area a stroke of the given
+    width would paint. Curves and round joins & caps are approximated by lines that stray
+    no more than `tolerance` from the ideal outline."""
+    half = width / 2.0
+    lines, closed = _polylines(data, tolerance)
+    if not lines or half <= 0:
+        return PathData()
+
+    cmds, pts = [], []
+    for line, is_closed in zip(lines, closed):
+        if is_closed:
+            # an offset loop on either side (the reversed one runs along the right)
+            loop = line[:-1]
+            for side in (loop, loop[::-1]):
+                ring = _side(side, half, True, join, miterlimit, tolerance)
+                cmds.append([MOVETO] + [LINETO] * (len(ring) - 1) + [CLOSE])
+                pts.append(ring)
+        else:
+            # up the left side, around the end cap, and back down the right side
+            back = line[::-1]
+            ring = np.concatenate([_side(line, half, False, join, miterlimit, tolerance),
+                                   _cap(line, half, cap, tolerance),
+                                   _side(back, half, False, join, miterlimit, tolerance),
+                                   _cap(back, half, cap, tolerance)])
+            cmds.append([MOVETO] + [LINETO] * (len(ring) - 1) + [CLOSE])
+            pts.append(ring)
+    return booleans.union_all([_from_polylines(cmds, pts)])
+
+def offset(data, distance, join='miter', miterlimit=10, tolerance=0.1):
+    """Returns a PathData whose lines run parallel to the original at a given distance.
+
+    The area enclosed by the closed contours grows by `distance` (or shrinks if it's
+    negative). Open contours are shifted to their left (or, for negative distances,
+    right) side, relative to the direction they were drawn in.
+    """
+    lines, closed = _polylines(data, tolerance)
+    shapes = [PathData.from_points(line[:-1], closed=True) for line, c in zip(lines, closed) if c]
+
+    result = PathData()
+    if shapes and distance:
+        region = booleans.union_all(shapes)
+        rim = outline(region, 2 * abs(distance), join, 'butt', miterlimit, tolerance)
+        result = booleans.union(region, rim) if distance > 0 else booleans.difference(region, rim)
+    elif shapes:
+        result = booleans.union_all(shapes)
+
+    for line, is_closed in zip(lines, closed):
+        if not is_closed:
+            shifted = _side(line, float(distance), False, join, miterlimit, tolerance, trim=True) if distance else line
+            result.extend(PathData.from_points(shifted))
+    return result
+
+def _side(line, half, closed, join, miterlimit, tolerance, trim=False):
+    """Returns the vertices of a polyline offset by `half` to the left of `line` (or to
+    its right if `half` is negative), with joins wherever it turns away from that side.
+    Where it turns toward that side, the offset doubles back through the vertex (or if
+    `trim` is set, stops where the offset lines cross)."""
+    sign = 1 if half > 0 else -1
+    ahead = np.roll(line, -1, axis=0) if closed else line[1:]
+    dirs = ahead - line[:len(ahead)]
+    dirs /= np.hypot(*dirs.T)[:,None]
+    normals = np.column_stack([-dirs[:,1], dirs[:,0]])
+
+    # the turns between consecutive segments (all the way around if closed)
+    prev, next = (np.roll(normals, 1, axis=0), normals) if closed else (normals[:-1], normals[1:])
+    pd, nd = (np.roll(dirs, 1, axis=0), dirs) if closed else (dirs[:-1], dirs[1:])
+    corners = line if closed else line[1:-1]
+    turn = (pd[:,0] * nd[:,1] - pd[:,1] * nd[:,0]) * sign
+    dot = (pd * nd).sum(axis=1)
+    a, b = corners + half * prev, corners + half * next
+
+    # build each corner's points: straight-through corners need only one, inner corners
+    # double back through the vertex, and outer corners get a join
+    straight = (turn == 0) & (dot > 0)
+    inner = (turn > 0) & ~straight
+    outer = ~straight & ~inner
+    chunks = [(np.flatnonzero(straight), b[straight][:,None])]
+    spread = 1 + (prev * next).sum(axis=1)
+    if trim:
+        crossed = inner & (spread > 1e-9)
+        tips = corners[crossed] + half * (prev[crossed] + next[crossed]) / spread[crossed][:,None]
+        chunks.append((np.flatnonzero(crossed), tips[:,None]))
+        inner &= ~crossed
+    chunks.append((np.flatnonzero(inner), np.stack([a[inner], corners[inner], b[inner]], axis=1)))
+
+    if join == 'round':
+        idx = np.flatnonzero(outer)
+        start = np.arctan2(*(prev[idx] * sign).T[::-1])
+        sweep = np.arctan2(*(next[idx] * sign).T[::-1]) - start
+        sweep = (sweep + np.pi) % (2 * np.pi) - np.pi
+        sweep[(turn[idx] == 0)] = -np.pi * sign # reversals go around the end
+        arc_idx, arc_pts = _arcs(corners[idx], abs(half), start, sweep, tolerance)
+        chunks.append((idx[arc_idx], arc_pts[:,None]))
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = 2 / np.sqrt(2 * spread)
+        mitered = outer & (join == 'miter') & (ratio <= miterlimit)
+        beveled = outer & ~mitered
+        tips = corners[mitered] + half * (prev[mitered] + next[mitered]) / spread[mitered][:,None]
+        chunks.append((np.flatnonzero(mitered), np.stack([a[mitered], tips, b[mitered]], axis=1)))
+        chunks.append((np.flatnonzero(beveled), np.stack([a[beveled], b[beveled]], axis=1)))
+
+    # put each corner's points in order along the polyline
+    idx = np.concatenate([np.repeat(i, c.shape[1]) for i, c in chunks])
+    pts = np.concatenate([c.reshape(-1, 2) for i, c in chunks])
+    pts = pts[np.argsort(idx, kind='stable')]
+    if not closed:
+        pts = np.concatenate([line[:1] + half * normals[:1], pts, line[-1:] + half * normals[-1:]])
+    return pts
+
+def _cap(line, half, cap, tolerance):
+    """Returns the points between the left & right sides at the end of a polyline"""
+    end = line[-1]
+    d = line[-1] - line[-2]
+    d /= np.hypot(*d)
+    n = np.array([-d[1], d[0]])
+    if cap == 'square':
+        return np.array([end + half * (n + d), end + half * (d - n)])
+    elif cap == 'round':
+        _, pts = _arcs(end[None], half, np.arctan2(n[1], n[0])[None], np.array([-np.pi]), tolerance)
+        return pts[1:-1]
+    return np.empty((0, 2))
+
+def _arcs(centers, radius, start, sweep, tolerance):
+    """Returns the points along a set of arcs as a pair of arrays with the index of each
+    point's arc and its coordinates (including the arcs' start & end points)"""
+    if radius > tolerance:
+        step = 2 * np.arccos(1 - tolerance / radius)
+    else:
+        step = np.pi / 2
+    counts = np.maximum(np.ceil(abs(sweep) / step).astype(np.intp), 1) + 1
+    idx = np.repeat(np.arange(len(centers)), counts)
+    k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    theta = start[idx] + sweep[idx] * k / (counts[idx] - 1)
+    return idx, centers[idx] + radius * np.column_stack([np.cos(theta), np.sin(theta)])
@@ -0,0 +1,421 @@
+# encoding: utf-8
+"""Array-backed counterparts to the Point, Size, and Region classes
+
+A PointArray (or SizeArray) wraps an (N,2) float64 array and applies arithmetic and the
+Point class's trig methods to every element at once. They can be passed to the drawing
+commands anywhere a list of points is accepted. A RegionArray does the same for an (N,4)
+array of rectangles.
+
+The rect_* functions implement Region's math on plain (x, y, w, h) tuples.
+"""
+import numpy as np
+from math import pi
+from plotdevice import DeviceError
+from . import register
+
+_ctx = register(__name__)
+
+# the size of a full circle in each of the context's geometry() modes
+_BASIS = {'degrees':360.0, 'radians':2*pi, 'percent':1.0}
+
+def _to_degrees(theta):
+    mode = getattr(_ctx, '_thetamode', 'degrees')
+    return theta if mode == 'degrees' else theta * 360.0 / _BASIS[mode]
+
+def _from_degrees(theta):
+    mode = getattr(_ctx, '_thetamode', 'degrees')
+    return theta if mode == 'degrees' else theta * _BASIS[mode] / 360.0
+
+def _as_pairs(pairs):
+    if isinstance(pairs, PairArray):
+        return pairs._xy.copy()
+    try:
+        xy = np.array(pairs, dtype=np.float64)
+    except (TypeError, ValueError):
+        # sequences of Points & Sizes (which are iterable but not indexable)
+        xy = np.array([tuple(p) for p in pairs], dtype=np.float64)
+    if xy.ndim == 1 and len(xy) % 2 == 0:
+        xy = xy.reshape(-1, 2)
+    if xy.ndim != 2 or xy.shape[1] != 2:
+        badshape = 'Expected a sequence of coordinate pairs (got an array of shape %r)' % (xy.shape,)
+        raise DeviceError(badshape)
+    return xy
+
+def _operand(other):
+    # coerce the right-hand side of an arithmetic op into something that broadcasts against
+    # an (N,2) array: a scalar, a single x/y pair, or an array of pairs
+    if isinstance(other, PairArray):
+        return other._xy
+    if isinstance(other, np.ndarray):
+        return other
+    if hasattr(other, '__float__'):
+        return float(other)
+    return np.array(tuple(other), dtype=np.float64)
+
+def _vectorized(op):
+    def apply(self, other):
+        return self._wrap(op(self._xy, _operand(other)))
+    return apply
+
+def _inplace(op):
+    def apply(self, other):
+        op(self._xy, _operand(other), out=self._xy)
+        return self
+    return apply
+
+class PairArray(object):
+    """Base class for PointArray & SizeArray objects (with element-wise arithmetic support)"""
+    __slots__ = '_xy',
+    __hash__ = None
+    __array_ufunc__ = None # make numpy defer to our reflected operators
+
+    # the class used for individual elements (gfx.geometry swaps in Point & Size)
+    _pair = tuple
+
+    def __init__(self, pairs=()):
+        self._xy = _as_pairs(pairs)
+
+    @classmethod
+    def _wrap(cls, xy):
+        # adopt an (N,2) float64 array without copying or validating it
+        obj = cls.__new__(cls)
+        obj._xy = xy
+        return obj
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self._xy.tolist())
+
+    def __len__(self):
+        return len(self._xy)
+
+    def __iter__(self):
+        pair = self._pair
+        for a, b in self._xy.tolist():
+            yield pair((a, b))
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)):
+            return self._pair(tuple(self._xy[idx].tolist()))
+        return self._wrap(self._xy[idx].reshape(-1, 2))
+
+    def __setitem__(self, idx, val):
+        self._xy[idx] = _operand(val)
+
+    def __array__(self, dtype=None, copy=None):
+        return self._xy if dtype is None else self._xy.astype(dtype)
+
+    def copy(self):
+        return self._wrap(self._xy.copy())
+
+    @property
+    def array(self):
+        """The (N,2) float64 array holding the coordinates (modifications are reflected
+        in the PairArray)"""
+        return self._xy
+
+    def __neg__(self): return self._wrap(-self._xy)
+    def __pos__(self): return self._wrap(self._xy.copy())
+    def __abs__(self): return self._wrap(np.abs(self._xy))
+
+    __add__ = __radd__ = _vectorized(np.add)
+    __sub__ = _vectorized(np.subtract)
+    __rsub__ = _vectorized(lambda a, b: b - a)
+    __mul__ = __rmul__ = _vectorized(np.multiply)
+    __truediv__ = _vectorized(np.true_divide)
+    __rtruediv__ = _vectorized(lambda a, b: b / a)
+    __floordiv__ = _vectorized(np.floor_divide)
+    __rfloordiv__ = _vectorized(lambda a, b: b // a)
+
+    __iadd__ = _inplace(np.add)
+    __isub__ = _inplace(np.subtract)
+    __imul__ = _inplace(np.multiply)
+    __itruediv__ = _inplace(np.true_divide)
+    __ifloordiv__ = _inplace(np.floor_divide)
+
+class PointArray(PairArray):
+    """Represents a sequence of 2D locations with `x` and `y` array properties"""
+    __slots__ = ()
+
+    def _get_x(self):
+        return self._xy[:,0]
+    def _set_x(self, x):
+        self._xy[:,0] = x
+    x = property(_get_x, _set_x)
+
+    def _get_y(self):
+        return self._xy[:,1]
+    def _set_y(self, y):
+        self._xy[:,1] = y
+    y = property(_get_y, _set_y)
+
+    # bulk versions of Point's pathmatics methods (accepting either x,y values, a single
+    # Point, or a PointArray with one target per element)
+
+    def angle(self, x=0, y=0):
+        dx, dy = (_target(x, y) - self._xy).T
+        return _from_degrees(np.degrees(np.arctan2(dy, dx)))
+
+    def distance(self, x=0, y=0):
+        dx, dy = (_target(x, y) - self._xy).T
+        return np.hypot(dx, dy)
+
+    def reflect(self, *args, **kwargs):
+        d = kwargs.get('d', 1.0)
+        a = kwargs.get('a', 180)
+        if args and not np.isscalar(args[0]):
+            target, opts = _target(args[0]), args[1:]
+        else:
+            target, opts = _target(*args[:2]), args[2:]
+        if opts:
+            d=opts[0]
+        if opts[1:]:
+            a=opts[1]
+        dx, dy = (target - self._xy).T
+        d = d * np.hypot(dx, dy)
+        a = np.radians(a + np.degrees(np.arctan2(dy, dx)))
+        return self._wrap(self._xy + np.column_stack([np.cos(a), np.sin(a)]) * d[:,None])
+
+    def coordinates(self, distance, angle):
+        angle = np.radians(_to_degrees(np.asarray(angle, dtype=np.float64)))
+        distance = np.asarray(distance, dtype=np.float64)
+        offsets = np.stack(np.broadcast_arrays(np.cos(angle), np.sin(angle)), axis=-1)
+        return self._wrap(self._xy + offsets * distance[...,None])
+
+class SizeArray(PairArray):
+    """Represents a sequence of 2D areas with `w` and `h` array properties"""
+    __slots__ = ()
+
+    def _get_w(self):
+        return self._xy[:,0]
+    def _set_w(self, w):
+        self._xy[:,0] = w
+    w = width = property(_get_w, _set_w)
+
+    def _get_h(self):
+        return self._xy[:,1]
+    def _set_h(self, h):
+        self._xy[:,1] = h
+    h = height = property(_get_h, _set_h)
+
+def _target(x=0, y=0):
+    # the reference point(s) for angle/distance calculations as something that broadcasts
+    # against an (N,2) array
+    if np.isscalar(x):
+        return np.array([x, y], dtype=np.float64)
+    return _operand(x)
+
+
+### Rectangle math (following the conventions of the NSRect functions) ###
+
+def rect_union(a, b):
+    """Returns the smallest (x, y, w, h) tuple enclosing two others. Empty rects (with
+    zero or negative dimensions) are ignored."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    if not (aw > 0 and ah > 0):
+        return (0.0, 0.0, 0.0, 0.0) if not (bw > 0 and bh > 0) else (bx, by, bw, bh)
+    if not (bw > 0 and bh > 0):
+        return (ax, ay, aw, ah)
+    x, y = min(ax, bx), min(ay, by)
+    return (x, y, max(ax+aw, bx+bw) - x, max(ay+ah, by+bh) - y)
+
+def rect_intersect(a, b):
+    """Returns the overlapping portion of two (x, y, w, h) tuples (or a zero-rect at the
+    origin if they don't overlap)"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    x, y = max(ax, bx), max(ay, by)
+    w, h = min(ax+aw, bx+bw) - x, min(ay+ah, by+bh) - y
+    if not (w > 0 and h > 0 and aw > 0 and ah > 0 and bw > 0 and bh > 0):
+        return (0.0, 0.0, 0.0, 0.0)
+    return (x, y, w, h)
+
+def _rect_tuple(rect):
+    # unpack a Region, NSRect, (Point, Size) pair, or x/y/w/h sequence
+    if hasattr(rect, 'origin'):
+        (x, y), (w, h) = rect.origin, rect.size
+        return (x, y, w, h)
+    if len(rect) == 2:
+        (x, y), (w, h) = rect
+        return (x, y, w, h)
+    x, y, w, h = rect
+    return (x, y, w, h)
+
+def _as_rects(regions):
+    if isinstance(regions, RegionArray):
+        return regions._rects.copy()
+    try:
+        rects = np.array(regions, dtype=np.float64)
+    except (TypeError, ValueError):
+        rects = np.array([_rect_tuple(r) for r in regions], dtype=np.float64)
+    if rects.size == 0 or rects.shape[1:] == (2, 2):
+        rects = rects.reshape(-1, 4) # (origin, size) pairs
+    if rects.ndim != 2 or rects.shape[1] != 4:
+        badshape = 'Expected a sequence of x, y, w, h rectangles (got an array of shape %r)' % (rects.shape,)
+        raise DeviceError(badshape)
+    return rects
+
+def _rect_operand(args):
+    # the other side of a RegionArray op: a RegionArray, an (N,4) array, or a single rect
+    # given as a Region or as x/y/w/h args
+    if len(args) == 1:
+        other = args[0]
+        if isinstance(other, RegionArray):
+            return other._rects
+        if isinstance(other, np.ndarray):
+            return other
+        args = other
+    return np.array(_rect_tuple(args), dtype=np.float64)
+
+def _edges(rects):
+    # left, top, right, bottom (plus a flag for whether the rect has any area)
+    x, y, w, h = np.moveaxis(rects, -1, 0)
+    return x, y, x+w, y+h, (w > 0) & (h > 0)
+
+class RegionArray(object):
+    """Represents a sequence of rectangles (stored as an (N,4) array of x, y, w, h values)"""
+    __slots__ = '_rects',
+    __hash__ = None
+    __array_ufunc__ = None
+
+    # the class used for individual elements (gfx.geometry swaps in Region)
+    _region = tuple
+
+    def __init__(self, regions=()):
+        self._rects = _as_rects(regions)
+
+    @classmethod
+    def _wrap(cls, rects):
+        obj = cls.__new__(cls)
+        obj._rects = rects
+        return obj
+
+    def __repr__(self):
+        return 'RegionArray(%r)' % self._rects.tolist()
+
+    def __len__(self):
+        return len(self._rects)
+
+    def __iter__(self):
+        region = self._region
+        for rect in self._rects.tolist():
+            yield region(rect)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)):
+            return self._region(self._rects[idx].tolist())
+        return self._wrap(self._rects[idx].reshape(-1, 4))
+
+    def __setitem__(self, idx, val):
+        self._rects[idx] = _rect_operand([val])
+
+    def __array__(self, dtype=None, copy=None):
+        return self._rects if dtype is None else self._rects.astype(dtype)
+
+    def copy(self):
+        return self._wrap(self._rects.copy())
+
+    @property
+    def array(self):
+        """The (N,4) float64 array of x, y, w, h values (modifications are reflected in the
+        RegionArray)"""
+        return self._rects
+
+    @property
+    def origin(self):
+        return PointArray._wrap(self._rects[:,:2])
+
+    @property
+    def size(self):
+        return SizeArray._wrap(self._rects[:,2:])
+
+    x = property(lambda self: self._rects[:,0])
+    y = property(lambda self: self._rects[:,1])
+    w = width = property(lambda self: self._rects[:,2])
+    h = height = property(lambda self: self._rects[:,3])
+    l = left = x
+    t = top = y
+    r = right = property(lambda self: self._rects[:,0] + self._rects[:,2])
+    b = bottom = property(lambda self: self._rects[:,1] + self._rects[:,3])
+
+    def union(self, *args):
+        """Return a RegionArray enclosing each rectangle and the argument (a Region or a
+        RegionArray of the same length)"""
+        other = _rect_operand(args)
+        l0, t0, r0, b0, full0 = _edges(self._rects)
+        l1, t1, r1, b1, full1 = _edges(other)
+        l, t = np.minimum(l0, l1), np.minimum(t0, t1)
+        rects = np.stack(np.broadcast_arrays(l, t, np.maximum(r0, r1) - l, np.maximum(b0, b1) - t), axis=-1)
+
+        # empty rects don't contribute to the union
+        rects = np.where((full0 & ~full1)[...,None], self._rects, rects)
+        rects = np.where((full1 & ~full0)[...,None], other, rects).reshape(-1, 4)
+        rects[~np.broadcast_to(full0 | full1, len(rects))] = 0
+        return self._wrap(rects)
+
+    def intersect(self, *args):
+        """Return a RegionArray with the overlap between each rectangle and the argument (a
+        Region or a RegionArray of the same length). Non-overlapping pairs yield zero-rects."""
+        l0, t0, r0, b0, full0 = _edges(self._rects)
+        l1, t1, r1, b1, full1 = _edges(_rect_operand(args))
+        l, t = np.maximum(l0, l1), np.maximum(t0, t1)
+        w, h = np.minimum(r0, r1) - l, np.minimum(b0, b1) - t
+        rects = np.stack(np.broadcast_arrays(l, t, w, h), axis=-1).reshape(-1, 4)
+        rects[~np.broadcast_to((w > 0) & (h > 0) & full0 & full1, len(rects))] = 0
+        return self._wrap(rects)
+
+    def union_all(self):
+        """Return a single Region enclosing all the (non-empty) rectangles"""
+        l, t, r, b, full = _edges(self._rects[(self._rects[:,2] > 0) & (self._rects[:,3] > 0)])
+        if not len(l):
+            return self._region((0.0, 0.0, 0.0, 0.0))
+        left, top = l.min(), t.min()
+        return self._region((float(left), float(top), float(r.max() - left), float(b.max() - top)))
+
+    def shift(self, dx, dy=None):
+        """Return a RegionArray whose origins are shifted by dx/dy (which can be arrays) or
+        a Point object"""
+        if dy is None:
+            dx, dy = np.broadcast_arrays(*_pair_operand(dx))
+        rects = self._rects.copy()
+        rects[:,0] += dx
+        rects[:,1] += dy
+        return self._wrap(rects)
+
+    def inset(self, dx, dy=None):
+        """Return a RegionArray whose edges are moved `inward' by dx/dy (which can be arrays)
+        or a Point/Size object"""
+        if dy is None:
+            dx, dy = np.broadcast_arrays(*_pair_operand(dx))
+        rects = self._rects.copy()
+        rects += np.stack(np.broadcast_arrays(dx, dy, -2*np.asarray(dx), -2*np.asarray(dy)), axis=-1)
+        return self._wrap(rects)
+
+    def contains(self, x, y=None):
+        """Return a boolean array flagging which rectangles contain a point (or, given a
+        PointArray of the same length, whether each rectangle contains its point)"""
+        pts = _target(x, y) if y is not None else _operand(x)
+        px, py = np.moveaxis(np.broadcast_to(pts, np.shape(pts)[:-1] + (2,)), -1, 0)
+        l, t, r, b, full = _edges(self._rects)
+        return full & (px >= l) & (px < r) & (py >= t) & (py < b)
+
+    def intersects(self, *args):
+        """Return a boolean array flagging which rectangles overlap the argument (a Region or
+        a RegionArray of the same length)"""
+        l0, t0, r0, b0, full0 = _edges(self._rects)
+        l1, t1, r1, b1, full1 = _edges(_rect_operand(args))
+        return full0 & full1 & (l0 < r1) & (l1 < r0) & (t0 < b1) & (t1 < b0)
+
+    def encloses(self, *args):
+        """Return a boolean array flagging which rectangles fully contain the argument (a
+        Region or a RegionArray of the same length)"""
+        l0, t0, r0, b0, full0 = _edges(self._rects)
+        l1, t1, r1, b1, full1 = _edges(_rect_operand(args))
+        return full0 & full1 & (l0 <= l1) & (t0 <= t1) & (r1 <= r0) & (b1 <= b0)
+
+def _pair_operand(val):
+    # a dx/dy offset given as a single number or an x/y pair
+    if np.isscalar(val):
+        return val, val
+    dx, dy = _operand(val).T if isinstance(val, (PairArray, np.ndarray)) else tuple(val)
+    return dx, dy
@@ -201,7 +201,13 @@ def _copy_attrs(source, target, attrs):
 ### tuple/list de-nester ###
 
 def _flatten(seq):
-    return sum( ([x] if not isinstance(x, (list,tuple)) else list(x) for x in seq), [] )
+    flat = []
+    for x in seq:
+        if isinstance(x, (list,tuple)):
+            flat.extend(x)
+        else:
+            flat.append(x)
+    return flat
 
 ### repr decorator (tidies numbers) ###
 
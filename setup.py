@@ -506,6 +506,7 @@ config = dict(
     install_requires = [
         'requests',
         'cachecontrol[filecache]',
+        'numpy',
         'pyobjc-core==11.0',
         'pyobjc-framework-Quartz==11.0',
         'pyobjc-framework-LaunchServices==11.0',
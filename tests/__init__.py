@@ -70,10 +70,16 @@ except (ImportError, RuntimeError) as e:
   pass
 
 def suites():
-  from . import typography, primitives, drawing, compositing, geometry, module
+  from plotdevice import headless
+  from . import pathdata, kernels, vectors, spatial, delaunay, booleans, strokes
+  mods = [pathdata, kernels, vectors, spatial, delaunay, booleans, strokes] # the array-based geometry tests don't need Cocoa
+
+  if not headless:
+    from . import typography, primitives, drawing, compositing, geometry, module
+    mods += [typography, primitives, drawing, compositing, geometry, module]
 
   suite = unittest.TestSuite()
-  for mod in (typography, primitives, drawing, compositing, geometry, module):
+  for mod in mods:
     suite.addTest(mod.suite())
   return suite
 
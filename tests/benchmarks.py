@@ -0,0 +1,551 @@
+# encoding: utf-8
+"""Timing comparisons between the array-based geometry routines and the element-by-element
+approaches they replace.
+
+Run with `python -m tests.benchmarks [name ...]` (omitting names runs all of them). These
+aren't part of the test suites since their results depend on the machine.
+"""
+import sys
+from timeit import Timer
+from plotdevice import headless
+
+BENCHMARKS = []
+
+def benchmark(func):
+    BENCHMARKS.append(func)
+    return func
+
+def compare(setup, number=1, repeat=3, **stmts):
+    """Print the best time for each of the named statements (and its speedup relative to
+    the first one)"""
+    baseline = None
+    for label, stmt in stmts.items():
+        best = min(Timer(stmt, setup).repeat(repeat=repeat, number=number)) / number
+        baseline = baseline or best
+        print("  %-12s %10.3f ms  (%.1fx)" % (label, best*1000, baseline/best))
+
+@benchmark
+def construction():
+    """Building a 100k-point polyline"""
+    setup = "import numpy as np; pts = np.random.rand(100000, 2) * 1000\n"
+    if headless:
+        # without cocoa, approximate Bezier.extend's per-point calls with the store's methods
+        setup += "from plotdevice.lib.pathdata import PathData"
+        compare(setup,
+          lineto="d = PathData(); d.moveto(*pts[0])\nfor x, y in pts[1:].tolist(): d.lineto(x, y)",
+          from_points="PathData.from_points(pts)",
+        )
+    else:
+        setup += "from plotdevice.gfx import Bezier"
+        compare(setup,
+          extend="Bezier().extend(pts.tolist())",
+          from_points="Bezier.from_points(pts)",
+        )
+
+@benchmark
+def sampling():
+    """Sampling 10k points on a 10k-segment path"""
+    if headless:
+        print("  (requires cocoa)")
+        return
+    setup = "import numpy as np; from plotdevice.gfx import Bezier\n" \
+            "path = Bezier.from_points(np.random.rand(10001, 2) * 1000)"
+    compare(setup,
+      point="for i in range(10000): path.point(i/9999.0)",
+      points="list(path.points(10000))",
+    )
+
+@benchmark
+def transforms():
+    """Building a grob's screen transform (translate, rotate, scale, & 3 prepends)"""
+    if headless:
+        print("  (requires cocoa)")
+        return
+    setup = "from plotdevice.gfx import Transform\n" \
+            "from plotdevice.lib.cocoa import NSAffineTransform\n" \
+            "ctm = Transform(); ctm.rotate(30)\n" \
+            "ns_ctm = ctm._nsAffineTransform"
+    compare(setup, number=10000,
+      NSAffineTransform="\n".join([
+        "nudge = NSAffineTransform.transform(); nudge.translateXBy_yBy_(10, 20)",
+        "inv = nudge.copy(); inv.invert()",
+        "xf = NSAffineTransform.transform(); xf.scaleXBy_yBy_(2, 2)",
+        "xf.prependTransform_(nudge); xf.prependTransform_(ns_ctm); xf.prependTransform_(inv)",
+      ]),
+      Transform="\n".join([
+        "nudge = Transform(); nudge.translate(10, 20)",
+        "xf = Transform(); xf.scale(2)",
+        "xf.prepend(nudge); xf.prepend(ctm); xf.prepend(nudge.inverse)",
+      ]),
+    )
+
+@benchmark
+def bulk_transforms():
+    """Rotating 100k points and 1000 100-point paths"""
+    if headless:
+        print("  (requires cocoa)")
+        return
+    setup = "import numpy as np; from plotdevice.gfx import Transform, Bezier, Point\n" \
+            "t = Transform(); t.rotate(30); t.translate(5, 5)\n" \
+            "pts = np.random.rand(100000, 2) * 1000; pt_list = [Point(x, y) for x, y in pts.tolist()]\n" \
+            "paths = [Bezier.from_points(np.random.rand(100, 2) * 1000) for i in range(1000)]"
+    compare(setup,
+      apply="[t.apply(pt) for pt in pt_list]",
+      apply_array="t.apply_array(pts)",
+    )
+    compare(setup,
+      apply="[t.apply(p) for p in paths]",
+      apply_many="t.apply_many(paths)",
+      inplace="t.apply_many(paths, inplace=True)",
+    )
+
+@benchmark
+def refitting():
+    """Re-fitting 500 200-point paths to moving frames (time & peak allocations per frame)"""
+    import numpy as np
+    if headless:
+        # without cocoa, compare the copy-then-transform that Transform.apply does with
+        # transforming the stores directly
+        from plotdevice.lib.pathdata import PathData
+        datas = [PathData.from_points(np.random.rand(200, 2) * 100) for i in range(500)]
+        matrix = (1.01, 0, 0, 1.01, 0.5, 0.5)
+        def copying():
+            for i, data in enumerate(datas):
+                datas[i] = data.copy()
+                datas[i].transform(matrix)
+        def inplace():
+            for data in datas:
+                data.transform(matrix)
+    else:
+        from plotdevice.gfx import Bezier, Transform
+        paths = [Bezier.from_points(np.random.rand(200, 2) * 100) for i in range(500)]
+        spots = (np.random.rand(500, 2) * 500).tolist()
+        def copying():
+            for path, (x, y) in zip(paths, spots):
+                (px, py), (pw, ph) = path.bounds
+                t = Transform()
+                t.translate(x, y)
+                t.scale(min(50 / pw, 50 / ph))
+                t.translate(-px, -py)
+                path._pathdata = t.apply(path)._pathdata
+        def inplace():
+            for path, (x, y) in zip(paths, spots):
+                path.fit(x, y, 50, 50)
+    for label, frame in dict(copying=copying, inplace=inplace).items():
+        best = min(Timer(frame).repeat(repeat=3, number=1))
+        print("  %-12s %10.3f ms  %8.1f kB allocated" % (label, best*1000, _peak_allocation(frame) / 1024))
+
+def _peak_allocation(func):
+    # the most memory allocated at any one time while running func
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - base
+
+@benchmark
+def particles():
+    """Stepping & measuring 10k particles with Points vs PointArrays"""
+    if headless:
+        print("  (requires cocoa)")
+        return
+    setup = "import numpy as np; from plotdevice.gfx import Point, PointArray\n" \
+            "pos, vel = np.random.rand(2, 10000, 2) * 100\n" \
+            "pts, vels = [Point(*p) for p in pos.tolist()], [Point(*v) for v in vel.tolist()]\n" \
+            "pa, va = PointArray(pos), PointArray(vel)"
+    compare(setup,
+      Point="[p + v * 0.5 for p, v in zip(pts, vels)]",
+      PointArray="pa + va * 0.5",
+    )
+    compare(setup,
+      Point="[p.distance(50, 50) for p in pts]",
+      PointArray="pa.distance(50, 50)",
+    )
+
+@benchmark
+def vertex_maps():
+    """Deduplicating 100k grid vertices & building an adjacency map keyed by them"""
+    if headless:
+        print("  (requires cocoa)")
+        return
+    setup = "import numpy as np; from plotdevice.gfx import Point, FixedPoint\n" \
+            "xy = (np.random.rand(100000, 2) * 100).round().tolist()\n" \
+            "pts = [Point(x, y) for x, y in xy]; fixed = [FixedPoint(x, y) for x, y in xy]\n" \
+            "def tuples(pts):\n" \
+            "  adj = {}\n" \
+            "  for a, b in zip(pts, pts[1:]):\n" \
+            "    adj.setdefault((a.x, a.y), []).append((b.x, b.y))\n" \
+            "  return [Point(*k) for k in adj], {k:[Point(*v) for v in vs] for k, vs in adj.items()}\n" \
+            "def keys(pts):\n" \
+            "  adj = {}\n" \
+            "  for a, b in zip(pts, pts[1:]):\n" \
+            "    adj.setdefault(a, []).append(b)\n" \
+            "  return list(adj), adj"
+    compare(setup,
+      tuples="tuples(pts)",
+      FixedPoint="keys(fixed)",
+    )
+    compare(setup,
+      tuples="[Point(*t) for t in set((p.x, p.y) for p in pts)]",
+      FixedPoint="list(set(fixed))",
+      snap="list(set(FixedPoint.snap(x, y) for x, y in xy))",
+    )
+
+@benchmark
+def kdtree():
+    """Finding the 5 nearest neighbors of 1000 query points among 100k points"""
+    setup = "import numpy as np; from plotdevice.lib.spatial import KDTree\n" \
+            "pts = np.random.rand(100000, 2) * 1000; queries = np.random.rand(1000, 2) * 1000\n" \
+            "tree = KDTree(pts)\n" \
+            "def brute(q):\n" \
+            "  d = ((pts - q)**2).sum(axis=1)\n" \
+            "  return np.argpartition(d, 5)[:5]"
+    compare(setup,
+      brute_force="for q in queries: brute(q)",
+      KDTree="for q in queries: tree.nearest(q, 5)",
+      within="for q in queries: tree.within(q, 10)",
+    )
+    compare(setup, build="KDTree(pts)")
+
+@benchmark
+def packing():
+    """Packing circles with a spatial-hash broadphase vs all-pairs bounds checks"""
+    setup = "import numpy as np; from plotdevice.lib.spatial import SpatialHash, bbox_overlaps\n" \
+            "xy = np.random.rand(10000, 2) * 1000; r = np.random.rand(10000) * 4 + 1\n" \
+            "rects = np.column_stack([xy - r[:,None], r, r]); rects[:,2:] *= 2\n" \
+            "def naive(n):\n" \
+            "  placed = []\n" \
+            "  for rect in rects[:n].tolist():\n" \
+            "    if not placed or not bbox_overlaps(placed, rect).any(): placed.append(rect)\n" \
+            "def hashed(n):\n" \
+            "  grid = SpatialHash(cellsize=10)\n" \
+            "  for rect in rects[:n].tolist():\n" \
+            "    if not grid.query(rect): grid.insert(rect)\n"
+    compare(setup, naive="naive(2000)", SpatialHash="hashed(2000)")
+    compare(setup, SpatialHash="hashed(10000)")
+    if headless:
+        return
+
+    # with the exact intersection tests run on the candidates the broadphase finds
+    setup = "import numpy as np; from plotdevice.gfx import Bezier\n" \
+            "from plotdevice.lib.spatial import SpatialHash\n" \
+            "xy = np.random.rand(10000, 2) * 1000; r = np.random.rand(10000) * 4 + 1\n" \
+            "def circles(n):\n" \
+            "  for (x, y), d in zip(xy[:n].tolist(), (r[:n] * 2).tolist()):\n" \
+            "    p = Bezier(); p.oval(x, y, d, d); yield p\n" \
+            "def naive(n):\n" \
+            "  placed = []\n" \
+            "  for p in circles(n):\n" \
+            "    if not any(p.intersects(q) for q in placed): placed.append(p)\n" \
+            "def hashed(n):\n" \
+            "  grid = SpatialHash(cellsize=10)\n" \
+            "  for p in circles(n):\n" \
+            "    if not p.intersects_any(grid): grid.insert(p.bounds, p)\n"
+    compare(setup, naive="naive(1000)", SpatialHash="hashed(1000)")
+    compare(setup, SpatialHash="hashed(10000)")
+
+@benchmark
+def voronoi():
+    """Computing the Voronoi cells of 1000 & 10k points"""
+    setup = "import numpy as np; from plotdevice.lib.delaunay import Delaunay, _clip\n" \
+            "pts = np.random.rand(10000, 2) * 1000; rect = [(0, 0), (1000, 0), (1000, 1000), (0, 1000)]\n" \
+            "def naive(pts):\n" \
+            "  cells = []\n" \
+            "  for sx, sy in pts.tolist():\n" \
+            "    poly = rect\n" \
+            "    for ox, oy in pts.tolist():\n" \
+            "      if (ox, oy) != (sx, sy): poly = _clip(poly, ox-sx, oy-sy, (ox*ox + oy*oy - sx*sx - sy*sy) / 2)\n" \
+            "    cells.append(poly)\n" \
+            "  return cells"
+    compare(setup,
+      half_planes="naive(pts[:1000])",
+      Delaunay="Delaunay(pts[:1000]).voronoi((0, 0, 1000, 1000))",
+    )
+    compare(setup,
+      triangles="Delaunay(pts)",
+      voronoi="Delaunay(pts).voronoi((0, 0, 1000, 1000))",
+    )
+    if not headless:
+        compare("import numpy as np; from plotdevice.gfx import Bezier\n"
+                "pts = np.random.rand(10000, 2) * 1000",
+          Beziers="Bezier.voronoi(pts, (0, 0, 1000, 1000))",
+        )
+
+@benchmark
+def coords():
+    """Parsing 10k all-numeric argument lists for each drawing primitive"""
+    if headless:
+        print("  (requires cocoa)")
+        return
+    setup = "import numpy as np; from plotdevice.gfx.geometry import _unpack, match_coords, Point, Size\n" \
+            "args = np.random.rand(10000, 5).tolist()\n" \
+            "def nested(coords, *signatures):\n" \
+            "  for types in signatures:\n" \
+            "    try: return _unpack(coords, types)\n" \
+            "    except: pass\n"
+    primitives = dict(
+        rect=(4, "[Point,Size,float], [Point,Size]"),
+        oval=(4, "[Point,Size]"),
+        line=(4, "[Point,Point]"),
+        arc=(3, "[Point,float]"),
+        arcto=(4, "[Point,Point,float], [Point,Point], [Point]"),
+        plot=(2, "[Point,Size], [Point,float], [Point]"),
+        Region=(4, "[Point,Size], [Point,float], [Point]"),
+    )
+    for name, (n, signatures) in primitives.items():
+        print("  %s" % name)
+        compare(setup,
+          nested="for a in args: nested(a[:%i], %s)" % (n, signatures),
+          match_coords="for a in args: match_coords(a[:%i], %s)" % (n, signatures),
+        )
+
+@benchmark
+def flatten_args():
+    """Flattening a 10k-element list of numbers and tuples (as Color does with its args)"""
+    if headless:
+        print("  (requires cocoa)")
+        return
+    setup = "from plotdevice.util import _flatten\n" \
+            "args = [(i, i+1) if i%2 else i for i in range(10000)]"
+    compare(setup,
+      concatenate="sum(([x] if not isinstance(x, (list,tuple)) else list(x) for x in args), [])",
+      _flatten="_flatten(args)",
+    )
+
+@benchmark
+def arclength():
+    """Measuring 10k curves with fixed-n chord sums vs adaptive quadrature"""
+    import numpy as np
+    from plotdevice.lib import kernels
+    try:
+        from _plotdevice import curvelength
+    except ImportError:
+        from plotdevice.lib.kernels import curvelength
+
+    segs = np.random.RandomState(0).rand(10000, 4, 2) * 1000
+    exact = kernels.curve_lengths(segs, tolerance=1e-9)
+    coords = segs.reshape(-1, 8).tolist()
+    methods = dict(
+        n10=lambda: [curvelength(*c, 10) for c in coords],
+        n20=lambda: [curvelength(*c, 20) for c in coords],
+        tol_1=lambda: kernels.curve_lengths(segs, 1),
+        tol_001=lambda: kernels.curve_lengths(segs, 0.01),
+    )
+    for label, func in methods.items():
+        best = min(Timer(func).repeat(repeat=3, number=1))
+        error = abs(np.asarray(func()) - exact).max()
+        print("  %-12s %10.3f ms  (max error %.4f)" % (label, best*1000, error))
+
+@benchmark
+def stippling():
+    """Testing 100k points for containment in a star"""
+    setup = "import numpy as np; from plotdevice.lib import kernels\n" \
+            "from plotdevice.lib.pathdata import PathData\n" \
+            "theta = np.linspace(0, 2 * np.pi, 41)[:-1]; radius = np.tile([250, 100], 20)\n" \
+            "star = PathData.from_points(np.column_stack([np.cos(theta), np.sin(theta)]) * radius[:,None], closed=True)\n" \
+            "pts = np.random.rand(100000, 2) * 600 - 300; edges = kernels.edge_table(star)"
+    if headless:
+        compare(setup, winding_numbers="kernels.winding_numbers(edges, pts)")
+        return
+
+    setup += "\nfrom plotdevice.gfx import Bezier; path = Bezier(star); ns = path._nsBezierPath\n" \
+             "pt_list = pts.tolist()"
+    compare(setup,
+      contains="[path.contains(x, y) for x, y in pt_list]",
+      contains_many="path.contains_many(pts)",
+    )
+
+    # the mask should agree with contains() for each of the primitives
+    from plotdevice.gfx import Bezier
+    import numpy as np
+    pts = np.random.rand(20000, 2) * 300 - 50
+    shapes = dict(rect=('rect', 0, 0, 200, 100), rounded=('rect', 0, 0, 200, 100, 20),
+                  oval=('oval', 10, 10, 150, 200), star=('star', 100, 100, 12, 120, 40),
+                  arrow=('arrow', 100, 100, 150))
+    for name, (method, *args) in shapes.items():
+        path = Bezier()
+        getattr(path, method)(*args)
+        mask = path.contains_many(pts, tolerance=0.01)
+        scalar = np.array([path.contains(x, y) for x, y in pts.tolist()])
+        print("  %-12s %6i of %i points differ" % (name, (mask != scalar).sum(), len(pts)))
+
+@benchmark
+def bounds():
+    """Measuring the bounds of a 10k-curve path"""
+    setup = "import numpy as np; from plotdevice.lib import kernels\n" \
+            "from plotdevice.lib.pathdata import PathData, MOVETO, CURVETO\n" \
+            "data = PathData.from_commands([MOVETO] + [CURVETO] * 10000, np.random.rand(30001, 2) * 1000)"
+    compare(setup,
+      control="kernels.extents(data, tight=False)",
+      tight="kernels.extents(data)",
+    )
+    if headless:
+        return
+
+    # repeated queries (as when fitting & drawing) hit the path's cache
+    setup += "\nfrom plotdevice.gfx import Bezier; path = Bezier(data); ns = path._nsBezierPath"
+    compare(setup, number=100,
+      NSBezierPath="ns.bounds()",
+      cached="path.bounds",
+    )
+
+@benchmark
+def areas():
+    """Measuring the areas of 1000 20-curve paths"""
+    setup = "import numpy as np; from plotdevice.lib import kernels\n" \
+            "from plotdevice.lib.pathdata import PathData, MOVETO, CURVETO\n" \
+            "cmds = [MOVETO] + [CURVETO] * 20\n" \
+            "paths = [PathData.from_commands(cmds, np.random.rand(61, 2) * 100) for i in range(1000)]\n" \
+            "def shoelace(data):\n" \
+            "  x, y = kernels.flatten(data, 0.01).arrays[1].T\n" \
+            "  return (x * np.roll(y, -1) - np.roll(x, -1) * y).sum() / 2"
+    compare(setup,
+      flattened="[shoelace(p) for p in paths]",
+      moments="[kernels.moments(p) for p in paths]",
+    )
+
+@benchmark
+def evaluation():
+    """Evaluating 100k points on 100k curves"""
+    setup = "import numpy as np; from plotdevice.lib.kernels import curvepoints\n" \
+            "try:\n  from _plotdevice import curvepoint\n" \
+            "except ImportError:\n  from plotdevice.lib.kernels import curvepoint\n" \
+            "segs = np.random.rand(100000, 4, 2); ts = np.random.rand(100000)\n" \
+            "coords = segs.reshape(-1, 8).tolist()"
+    compare(setup,
+      curvepoint="[curvepoint(t, *c) for t, c in zip(ts.tolist(), coords)]",
+      curvepoints="curvepoints(ts, segs)",
+    )
+
+@benchmark
+def merging():
+    """Merging 5k circles into a single path"""
+    setup = "import numpy as np; from plotdevice.lib import booleans\n" \
+            "from plotdevice.lib.pathdata import PathData\n" \
+            "theta = np.linspace(0, 2 * np.pi, 33)[:-1]; ring = np.column_stack([np.cos(theta), np.sin(theta)]) * 10\n" \
+            "circles = [PathData.from_points(ring + c, closed=True) for c in np.random.rand(5000, 2) * 1000]\n" \
+            "def fold(paths, union):\n" \
+            "  merged = paths[0]\n" \
+            "  for p in paths[1:]:\n" \
+            "    merged = union(merged, p)\n" \
+            "  return merged"
+    compare(setup, repeat=1,
+      fold_250="fold(circles[:250], booleans.union)",
+      union_all_250="booleans.union_all(circles[:250])",
+      union_all="booleans.union_all(circles)",
+    )
+    if headless:
+        return
+
+    # the gpc-based version still has to clip the circles together one at a time
+    setup += "\nfrom plotdevice.gfx import Bezier; paths = [Bezier(c) for c in circles]"
+    compare(setup, repeat=1,
+      gpc_500="fold(paths[:500], Bezier.union)",
+      union_all_500="Bezier.union_all(paths[:500])",
+      union_all="Bezier.union_all(paths)",
+    )
+
+@benchmark
+def simplifying():
+    """Reducing a 50k-point noisy track to within 0.5 units (time & vertex reduction)"""
+    import numpy as np
+    from plotdevice.lib import kernels
+    from plotdevice.lib.pathdata import PathData
+    x = np.linspace(0, 5000, 50000)
+    track = PathData.from_points(np.column_stack([x, np.sin(x / 80) * 200]) + np.random.randn(50000, 2) * 0.02)
+    for label in ('decimate', 'simplify'):
+        func = getattr(kernels, label)
+        best = min(Timer(lambda: func(track, 0.5)).repeat(repeat=3, number=1))
+        reduced = func(track, 0.5)
+        print("  %-12s %10.3f ms  %6i vertices (%.1fx fewer)" % (label, best*1000, len(reduced), len(track) / float(len(reduced))))
+
+@benchmark
+def inserting():
+    """Adding 1000 points to a 1000-segment path"""
+    setup = "import numpy as np\n" \
+            "from plotdevice.lib import kernels\n" \
+            "from plotdevice.lib.pathdata import PathData, CURVETO\n" \
+            "data = PathData(); data.moveto(0, 0)\n" \
+            "for c in np.random.rand(1000, 6).tolist(): data.curveto(*c)\n" \
+            "indices, ts = np.random.permutation(1000), np.random.rand(1000)\n" \
+            "def one_at_a_time(data):\n" \
+            "  for i, t in sorted(zip(indices.tolist(), ts.tolist()), reverse=True):\n" \
+            "    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = data.segments()[1][i].tolist()\n" \
+            "    x, y, c1x, c1y, c2x, c2y, h1x, h1y, h2x, h2y = kernels.curvepoint(t, x0, y0, x1, y1, x2, y2, x3, y3, True)\n" \
+            "    data = data.spliced(i + 1, 1, [CURVETO, CURVETO], [(h1x, h1y), (c1x, c1y), (x, y), (c2x, c2y), (h2x, h2y), (x3, y3)])\n" \
+            "  return data"
+    if headless:
+        # without cocoa, approximate Bezier.addpoint's per-point rebuilds with the store's splices
+        compare(setup,
+          spliced="one_at_a_time(data)",
+          split_segments="kernels.split_segments(data, indices, ts)",
+        )
+    else:
+        setup += "\nfrom plotdevice.gfx import Bezier; path = Bezier(data); locs = np.random.rand(1000)"
+        compare(setup, repeat=1,
+          addpoint="p = path.copy()\nfor t in locs.tolist(): p.addpoint(t)",
+          addpoints="path.copy().addpoints(locs)",
+        )
+
+@benchmark
+def smoothing():
+    """Fitting a spline through a 50k-point trace"""
+    setup = "import numpy as np; pts = np.cumsum(np.random.randn(50000, 2), axis=0)\n"
+    if headless:
+        # without cocoa, compare against the point-by-point solver kept in the tests
+        setup += "from plotdevice.lib import kernels; from tests.kernels import _findpath\n" \
+                 "coords = pts.tolist()"
+        compare(setup,
+          per_point="_findpath(coords, 1.0)",
+          vectorized="kernels.findpath(pts, 1.0)",
+        )
+    else:
+        setup += "from plotdevice.lib import pathmatics; coords = pts.tolist()"
+        compare(setup,
+          tuples="pathmatics.findpath(coords)",
+          array="pathmatics.findpath(pts)",
+        )
+
+@benchmark
+def resampling():
+    """Placing 10k evenly spaced points along a 1000-curve path"""
+    if headless:
+        print("  (requires cocoa)")
+        return
+    setup = "import numpy as np; from plotdevice.gfx import Bezier\n" \
+            "path = Bezier(np.cumsum(np.random.randn(1001, 2), axis=0) * 10, smooth=True)\n" \
+            "def curves(path):\n" \
+            "  return [(c.x, c.y) for c in path.points(10000)]\n" \
+            "def arrays(path):\n" \
+            "  return path.sample(10000)['xy']"
+    compare(setup,
+      points="curves(path.copy())",
+      sample="arrays(path.copy())",
+    )
+
+@benchmark
+def recompiling():
+    """Fetching a 10k-point path's CGPath for 100 plot() copies"""
+    if headless:
+        print("  (requires cocoa)")
+        return
+    setup = "import numpy as np; from plotdevice.gfx import Bezier; from plotdevice.lib import pathmatics\n" \
+            "path = Bezier.from_points(np.random.rand(10000, 2) * 1000)"
+    compare(setup,
+      convert="for i in range(100): p = path.copy(); pathmatics.convert_path(p._to_px(p._nsBezierPath))",
+      cached="for i in range(100): path.copy().cgPath",
+    )
+    from plotdevice.gfx import Bezier
+    print("  %-12s %r" % ('cache_info', Bezier.cache_info(reset=True)))
+
+if __name__ == '__main__':
+    names = sys.argv[1:]
+    for func in BENCHMARKS:
+        if names and func.__name__ not in names:
+            continue
+        print("%s: %s" % (func.__name__, func.__doc__))
+        func()
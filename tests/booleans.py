@@ -0,0 +1,85 @@
+# encoding: utf-8
+import unittest
+import numpy as np
+from plotdevice.lib import booleans, kernels
+from plotdevice.lib.pathdata import PathData, CLOSE
+
+def rect(x, y, w, h):
+    return PathData.from_points([(x, y), (x+w, y), (x+w, y+h), (x, y+h)], closed=True)
+
+def polygon(center, radius, n):
+    theta = np.linspace(0, 2*np.pi, n, endpoint=False)
+    return PathData.from_points(center + radius * np.column_stack([np.cos(theta), np.sin(theta)]), closed=True)
+
+def area(data):
+    return kernels.moments(data)[:,0].sum() if len(data) else 0
+
+def inside(data, points):
+    if not len(data):
+        return np.zeros(len(points), dtype=bool)
+    return kernels.winding_numbers(kernels.edge_table(data), points) != 0
+
+class BooleanTests(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.RandomState(24680)
+
+    def test_known(self):
+        a, b = rect(0, 0, 10, 10), rect(5, 5, 10, 10)
+        self.assertEqual(area(booleans.union(a, b)), 175)
+        self.assertEqual(area(booleans.intersect(a, b)), 25)
+        self.assertEqual(area(booleans.difference(a, b)), 75)
+        self.assertEqual(area(booleans.xor(a, b)), 150)
+        self.assertTrue(booleans.intersects(a, b))
+        self.assertFalse(booleans.intersects(a, rect(20, 0, 5, 5)))
+
+        # shared edges, identical shapes, holes, and empty results
+        self.assertEqual(area(booleans.union(a, rect(10, 0, 10, 10))), 200)
+        self.assertEqual(area(booleans.union(a, a)), 100)
+        self.assertEqual(area(booleans.intersect(a, a)), 100)
+        self.assertEqual(len(booleans.difference(a, a)), 0)
+        self.assertEqual(area(booleans.difference(a, rect(2, 2, 3, 3))), 91)
+        self.assertEqual(len(booleans.intersect(a, rect(20, 0, 5, 5))), 0)
+        self.assertEqual(len(booleans.union(PathData(), PathData())), 0)
+
+        # the output is made of closed contours winding in the same direction as rect()
+        cmds, _ = booleans.xor(a, b).arrays
+        self.assertEqual((cmds == CLOSE).sum(), 2)
+        self.assertTrue((kernels.moments(booleans.xor(a, b))[:,0] > 0).all())
+
+    def test_random(self):
+        # compare point-in-path tests against the shapes to those against the result
+        ops = dict(union=np.logical_or, intersect=np.logical_and, xor=np.logical_xor,
+                   difference=lambda a, b: a & ~b)
+        for i in range(40):
+            a, b = [self.random_polygon(snap=i % 2) for _ in range(2)]
+            a.extend(self.random_polygon())
+            pts = self.rng.rand(2000, 2) * 100 - 25
+            in_a, in_b = inside(a, pts), inside(b, pts)
+            for op, rule in ops.items():
+                found = inside(getattr(booleans, op)(a, b), pts)
+                self.assertTrue(np.array_equal(found, rule(in_a, in_b)), op)
+
+    def test_union_all(self):
+        centers = self.rng.rand(400, 2) * 200
+        circles = [polygon(c, 10, 24) for c in centers]
+        merged = booleans.union_all(circles)
+        pts = self.rng.rand(5000, 2) * 200
+        expected = np.any([inside(c, pts) for c in circles], axis=0)
+        self.assertTrue(np.array_equal(inside(merged, pts), expected))
+
+        # a pairwise fold gives the same shape
+        folded = circles[0]
+        for c in circles[1:40]:
+            folded = booleans.union(folded, c)
+        self.assertAlmostEqual(area(booleans.union_all(circles[:40])), area(folded), places=5)
+        self.assertEqual(area(booleans.union_all([rect(0, 0, 10, 10)] * 5)), 100)
+
+    def random_polygon(self, snap=False):
+        center = self.rng.rand(2) * 50
+        pts = center + (self.rng.rand(self.rng.randint(3, 9), 2) - .5) * 60
+        return PathData.from_points(np.round(pts / 10) * 10 if snap else pts, closed=True)
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(BooleanTests))
+    return suite
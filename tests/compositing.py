@@ -2,6 +2,7 @@
 import unittest
 from . import PlotDeviceTestCase, reference
 from plotdevice import *
+from plotdevice import _ctx
 
 class CompositingTests(PlotDeviceTestCase):
     @reference('compositing/alpha.png')
@@ -108,6 +109,22 @@ class CompositingTests(PlotDeviceTestCase):
         image("tests/_in/header.jpg", -130, 0)
         endclip()
 
+    def test_stencil_cache(self):
+        size(100, 100)
+        p = poly(50, 50, 40, sides=5, plot=False)
+        with clip(p) as stencil:
+            rect(0, 0, 100, 100)
+
+        # redrawing under a new transform replaces the previous screen path (rather than
+        # adding to the caches that the stencil's path shares with p)
+        _ctx.canvas._getImageData('png')
+        cached = len(stencil.path._pathdata._cache), len(p._pathdata._cache)
+        for i in range(20):
+            stencil.path.rotate(5)
+            _ctx.canvas._getImageData('png')
+            self.assertEqual((len(stencil.path._pathdata._cache), len(p._pathdata._cache)), cached)
+        self.assertEqual(stencil._screen[0][2], stencil.path._screen_transform.matrix)
+
 
 def suite():
   suite = unittest.TestSuite()
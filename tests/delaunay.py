@@ -0,0 +1,104 @@
+# encoding: utf-8
+import unittest
+import numpy as np
+from plotdevice.lib.delaunay import Delaunay
+
+def _signed_areas(pts, tris):
+    a, b, c = (pts[tris[:,i]] for i in range(3))
+    return ((b - a)[:,0] * (c - a)[:,1] - (b - a)[:,1] * (c - a)[:,0]) / 2
+
+def _polygon_area(poly):
+    x, y = poly.T
+    return (x * np.roll(y, -1) - np.roll(x, -1) * y).sum() / 2
+
+class DelaunayTests(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.RandomState(97531)
+
+    def assertDelaunay(self, pts, mesh):
+        # every triangle should be counterclockwise with an empty circumcircle and together
+        # they should exactly cover the convex hull
+        tris = mesh.triangles
+        areas = _signed_areas(pts, tris)
+        self.assertTrue((areas > 0).all())
+        centers = mesh.circumcenters
+        radii = np.hypot(*(centers - pts[tris[:,0]]).T)
+        dists = np.hypot(*(pts[None] - centers[:,None]).T).T
+        self.assertFalse((dists < radii[:,None] * (1 - 1e-9)).any())
+        self.assertAlmostEqual(areas.sum(), _polygon_area(pts[mesh.hull]))
+
+    def test_known(self):
+        # a square with a point in the middle is split into four triangles around it
+        square = np.array([(0, 0), (10, 0), (10, 10), (0, 10), (5, 5)], dtype=float)
+        mesh = Delaunay(square)
+        self.assertEqual(sorted(sorted(t) for t in mesh.triangles.tolist()),
+                         [[0, 1, 4], [0, 3, 4], [1, 2, 4], [2, 3, 4]])
+        self.assertEqual(sorted(mesh.hull.tolist()), [0, 1, 2, 3])
+        self.assertEqual(mesh.edges.tolist(), [[0, 1], [0, 3], [0, 4], [1, 2], [1, 4], [2, 3], [2, 4], [3, 4]])
+
+        # the neighbors are the triangles sharing the edge opposite each vertex
+        for t, (tri, nbrs) in enumerate(zip(mesh.triangles.tolist(), mesh.neighbors.tolist())):
+            for k, nbr in enumerate(nbrs):
+                edge = {tri[(k+1)%3], tri[(k+2)%3]}
+                if nbr < 0:
+                    self.assertNotIn(4, edge)
+                else:
+                    self.assertTrue(edge < set(mesh.triangles[nbr].tolist()))
+
+        # a regular grid (where every cell's corners are cocircular) gets two per cell
+        grid = np.mgrid[0:20, 0:15].reshape(2, -1).T.astype(float)
+        mesh = Delaunay(grid)
+        self.assertEqual(len(mesh), 2 * 19 * 14)
+        self.assertEqual(len(mesh.hull), 2 * (19 + 14))
+        self.assertDelaunay(grid, mesh)
+
+    def test_random(self):
+        for n in (3, 10, 100, 2000):
+            pts = self.rng.rand(n, 2) * 1000
+            mesh = Delaunay(pts)
+            self.assertEqual(len(mesh), 2 * n - 2 - len(mesh.hull))
+            self.assertDelaunay(pts, mesh)
+
+        # clusters and points on a circle
+        clusters = np.concatenate([self.rng.rand(3, 2) * 100, self.rng.rand(200, 2) + 50])
+        self.assertDelaunay(clusters, Delaunay(clusters))
+        theta = self.rng.rand(100) * 2 * np.pi
+        ring = np.concatenate([np.column_stack([np.cos(theta), np.sin(theta)]), [(0, 0)]])
+        self.assertDelaunay(ring, Delaunay(ring))
+
+    def test_degenerate(self):
+        self.assertEqual(len(Delaunay(np.empty((0, 2)))), 0)
+        line = Delaunay([(3, 3), (1, 1), (2, 2), (0, 0)])
+        self.assertEqual(len(line), 0)
+        self.assertIn(line.hull.tolist(), ([0, 2, 1, 3], [3, 1, 2, 0]))
+        self.assertEqual(line.edges.tolist(), [[0, 2], [1, 2], [1, 3]])
+
+        # duplicates are left out of the triangulation
+        pts = np.array([(0, 0), (10, 0), (0, 10), (10, 0), (0, 0)], dtype=float)
+        mesh = Delaunay(pts)
+        self.assertEqual(mesh.triangles.tolist(), [[0, 1, 2]])
+
+    def test_voronoi(self):
+        pts = self.rng.rand(300, 2) * 100
+        clip = (-10, -10, 120, 130)
+        cells = Delaunay(pts).voronoi(clip)
+        self.assertEqual(len(cells), len(pts))
+        self.assertAlmostEqual(sum(_polygon_area(c) for c in cells), 120 * 130)
+
+        # every point in the clip rect falls in the cell of the nearest input point
+        for q in self.rng.rand(300, 2) * (120, 130) - 10:
+            cell = cells[np.argmin(np.hypot(*(pts - q).T))]
+            edges = np.roll(cell, -1, axis=0) - cell
+            offsets = q - cell
+            self.assertTrue((edges[:,0] * offsets[:,1] - edges[:,1] * offsets[:,0] >= -1e-9).all())
+
+        # collinear & duplicate points
+        cells = Delaunay([(0, 0), (10, 0), (20, 0), (10, 0)]).voronoi((0, -5, 20, 10))
+        self.assertEqual([_polygon_area(c) for c in cells], [50, 100, 50, 100])
+        self.assertTrue(np.array_equal(cells[1], cells[3]))
+        self.assertEqual(_polygon_area(Delaunay([(5, 5)]).voronoi((0, 0, 10, 10))[0]), 100)
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(DelaunayTests))
+    return suite
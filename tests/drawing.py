@@ -1,7 +1,248 @@
 # encoding: utf-8
 import unittest
 from . import PlotDeviceTestCase, reference
+import numpy as np
 from plotdevice import *
+from plotdevice.lib import pathmatics
+from plotdevice.lib.pathmatics import linepoint, curvepoint
+
+def scalar_locate(path, t):
+    # the linear scan over relative segment lengths that point() & addpoint() used to do
+    segments = path.segmentlengths(relative=True)
+    for i, el in enumerate(path):
+        if i == 0 or el.cmd == MOVETO:
+            closeto = Point(el.x, el.y)
+        if t <= segments[i] or i == len(segments)-1: break
+        else: t -= segments[i]
+    try: t /= segments[i]
+    except ZeroDivisionError: pass
+    if i == len(segments)-1 and segments[i] == 0: i -= 1
+    return i, t, closeto
+
+def scalar_point(path, t):
+    i, t, closeto = scalar_locate(path, t)
+    x0, y0 = path[i].x, path[i].y
+    p1 = path[i+1]
+    if p1.cmd == CLOSE:
+        return Curve(LINETO, (linepoint(t, x0, y0, closeto.x, closeto.y),))
+    elif p1.cmd == LINETO:
+        return Curve(LINETO, (linepoint(t, x0, y0, p1.x, p1.y),))
+    x, y, c1x, c1y, c2x, c2y = curvepoint(t, x0, y0, p1.ctrl1.x, p1.ctrl1.y, p1.ctrl2.x, p1.ctrl2.y, p1.x, p1.y)
+    return Curve(CURVETO, ((c1x, c1y), (c2x, c2y), (x, y)))
+
+def scalar_insert(path, t):
+    # rebuild the path element by element with a new point at t
+    i, t, closeto = scalar_locate(path, t)
+    x0, y0 = path[i].x, path[i].y
+    new_path = Bezier(None)
+    new_path.moveto(path[0].x, path[0].y)
+    for j in range(1, len(path)):
+        el = path[j]
+        if j == i+1 and el.cmd == CURVETO:
+            x, y, c1x, c1y, c2x, c2y, h1x, h1y, h2x, h2y = \
+                curvepoint(t, x0, y0, el.ctrl1.x, el.ctrl1.y, el.ctrl2.x, el.ctrl2.y, el.x, el.y, True)
+            new_path.curveto(h1x, h1y, c1x, c1y, x, y)
+            new_path.curveto(c2x, c2y, h2x, h2y, el.x, el.y)
+            continue
+        elif j == i+1:
+            end = closeto if el.cmd == CLOSE else el
+            new_path.lineto(*linepoint(t, x0, y0, end.x, end.y))
+
+        if el.cmd == MOVETO:
+            new_path.moveto(el.x, el.y)
+        elif el.cmd == LINETO:
+            new_path.lineto(el.x, el.y)
+        elif el.cmd == CURVETO:
+            new_path.curveto(el.ctrl1.x, el.ctrl1.y, el.ctrl2.x, el.ctrl2.y, el.x, el.y)
+        elif el.cmd == CLOSE:
+            new_path.closepath()
+    return new_path
+
+class PathmaticsTests(unittest.TestCase):
+    def setUp(self):
+        # a single closed contour with lines & curves
+        closed = Bezier(None)
+        closed.moveto(10, 10)
+        closed.lineto(90, 10)
+        closed.curveto(120, 10, 120, 60, 90, 60)
+        closed.lineto(10, 60)
+        closed.closepath()
+
+        # several contours (with a closed one in the middle)
+        multi = Bezier(None)
+        multi.moveto(0, 0)
+        multi.curveto(30, -20, 60, 20, 90, 0)
+        multi.moveto(0, 50)
+        multi.lineto(50, 50)
+        multi.lineto(50, 100)
+        multi.closepath()
+        multi.moveto(200, 200)
+        multi.lineto(250, 230)
+
+        # zero-length lines & curves (and a trailing moveto)
+        degenerate = Bezier(None)
+        degenerate.moveto(0, 0)
+        degenerate.lineto(0, 0)
+        degenerate.lineto(40, 0)
+        degenerate.curveto(40, 0, 40, 0, 40, 0)
+        degenerate.curveto(60, 0, 60, 30, 40, 30)
+        degenerate.lineto(40, 30)
+        degenerate.moveto(100, 100)
+
+        self.paths = [closed, multi, degenerate]
+
+    def ts(self, path):
+        # the ends, a handful of fractions, and every segment boundary
+        ts = [0.0, 1.0, 0.1, 0.25, 0.5, 0.75, 0.999]
+        lengths = path.segmentlengths(relative=True)
+        return ts + [sum(lengths[:i]) for i in range(1, len(lengths))]
+
+    def assertCurve(self, found, expected):
+        self.assertEqual(found.cmd, expected.cmd)
+        for attr in ('x', 'y'):
+            self.assertAlmostEqual(getattr(found, attr), getattr(expected, attr))
+        for attr in ('ctrl1', 'ctrl2'):
+            self.assertAlmostEqual(getattr(found, attr).x, getattr(expected, attr).x)
+            self.assertAlmostEqual(getattr(found, attr).y, getattr(expected, attr).y)
+
+    def assertPath(self, found, expected):
+        self.assertEqual(len(found), len(expected))
+        for el, exp in zip(found, expected):
+            self.assertCurve(el, exp)
+
+    def test_point(self):
+        for path in self.paths:
+            for t in self.ts(path):
+                self.assertCurve(path.point(t), scalar_point(path, t))
+
+    def test_points(self):
+        for path in self.paths:
+            for amount in (1, 2, 7, 100):
+                delta = 1.0/(amount-1) if amount > 1 else 1.0
+                expected = [scalar_point(path, i*delta) for i in range(amount)]
+                found = list(path.points(amount))
+                self.assertEqual(len(found), amount)
+                for pt, exp in zip(found, expected):
+                    self.assertCurve(pt, exp)
+
+    def test_addpoint(self):
+        for path in self.paths:
+            for t in self.ts(path):
+                found = path.copy()
+                found.addpoint(t)
+                self.assertPath(found, scalar_insert(path, t))
+            self.assertPath(pathmatics.insert_point(path, 0.5), scalar_insert(path, 0.5))
+
+    def test_arclength_cache(self):
+        path = Bezier(None)
+        path.moveto(0, 0)
+        path.lineto(100, 0)
+        self.assertEqual(path.point(1.0).x, 100)
+        self.assertEqual(path.length, 100)
+        self.assertTrue(any(key[0] == 'arclengths' for key in path._pathdata._cache))
+
+        # modifying the path drops the table & the next lookup measures the new geometry
+        path.lineto(100, 100)
+        self.assertFalse(any(key[0] == 'arclengths' for key in path._pathdata._cache))
+        self.assertEqual(path.length, 200)
+        self.assertEqual((path.point(1.0).x, path.point(1.0).y), (100, 100))
+        self.assertEqual((path.point(0.25).x, path.point(0.25).y), (50, 0))
+
+        path.addpoint(0.25)
+        self.assertEqual(len(path), 4)
+        self.assertEqual(path.segmentlengths(), [50, 50, 100])
+        self.assertEqual((path.point(0.75).x, path.point(0.75).y), (100, 50))
+
+        # copies measure their own (modified) geometry rather than the original's
+        clone = path.copy()
+        clone.lineto(0, 100)
+        self.assertEqual(clone.length, 300)
+        self.assertEqual(path.length, 200)
+
+class TransformInplaceTests(unittest.TestCase):
+    def setUp(self):
+        self.xf = Transform()
+        self.xf.translate(30, -20)
+        self.xf.rotate(degrees=30)
+        self.xf.scale(2, 0.5)
+
+        path = Bezier(None)
+        path.moveto(10, 10)
+        path.lineto(90, 10)
+        path.curveto(120, 10, 120, 60, 90, 60)
+        path.closepath()
+        path.moveto(200, 200)
+        path.lineto(250, 230)
+        self.path = path
+
+    def assertCoords(self, path, other):
+        self.assertTrue(np.allclose(path._pathdata.arrays[1], other._pathdata.arrays[1]))
+        self.assertEqual(path._pathdata.arrays[0].tolist(), other._pathdata.arrays[0].tolist())
+
+    def test_matches_apply(self):
+        expected = self.xf.apply(self.path)
+        data = self.path._pathdata
+        self.path.transform_inplace(self.xf)
+        self.assertIs(self.path._pathdata, data)
+        self.assertCoords(self.path, expected)
+        for attr in ('bounds', 'control_bounds'):
+            found, exp = getattr(self.path, attr), getattr(expected, attr)
+            self.assertTrue(np.allclose(list(found.origin) + list(found.size), list(exp.origin) + list(exp.size)))
+
+        # a bare matrix works as well as a Transform
+        path = self.xf.inverse.apply(expected)
+        path.transform_inplace(self.xf.matrix)
+        self.assertCoords(path, expected)
+
+    def test_invalidation(self):
+        path = self.path
+        before = path.bounds, path.length, path._pathdata.version
+        cgpath = path.cgPath
+        misses = Bezier.cache_info().misses
+        self.assertIs(path.cgPath, cgpath)
+
+        path.transform_inplace(Transform().scale(2))
+        self.assertGreater(path._pathdata.version, before[2])
+        self.assertEqual(path.bounds.size, before[0].size * 2)
+        self.assertAlmostEqual(path.length, before[1] * 2)
+        path.cgPath
+        self.assertEqual(Bezier.cache_info().misses, misses + 1)
+
+        # copies made before the change keep the old geometry (and its cached values)
+        clone = path.copy()
+        path.transform_inplace(Transform().translate(5, 5))
+        self.assertEqual(path.bounds.origin, clone.bounds.origin + 5)
+
+    def test_fulcrum(self):
+        shape = star(20, 30, 5, 20, 10, plot=False)
+        shape.transform_inplace(self.xf)
+        self.assertEqual(shape.center, self.xf.transformPoint((20, 30)))
+        self.assertEqual((shape.x, shape.y), tuple(shape.center))
+
+        # paths without one still use their bounds' center
+        self.path.transform_inplace(self.xf)
+        self.assertIsNone(self.path._fulcrum)
+        self.assertEqual(self.path.center, self.path.bounds.origin + self.path.bounds.size/2.0)
+
+    def test_fit(self):
+        data = self.path._pathdata
+        version = self.path._pathdata.version
+        self.path.fit(x=10, y=20, width=50)
+        self.assertIs(self.path._pathdata, data)
+        self.assertGreater(self.path._pathdata.version, version)
+        (x, y), (w, h) = self.path.bounds
+        self.assertAlmostEqual(x, 10)
+        self.assertAlmostEqual(y, 20)
+        self.assertAlmostEqual(w, 50)
+
+        self.path.fit(width=40, height=40, stretch=True)
+        (x, y), (w, h) = self.path.bounds
+        self.assertTrue(np.allclose([x, y, w, h], [10, 20, 40, 40]))
+
+        shape = star(20, 30, 5, 20, 10, plot=False)
+        shape.fit(x=100, y=100)
+        self.assertEqual(shape.bounds.origin, (100, 100))
+        self.assertAlmostEqual(shape.center.x, 100 + (20 - star(20, 30, 5, 20, 10, plot=False).bounds.x))
 
 class DrawingTests(PlotDeviceTestCase):
     @reference('drawing/paths-transform-pre.png')
@@ -480,4 +721,6 @@ class DrawingTests(PlotDeviceTestCase):
 def suite():
   suite = unittest.TestSuite()
   suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(DrawingTests))
+  suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(PathmaticsTests))
+  suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TransformInplaceTests))
   return suite
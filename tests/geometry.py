@@ -1,7 +1,13 @@
 # encoding: utf-8
 import unittest
+import warnings
 from . import PlotDeviceTestCase, reference
 from plotdevice import *
+from plotdevice import _ctx, DeviceError
+from plotdevice.gfx.geometry import FixedPoint, parse_coords, match_coords
+import numpy as np
+from math import sqrt
+from plotdevice.lib.cocoa import NSAffineTransform, NSPoint
 
 class GeometryTests(PlotDeviceTestCase):
     @reference('geometry/graphics_state7.png')
@@ -244,8 +250,381 @@ class GeometryTests(PlotDeviceTestCase):
         
         text("three", 50, 80)
 
+    def test_overlapping(self):
+        size(300, 300)
+        still = rect(0, 0, 20, 20)
+        with transform(CORNER):
+            translate(100, 100)
+            moved = rect(0, 0, 20, 20)
+            rotate(45)
+            turned = rect(50, -5, 10, 10)
+
+        # grobs are found where their transforms put them (not at their local coordinates)
+        canvas = _ctx.canvas
+        self.assertEqual(canvas.overlapping(5, 5, 10, 10), [still])
+        self.assertEqual(canvas.overlapping(105, 105, 5, 5), [moved])
+        self.assertEqual(canvas.overlapping(50, -5, 10, 10), [])
+        corner = turned.transform.transformPoint(Point(50, 0))
+        self.assertEqual(canvas.overlapping(corner.x - 1, corner.y - 1, 2, 2), [turned])
+        self.assertEqual(len(canvas.overlapping(0, 0, 300, 300)), 3)
+
+    def test_overlapping_changes(self):
+        size(400, 400)
+        box = rect(0, 0, 20, 20)
+        canvas = _ctx.canvas
+        self.assertEqual(canvas.overlapping(5, 5, 10, 10), [box])
+
+        # moving or editing an indexed grob is noticed by the next query
+        box.translate(100, 100)
+        self.assertEqual(canvas.overlapping(5, 5, 10, 10), [])
+        self.assertEqual(canvas.overlapping(105, 105, 10, 10), [box])
+
+        box.fit(x=200, y=200)
+        self.assertEqual(canvas.overlapping(105, 105, 10, 10), [])
+        self.assertEqual(canvas.overlapping(305, 305, 10, 10), [box])
+
+        box.rect(0, 0, 20, 20)
+        self.assertEqual(canvas.overlapping(105, 105, 10, 10), [box])
+
+        box.transform = Transform()
+        self.assertEqual(canvas.overlapping(205, 205, 10, 10), [box])
+        self.assertEqual(canvas.overlapping(305, 305, 10, 10), [])
+
+
+class FixedPointTests(unittest.TestCase):
+    def test_hashing(self):
+        pt = FixedPoint(1.5, -2)
+        self.assertEqual(pt, (1.5, -2))
+        self.assertEqual(pt, Point(1.5, -2))
+        self.assertEqual(pt, FixedPoint(Point(1.5, -2)))
+        self.assertNotEqual(pt, FixedPoint(-2, 1.5))
+        self.assertEqual(hash(pt), hash((1.5, -2)))
+        self.assertEqual(hash(pt), hash(FixedPoint(1.5, -2)))
+
+        # usable interchangeably with tuples as dict keys & set members
+        lookup = {pt:'fixed'}
+        self.assertEqual(lookup[(1.5, -2)], 'fixed')
+        self.assertEqual(lookup[FixedPoint(1.5, -2)], 'fixed')
+        self.assertEqual(len({pt, FixedPoint(1.5, -2), (1.5, -2)}), 1)
+
+    def test_immutable(self):
+        pt = FixedPoint(3, 4)
+        with self.assertRaises(DeviceError):
+            pt.x = 5
+        with self.assertRaises(DeviceError):
+            pt.y = 5
+        self.assertEqual(pt, (3, 4))
+        self.assertIs(pt.copy(), pt)
+        with self.assertRaises(DeviceError):
+            FixedPoint('3', 4)
+
+    def test_snap(self):
+        pt = FixedPoint.snap(10.2, 19.8)
+        self.assertEqual(pt, (10, 20))
+        self.assertIs(FixedPoint.snap(9.9, 20.4), pt)
+        self.assertIs(FixedPoint.snap(Point(10.3, 20.1)), pt)
+        self.assertIsNot(FixedPoint.snap(10.6, 20), pt)
+        self.assertEqual(FixedPoint.snap(12.4, 13, grid=5), (10, 15))
+
+        # the interned instance only lives as long as something else refers to it
+        key = (10.0, 20.0)
+        self.assertIn(key, FixedPoint._interned)
+        del pt
+        self.assertNotIn(key, FixedPoint._interned)
+        fresh = FixedPoint.snap(10, 20)
+        self.assertIs(FixedPoint._interned[key], fresh)
+        self.assertEqual(fresh, key)
+
+    def test_arithmetic(self):
+        pt = FixedPoint(3, 4)
+        for result in (pt + 1, 1 + pt, pt - Point(1, 1), pt * 2, pt / 2, -pt, abs(pt), pt + (1, 2)):
+            self.assertIs(type(result), Point)
+        self.assertEqual(pt + (1, 2), (4, 6))
+        self.assertEqual(pt * 2, (6, 8))
+        self.assertEqual(-pt, (-3, -4))
+
+        # the results are ordinary mutable points & the operand is untouched
+        moved = pt + 0
+        moved.x = 10
+        self.assertEqual(moved, (10, 4))
+        self.assertEqual(pt, (3, 4))
+
+
+class CoordParsingTests(unittest.TestCase):
+    def assertParsed(self, found, expected):
+        self.assertEqual(len(found), len(expected))
+        for obj, (cls, val) in zip(found, expected):
+            self.assertIs(type(obj), cls)
+            self.assertEqual(obj, val)
+
+    def test_numeric(self):
+        pt = parse_coords((1, 2), [Point])
+        self.assertIs(type(pt), Point)
+        self.assertEqual(pt, (1, 2))
+        self.assertEqual(parse_coords((5,), [float]), 5.0)
+        self.assertIs(type(parse_coords((5,), [float])), float)
+
+        self.assertParsed(parse_coords((1, 2, 3, 4), [Point, Size]), [(Point, (1, 2)), (Size, (3, 4))])
+        self.assertParsed(parse_coords((1, 2, 3), [Point, float]), [(Point, (1, 2)), (float, 3)])
+        self.assertParsed(parse_coords((1, 2, 3, 4, 5), [Point, Point, float]),
+                          [(Point, (1, 2)), (Point, (3, 4)), (float, 5)])
+        self.assertParsed(parse_coords((1, 2, 3, 4, 5), [Point, Size, float]),
+                          [(Point, (1, 2)), (Size, (3, 4)), (float, 5)])
+        self.assertParsed(parse_coords(tuple(np.arange(4.0)), [Point, Size]), [(Point, (0, 1)), (Size, (2, 3))])
+
+        # numpy scalars take the fast path too (and come out as plain floats)
+        mixed = (np.int64(1), np.float64(2.5), 3, np.int64(4), np.float64(0.5))
+        found = parse_coords(mixed, [Point, Size, float])
+        self.assertParsed(found, [(Point, (1, 2.5)), (Size, (3, 4)), (float, 0.5)])
+        self.assertTrue(all(type(v) is float for obj in found[:2] for v in obj))
+        self.assertParsed(match_coords(mixed[:3], [Point, Size], [Point, float]), [(Point, (1, 2.5)), (float, 3)])
+
+    def test_mixed(self):
+        expected = [(Point, (1, 2)), (Size, (3, 4))]
+        for coords in [(Point(1, 2), Size(3, 4)), (Point(1, 2), 3, 4), (1, 2, Size(3, 4)),
+                       ((1, 2), (3, 4)), (Region(1, 2, 3, 4),)]:
+            self.assertParsed(parse_coords(coords, [Point, Size]), expected)
+
+        expected = [(Point, (1, 2)), (Size, (3, 4)), (float, 0.5)]
+        for coords in [(Point(1, 2), Size(3, 4), 0.5), (Region(1, 2, 3, 4), 0.5), ((1, 2), 3, 4, 0.5)]:
+            self.assertParsed(parse_coords(coords, [Point, Size, float]), expected)
+
+    def test_fixed_points(self):
+        fixed = FixedPoint(1, 2)
+        self.assertParsed([parse_coords((fixed,), [Point])], [(Point, (1, 2))])
+        self.assertParsed(parse_coords((fixed, 3, 4), [Point, Size]), [(Point, (1, 2)), (Size, (3, 4))])
+        self.assertParsed(parse_coords((fixed, FixedPoint(3, 4), 5), [Point, Point, float]),
+                          [(Point, (1, 2)), (Point, (3, 4)), (float, 5)])
+        self.assertParsed(match_coords((fixed, 3), [Point, Size], [Point, float], [Point]),
+                          [(Point, (1, 2)), (float, 3)])
+
+    def test_signatures(self):
+        # arcto's signatures
+        arcto = [Point, Point, float], [Point, Point], [Point]
+        self.assertParsed(match_coords((1, 2), *arcto), [(Point, (1, 2))])
+        self.assertParsed(match_coords((1, 2, 3, 4), *arcto), [(Point, (1, 2)), (Point, (3, 4))])
+        self.assertParsed(match_coords((1, 2, 3, 4, 5), *arcto), [(Point, (1, 2)), (Point, (3, 4)), (float, 5)])
+        self.assertParsed(match_coords((Point(1, 2), Point(3, 4)), *arcto), [(Point, (1, 2)), (Point, (3, 4))])
+
+        # plot's signatures
+        plot = [Point, Size], [Point, float], [Point]
+        self.assertParsed(match_coords((1, 2, 3), *plot), [(Point, (1, 2)), (float, 3)])
+        self.assertParsed(match_coords((1, 2, 3, 4), *plot), [(Point, (1, 2)), (Size, (3, 4))])
+        self.assertParsed(match_coords((Point(1, 2),), *plot), [(Point, (1, 2))])
+
+    def test_rect_signatures(self):
+        # rect tries [Point,Size] before [Point,Size,float], so neither may shadow the other
+        rect_sigs = [Point, Size], [Point, Size, float]
+        plain = [(Point, (1, 2)), (Size, (3, 4))]
+        rounded = plain + [(float, 0.5)]
+        for coords in [(1, 2, 3, 4), (Point(1, 2), Size(3, 4)), (Region(1, 2, 3, 4),), ((1, 2), (3, 4))]:
+            self.assertParsed(match_coords(coords, *rect_sigs), plain)
+            self.assertParsed(match_coords(coords + (0.5,), *rect_sigs), rounded)
+
+        box = rect(1, 2, 3, 4, plot=False)
+        self.assertEqual(box.bounds, Region(1, 2, 3, 4))
+        self.assertEqual(rect(Region(1, 2, 3, 4), plot=False).bounds, box.bounds)
+        corners = len(box)
+        for args in [(1, 2, 3, 4, 0.5), (Point(1, 2), Size(3, 4), 0.5), (Region(1, 2, 3, 4), 0.5)]:
+            self.assertNotEqual(len(rect(*args, plot=False)), corners)
+
+    def test_errors(self):
+        for coords, types in [((1, 2, 3), [Point]), ((1,), [Point]), ((1, 2, 3), [Point, Size]),
+                              ((1, 2, 3, 4, 5, 6), [Point, Size]), ((Point(1, 2), 3), [Point, Size]),
+                              ((Point(1, 2), 'three'), [Point, float]), ((), [Point])]:
+            with self.assertRaises(DeviceError):
+                parse_coords(coords, types)
+
+        with self.assertRaises(DeviceError):
+            parse_coords((np.int64(1), np.float64(2), 3), [Point])
+
+        # when no signature fits, the error describes the first one
+        for coords in [(1, 2, 3), (np.float64(1),), (1, 2, 3, 4, 5, 6), (Region(1, 2, 3, 4), 5, 6), (Point(1, 2), 'three')]:
+            with self.assertRaisesRegex(DeviceError, r"looking for \['Point', 'Size'\]"):
+                match_coords(coords, [Point, Size], [Point, Size, float])
+        with self.assertRaises(DeviceError):
+            match_coords((1, 2, 3, 4, 5, 6), [Point, Point, float], [Point, Point], [Point])
+
+
+class TransformTests(unittest.TestCase):
+    A = (1.0, 2.0, 3.0, 4.0, 5.0, 6.0)
+    B = (7.0, 8.0, 9.0, 10.0, 11.0, 12.0)
+
+    def assertMatrix(self, xf, expected):
+        matrix = xf.matrix if isinstance(xf, Transform) else tuple(xf)
+        self.assertEqual(len(matrix), 6)
+        for val, exp in zip(matrix, expected):
+            self.assertAlmostEqual(val, exp)
+
+    def test_primitives(self):
+        self.assertMatrix(Transform(), (1, 0, 0, 1, 0, 0))
+        self.assertMatrix(Transform(self.A), self.A)
+
+        t = Transform()
+        self.assertMatrix(t.translate(10, 20), (1, 0, 0, 1, 10, 20))
+        self.assertMatrix(t, (1, 0, 0, 1, 10, 20))
+        self.assertMatrix(Transform().scale(2, 3), (2, 0, 0, 3, 0, 0))
+        self.assertMatrix(Transform().scale(2), (2, 0, 0, 2, 0, 0))
+        self.assertMatrix(Transform().rotate(degrees=90), (0, -1, 1, 0, 0, 0))
+        self.assertMatrix(Transform().rotate(degrees=45), (sqrt(.5), -sqrt(.5), sqrt(.5), sqrt(.5), 0, 0))
+        self.assertMatrix(Transform().rotate(percent=0.5), (-1, 0, 0, -1, 0, 0))
+        self.assertMatrix(Transform().skew(45, 0), (1, 0, -1, 1, 0, 0))
+        self.assertMatrix(Transform().skew(0, 45), (1, 1, 0, 1, 0, 0))
+
+        # successive calls are prepended (i.e., applied to points before the existing transform)
+        t = Transform()
+        t.translate(10, 20)
+        t.scale(2)
+        self.assertMatrix(t, (2, 0, 0, 2, 10, 20))
+        t.rotate(degrees=90)
+        self.assertMatrix(t, (0, -2, 2, 0, 10, 20))
+
+        with self.assertRaises(DeviceError):
+            Transform((1, 2, 3))
+
+    def test_concatenation(self):
+        product = (25, 28, 57, 64, 100, 112) # A followed by B
+
+        t = Transform(self.A)
+        t.append(Transform(self.B))
+        self.assertMatrix(t, product)
+
+        t = Transform(self.B)
+        t.prepend(self.A)
+        self.assertMatrix(t, product)
+
+        t = Transform().translate(10, 20)
+        t.append(Transform().scale(2))
+        self.assertMatrix(t, (2, 0, 0, 2, 20, 40))
+
+    def test_inverse(self):
+        self.assertMatrix(Transform(self.A).inverse, (-2, 1, 1.5, -0.5, 1, -2))
+        self.assertMatrix(Transform((2, 0, 0, 4, 10, 20)).inverse, (.5, 0, 0, .25, -5, -5))
+
+        t = Transform()
+        t.translate(30, -40)
+        t.rotate(degrees=33)
+        t.skew(10, 5)
+        t.scale(2, 0.5)
+        t.append(t.inverse)
+        self.assertMatrix(t, (1, 0, 0, 1, 0, 0))
+
+        with self.assertRaises(DeviceError):
+            Transform((1, 2, 2, 4, 0, 0)).inverse
+
+    def test_application(self):
+        t = Transform(self.A)
+        self.assertEqual(t.transformPoint(Point(1, 1)), (9, 12))
+        self.assertEqual(t.transformPoint((0, 0)), (5, 6))
+        self.assertEqual(t.transformSize(Size(1, 1)), (4, 6))
+
+        t = Transform((2, 0, 0, 3, 10, 20))
+        region = t.transformRegion(Region(1, 1, 4, 5))
+        self.assertEqual(region.origin, (12, 23))
+        self.assertEqual(region.size, (8, 15))
+        roundtrip = t.inverse.transformPoint(t.transformPoint((7, -3)))
+        self.assertAlmostEqual(roundtrip.x, 7)
+        self.assertAlmostEqual(roundtrip.y, -3)
+
+        pts = np.array([[1.0, 1.0], [0.0, 0.0], [-2.0, 5.0]])
+        expected = [t.transformPoint(pt) for pt in pts]
+        self.assertEqual(t.apply_array(pts).tolist(), [list(pt) for pt in expected])
+
+    def test_apply_many(self):
+        t = Transform()
+        t.translate(100, 50)
+        t.rotate(degrees=90)
+
+        shapes = lambda: [star(20, 30, 5, 20, 10, plot=False), rect(0, 0, 10, 10, plot=False)]
+        expected = [path.copy() for path in shapes()]
+        for path in expected:
+            path.transform_inplace(t)
+
+        for inplace in (False, True):
+            originals = shapes()
+            found = t.apply_many(originals, inplace=inplace)
+            for path, orig, exp in zip(found, originals, expected):
+                self.assertEqual(path is orig, inplace)
+                self.assertEqual(path._pathdata.arrays[1].tolist(), exp._pathdata.arrays[1].tolist())
+                self.assertEqual(path.center, exp.center)
+            self.assertEqual(found[0].center, t.transformPoint((20, 30)))
+            self.assertEqual(found[0].x, found[0].center.x)
+
+        with self.assertRaises(DeviceError):
+            t.apply_many([Point(1, 2)])
+
+    def test_linked_nsaffinetransform(self):
+        t = Transform()
+        t.translate(10, 20)
+        ns = t._nsAffineTransform
+        self.assertIs(t._nsAffineTransform, ns)
+        self.assertMatrix(ns.transformStruct(), (1, 0, 0, 1, 10, 20))
+
+        # changes made to the Cocoa object in place show up in the Transform...
+        ns.scaleXBy_yBy_(2, 3)
+        self.assertMatrix(t, (2, 0, 0, 3, 10, 20))
+        self.assertEqual(t.transformPoint((1, 1)), (12, 23))
+
+        # ...and vice versa
+        t.translate(5, 0)
+        self.assertMatrix(ns.transformStruct(), (2, 0, 0, 3, 20, 20))
+        t.matrix = self.A
+        self.assertMatrix(ns.transformStruct(), self.A)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', DeprecationWarning)
+            self.assertIs(t.transform, ns)
+
+        # but copies (and the objects handed to Cocoa for drawing) are independent
+        clone = t.copy()
+        clone.translate(100, 100)
+        self.assertIs(type(clone), Transform)
+        self.assertMatrix(t, self.A)
+        snapshot = t._nsAffineTransformCopy()
+        snapshot.invert()
+        self.assertMatrix(t, self.A)
+        self.assertMatrix(t.inverse, snapshot.transformStruct())
+
+    def test_cocoa_round_trip(self):
+        ns = Transform(self.A)._nsAffineTransform
+        self.assertMatrix(ns.transformStruct(), self.A)
+        self.assertMatrix(Transform(ns), self.A)
+
+        # NSAffineTransform's mutators also prepend, though its rotation runs the other way
+        ns = NSAffineTransform.transform()
+        ns.translateXBy_yBy_(10, 20)
+        ns.rotateByDegrees_(30)
+        ns.scaleXBy_yBy_(2, 3)
+        t = Transform()
+        t.translate(10, 20)
+        t.rotate(degrees=-30)
+        t.scale(2, 3)
+        self.assertMatrix(t, ns.transformStruct())
+        pt = ns.transformPoint_(NSPoint(4, -7))
+        self.assertAlmostEqual(t.transformPoint((4, -7)).x, pt.x)
+        self.assertAlmostEqual(t.transformPoint((4, -7)).y, pt.y)
+
+        other = Transform(self.B)._nsAffineTransform
+        ns = Transform(self.A)._nsAffineTransform
+        ns.appendTransform_(other)
+        t = Transform(self.A)
+        t.append(self.B)
+        self.assertMatrix(t, ns.transformStruct())
+
+        ns = Transform(self.A)._nsAffineTransform
+        ns.prependTransform_(other)
+        t = Transform(self.A)
+        t.prepend(self.B)
+        self.assertMatrix(t, ns.transformStruct())
+
+        ns = Transform(self.A)._nsAffineTransform
+        ns.invert()
+        self.assertMatrix(Transform(self.A).inverse, ns.transformStruct())
+
 
 def suite():
   suite = unittest.TestSuite()
   suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(GeometryTests))
+  suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(FixedPointTests))
+  suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(CoordParsingTests))
+  suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TransformTests))
   return suite
@@ -0,0 +1,365 @@
+# encoding: utf-8
+import unittest
+import numpy as np
+from plotdevice.lib import kernels
+from plotdevice.lib.pathdata import PathData, MOVETO, LINETO, CURVETO, CLOSE
+
+def chord_lengths(segs, n):
+    """Sum the lengths of n chords along each cubic"""
+    t = np.tile(np.linspace(0, 1, n+1), (len(segs), 1))
+    pts, _ = kernels.curvepoints(t, segs)
+    return np.hypot(*np.diff(pts, axis=1).T).sum(axis=0)
+
+class KernelTests(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.RandomState(123456790)
+        self.segs = self.rng.rand(500, 4, 2) * 100
+
+    def test_roots(self):
+        found = kernels.roots([1, 1, 0, 0], [-6, -3, 1, 0], [11, 3, -3, 2], [-6, -1, 2, -4])
+        self.assertTrue(np.allclose(np.sort(found[0]), [1, 2, 3]))
+        self.assertTrue(np.allclose(found[1], [1, 1, 1]))
+        self.assertTrue(np.allclose(np.sort(found[2,:2]), [1, 2]))
+        self.assertTrue(np.allclose(found[3,0], 2) and np.isnan(found[3,1:]).all())
+
+        coeffs = self.rng.randn(1000, 4)
+        found = kernels.roots(*coeffs.T)
+        residual = np.polynomial.polynomial.polyval(found.T, coeffs[:,::-1].T, tensor=False)
+        self.assertLess(np.nanmax(abs(residual) / (1 + abs(found.T))**3), 1e-9)
+
+    def test_curve_lengths(self):
+        reference = chord_lengths(self.segs, 20000)
+        for tolerance in (0.1, 0.01, 0.001):
+            lengths = kernels.curve_lengths(self.segs, tolerance)
+            self.assertLess(abs(lengths - reference).max(), tolerance)
+
+        # the tolerance bounds the error of every length (not just the typical one). check
+        # a tight-tolerance reference against richardson-extrapolated chord sums first
+        segs = self.rng.rand(10000, 4, 2) * 100
+        reference = kernels.curve_lengths(segs, 1e-9)
+        coarse, fine = chord_lengths(segs[:200], 4000), chord_lengths(segs[:200], 8000)
+        self.assertLess(abs((4*fine - coarse)/3 - reference[:200]).max(), 1e-6)
+        for tolerance in (0.1, 0.01, 0.001):
+            lengths = kernels.curve_lengths(segs, tolerance)
+            self.assertLessEqual(abs(lengths - reference).max(), tolerance)
+
+        # lines, cusps, and points
+        lengths = kernels.curve_lengths([[(0,0), (0,0), (5,0), (5,0)],
+                                         [(0,0), (10,0), (0,0), (10,0)],
+                                         [(1,1), (1,1), (1,1), (1,1)]])
+        self.assertTrue(np.allclose(lengths, [5, 10, 0]))
+
+    def test_flatten(self):
+        data = PathData()
+        data.moveto(0, 0)
+        data.curveto(0, 50, 100, 50, 100, 0)
+        data.lineto(100, -10)
+        data.closepath()
+        data.curveto(*self.segs[0,1:].ravel())
+
+        _, segs = data.segments()
+        for tolerance in (1, 0.1, 0.01):
+            flat = kernels.flatten(data, tolerance)
+            self.assertEqual(set(flat.arrays[0].tolist()), {MOVETO, LINETO, CLOSE})
+
+            # every point on each curve should be within tolerance of its contour's polyline
+            for seg, contour in zip(segs[[0, 4]], flat.contours()):
+                dense, _ = kernels.curvepoints(np.linspace(0, 1, 2000), seg)
+                self.assertLess(_polyline_distance(dense, contour.arrays[1]).max(), tolerance)
+
+        # paths without curves are just copied
+        lines = PathData.from_points([(0, 0), (5, 5), (10, 0)], closed=True)
+        self.assertEqual(list(kernels.flatten(lines)), list(lines))
+
+    def test_extents(self):
+        data = PathData()
+        data.moveto(0, 0)
+        data.curveto(0, 50, 100, 50, 100, 0)
+        data.lineto(100, -10)
+        self.assertEqual(kernels.extents(data, tight=False), (0, -10, 100, 60))
+        self.assertTrue(np.allclose(kernels.extents(data), (0, -10, 100, 47.5)))
+        self.assertEqual(kernels.extents(PathData()), (0, 0, 0, 0))
+
+        # the tight bounds should just enclose a dense sampling of each curve
+        for seg in self.segs[:50]:
+            data = PathData.from_commands([0, 2], seg)
+            dense, _ = kernels.curvepoints(np.linspace(0, 1, 5001), seg)
+            lo, hi = dense.min(axis=0), dense.max(axis=0)
+            x, y, w, h = kernels.extents(data)
+            self.assertTrue(np.allclose([x, y, x+w, y+h], np.concatenate([lo, hi]), atol=1e-3))
+            self.assertTrue((np.array([x, y]) <= lo + 1e-9).all() and (np.array([x+w, y+h]) >= hi - 1e-9).all())
+
+    def test_winding_numbers(self):
+        # a square with a square hole (wound in the opposite direction) and an overlapping
+        # square wound the same way as the outer one
+        data = PathData.from_points([(0, 0), (100, 0), (100, 100), (0, 100)], closed=True)
+        data.extend(PathData.from_points([(25, 25), (25, 75), (75, 75), (75, 25)], closed=True))
+        data.extend(PathData.from_points([(90, 90), (150, 90), (150, 150), (90, 150)])) # left open
+        pts = [(10, 10), (50, 50), (95, 95), (120, 120), (200, 50), (-1, 50)]
+        winding = kernels.winding_numbers(kernels.edge_table(data), pts)
+        self.assertEqual(abs(winding).tolist(), [1, 0, 2, 1, 0, 0])
+
+        # a pentagram's center has a winding number of 2
+        theta = np.pi / 2 + np.arange(5) * 4 * np.pi / 5
+        star = PathData.from_points(np.column_stack([np.cos(theta), np.sin(theta)]) * 100, closed=True)
+        self.assertEqual(abs(kernels.winding_numbers(kernels.edge_table(star), [(0, 0), (0, 90)])).tolist(), [2, 1])
+
+        # curves are flattened (so points near the boundary of a circle may be misjudged)
+        k = 0.5522847498 * 50
+        circle = PathData()
+        circle.moveto(50, 0)
+        for (x1, y1), (x2, y2), (x3, y3) in [((50, k), (k, 50), (0, 50)), ((-k, 50), (-50, k), (-50, 0)),
+                                             ((-50, -k), (-k, -50), (0, -50)), ((k, -50), (50, -k), (50, 0))]:
+            circle.curveto(x1, y1, x2, y2, x3, y3)
+        pts = self.rng.rand(20000, 2) * 120 - 60
+        dist = np.hypot(*pts.T)
+        clear = abs(dist - 50) > 0.1
+        for chunk in (1000, 1<<22):
+            inside = kernels.winding_numbers(kernels.edge_table(circle, 0.01), pts, chunk) != 0
+            self.assertTrue(np.array_equal(inside[clear], dist[clear] < 50))
+
+    def test_moments(self):
+        data = PathData()
+        data.moveto(0, 0)
+        data.lineto(100, 0)
+        data.lineto(100, 50)
+        data.lineto(0, 50)
+        data.closepath()
+        self.assertEqual(kernels.moments(data).tolist(), [[5000, 250000, 125000]])
+
+        # curves should match a finely-flattened version (whose open contours are closed)
+        data.moveto(200, 200)
+        data.moveto(300, 300)
+        for seg in self.segs[:3]:
+            data.curveto(*seg[1:].ravel())
+        found = kernels.moments(data)
+        self.assertEqual(found.shape, (2, 3))
+        flat = kernels.flatten(data, 1e-4).contours()[1].arrays[1]
+        x, y = flat.T
+        cross = x * np.roll(y, -1) - np.roll(x, -1) * y
+        area = cross.sum() / 2
+        centroid = ((x + np.roll(x, -1)) * cross).sum() / (6 * area), ((y + np.roll(y, -1)) * cross).sum() / (6 * area)
+        self.assertAlmostEqual(found[1,0], area, delta=abs(area) * 1e-5)
+        self.assertTrue(np.allclose(found[1,1:] / found[1,0], centroid, rtol=1e-5))
+
+        # reversing a contour flips the sign of its moments
+        rev = PathData.from_points(flat[::-1], closed=True)
+        self.assertTrue(np.allclose(kernels.moments(rev), -kernels.moments(PathData.from_points(flat)), rtol=1e-9))
+        self.assertEqual(kernels.moments(PathData()).shape, (0, 3))
+
+    def test_convex_hull(self):
+        pts = self.rng.rand(500, 2) * 100
+        hull = kernels.convex_hull(pts)
+        edges = np.roll(hull, -1, axis=0) - hull
+        for a, edge in zip(hull, edges):
+            offsets = pts - a
+            self.assertTrue((edge[0] * offsets[:,1] - edge[1] * offsets[:,0] >= -1e-9).all())
+        x, y = hull.T
+        self.assertGreater((x * np.roll(y, -1) - np.roll(x, -1) * y).sum(), 0)
+
+        square = [(0, 0), (1, 0), (1, 1), (0, 1), (0.5, 0.5), (0.5, 0), (1, 1)]
+        self.assertEqual(kernels.convex_hull(square).tolist(), [[0, 0], [1, 0], [1, 1], [0, 1]])
+        self.assertEqual(len(kernels.convex_hull([(1, 1), (1, 1)])), 1)
+
+    def test_decimate(self):
+        # a noisy track should lose most of its vertices without straying from the original
+        x = np.linspace(0, 1000, 5000)
+        track = np.column_stack([x, np.sin(x / 50) * 100]) + self.rng.randn(5000, 2) * 0.05
+        reduced = kernels.decimate(PathData.from_points(track), 0.5)
+        cmds, pts = reduced.arrays
+        self.assertLess(len(pts), len(track) / 10)
+        self.assertTrue((pts[[0, -1]] == track[[0, -1]]).all())
+        self.assertLessEqual(_polyline_distance(track, pts).max(), 0.5)
+
+        # closed contours keep their closepath and corners
+        square = PathData.from_points([(0, 0), (5, 0.1), (10, 0), (10, 10), (0, 10)], closed=True)
+        cmds, pts = kernels.decimate(square, 0.5).arrays
+        self.assertEqual(cmds.tolist(), [MOVETO, LINETO, LINETO, LINETO, CLOSE])
+        self.assertEqual(pts.tolist(), [[0, 0], [10, 0], [10, 10], [0, 10]])
+        self.assertEqual(len(kernels.decimate(PathData(), 0.5)), 0)
+
+    def test_simplify(self):
+        x = np.linspace(0, 1000, 5000)
+        track = np.column_stack([x, np.sin(x / 50) * 100]) + self.rng.randn(5000, 2) * 0.05
+        fitted = kernels.simplify(PathData.from_points(track), 0.5)
+        cmds, _ = fitted.arrays
+        self.assertLess(len(cmds), len(kernels.decimate(PathData.from_points(track), 0.5)))
+        self.assertIn(CURVETO, cmds.tolist())
+        flat = kernels.flatten(fitted, 0.01).arrays[1]
+        self.assertLessEqual(_polyline_distance(track, flat).max(), 0.5)
+
+        # straight runs stay lines and a finely-sampled circle becomes a handful of curves
+        square = PathData.from_points([(0, 0), (5, 0), (10, 0), (10, 10), (0, 10)], closed=True)
+        self.assertEqual(kernels.simplify(square, 0.5).arrays[0].tolist(), [MOVETO, LINETO, LINETO, LINETO, CLOSE])
+        theta = np.linspace(0, 2 * np.pi, 360, endpoint=False)
+        ring = np.column_stack([np.cos(theta), np.sin(theta)]) * 100
+        cmds, _ = kernels.simplify(PathData.from_points(ring, closed=True), 0.5).arrays
+        self.assertLessEqual(len(cmds), 10)
+        self.assertEqual(cmds[-1], CLOSE)
+
+    def test_split_segments(self):
+        data = PathData()
+        data.moveto(0, 0)
+        for i in range(6):
+            if i % 2:
+                data.curveto(*self.rng.rand(6) * 100)
+            else:
+                data.lineto(*self.rng.rand(2) * 100)
+        data.closepath()
+        data.moveto(5, 5)
+        data.curveto(*self.rng.rand(6) * 100)
+        indices = np.array([8, 1, 0, 1, 3, 6, 1, 8])
+        ts = np.array([0.1, 0.7, 0.5, 0.2, 0.3, 0.5, 0.5, 0.9])
+        split = kernels.split_segments(data, indices, ts)
+
+        # should match splitting the segments one point at a time (working backwards so
+        # the indices stay valid and rescaling each t to fit the segment's remainder)
+        expected = data
+        for i in sorted(set(indices), reverse=True):
+            prev = 0.0
+            for j, t in enumerate(sorted(ts[indices == i])):
+                u, prev, k = (t - prev) / (1 - prev), t, i + j
+                cmds, segs = expected.segments()
+                (x0, y0), (x1, y1), (x2, y2), (x3, y3) = segs[k].tolist()
+                if cmds[k] == CURVETO:
+                    x, y, c1x, c1y, c2x, c2y, h1x, h1y, h2x, h2y = kernels.curvepoint(u, x0, y0, x1, y1, x2, y2, x3, y3, True)
+                    pts = [(h1x, h1y), (c1x, c1y), (x, y), (c2x, c2y), (h2x, h2y), (x3, y3)]
+                    expected = expected.spliced(k + 1, 1, [CURVETO, CURVETO], pts)
+                else:
+                    expected = expected.spliced(k + 1, 0, [LINETO], [kernels.linepoint(u, x0, y0, x3, y3)])
+        self.assertEqual(split.arrays[0].tolist(), expected.arrays[0].tolist())
+        self.assertTrue(np.allclose(split.arrays[1], expected.arrays[1]))
+        self.assertEqual(len(kernels.split_segments(data, [], [])), len(data))
+
+    def test_sample(self):
+        # samples on a (counterclockwise) circle should be evenly spaced in angle, with
+        # tangents along the circumference and normals pointing toward the center (give or
+        # take the bezier approximation's own error)
+        k = 0.5522847498 * 50
+        circle = PathData()
+        circle.moveto(50, 0)
+        for (x1, y1), (x2, y2), (x3, y3) in [((50, k), (k, 50), (0, 50)), ((-k, 50), (-50, k), (-50, 0)),
+                                             ((-50, -k), (-k, -50), (0, -50)), ((k, -50), (50, -k), (50, 0))]:
+            circle.curveto(x1, y1, x2, y2, x3, y3)
+        circle.closepath()
+        samples = kernels.sample(circle, 37, tolerance=0.001)
+        self.assertEqual(len(samples), 37)
+        theta = np.unwrap(np.arctan2(*samples['xy'].T[::-1]))
+        self.assertTrue(np.allclose(np.diff(theta), 2 * np.pi / 36, atol=1e-3))
+        radial = samples['xy'] / np.hypot(*samples['xy'].T)[:,None]
+        self.assertTrue(np.allclose((samples['tangent'] * radial).sum(axis=1), 0, atol=2e-3))
+        self.assertTrue(np.allclose((samples['normal'] * radial).sum(axis=1), -1, atol=2e-3))
+        self.assertTrue(np.allclose(samples['t'], np.linspace(0, 1, 37)))
+
+        # fixed spacing runs across contours (and isn't thrown off by degenerate handles)
+        data = PathData.from_points([(0, 0), (30, 0), (30, 40)])
+        data.moveto(100, 100)
+        data.curveto(100, 100, 150, 100, 150, 100)
+        samples = kernels.sample(data, spacing=10)
+        self.assertEqual(samples['contour_index'].tolist(), [0] * 8 + [1] * 5)
+        self.assertTrue(np.allclose(samples['xy'][[0, 3, 4, 7]], [(0, 0), (30, 0), (30, 10), (30, 40)]))
+        self.assertTrue(np.allclose(samples['xy'][8:,0], [110, 120, 130, 140, 150], atol=0.01))
+        self.assertTrue(np.allclose(samples['tangent'][8:], (1, 0)))
+        self.assertTrue(np.allclose(samples['normal'][:3], (0, 1)))
+        self.assertEqual(len(kernels.sample(PathData(), 10)), 0)
+
+class ScalarEquivalenceTests(unittest.TestCase):
+    """The vectorized kernels should match the one-at-a-time pathmatics functions (both
+    the c-extension versions, if present, and the numpy fallbacks)"""
+
+    def setUp(self):
+        rng = np.random.RandomState(123456790)
+        self.segs = rng.rand(200, 4, 2) * 200 - 100
+        self.ts = rng.rand(200)
+        self.grid = np.linspace(0, 1, 7)
+        self.implementations = [kernels]
+        try:
+            import _plotdevice
+            self.implementations.append(_plotdevice)
+        except ImportError:
+            pass
+
+    def test_curvepoints(self):
+        pts, tangents = kernels.curvepoints(self.ts, self.segs)
+        grid_pts, grid_tangents = kernels.curvepoints(np.tile(self.grid, (len(self.segs), 1)), self.segs)
+        self.assertEqual(grid_pts.shape, (len(self.segs), len(self.grid), 2))
+        for impl in self.implementations:
+            for seg, t, pt, tangent, row in zip(self.segs, self.ts, pts, tangents, grid_pts):
+                x, y, c1x, c1y, c2x, c2y = impl.curvepoint(t, *seg.ravel())
+                self.assertTrue(np.allclose(pt, (x, y)))
+                self.assertTrue(np.allclose(tangent, (3*(c2x-c1x), 3*(c2y-c1y))))
+                self.assertTrue(np.allclose(row, [impl.curvepoint(u, *seg.ravel())[:2] for u in self.grid]))
+
+        # a single segment is evaluated at every t
+        pts, tangents = kernels.curvepoints(self.grid, self.segs[0])
+        self.assertTrue(np.allclose(pts, grid_pts[0]))
+
+    def test_linepoints(self):
+        lines = self.segs[:,::3]
+        pts = kernels.linepoints(self.ts, lines)
+        lengths = kernels.linelengths(lines)
+        for impl in self.implementations:
+            for (p0, p1), t, pt, length in zip(lines, self.ts, pts, lengths):
+                self.assertTrue(np.allclose(pt, impl.linepoint(t, *p0, *p1)))
+                self.assertAlmostEqual(length, impl.linelength(*p0, *p1))
+
+    def test_chord_lengths(self):
+        for n in (1, 10, 20):
+            lengths = kernels.chord_lengths(self.segs, n)
+            for impl in self.implementations:
+                scalar = [impl.curvelength(*seg.ravel(), n) for seg in self.segs]
+                self.assertTrue(np.allclose(lengths, scalar))
+
+    def test_findpath(self):
+        pts = self.segs.reshape(-1, 2)
+        for n in (1, 2, 3, 4, 10, 800):
+            for curvature in (1.0, 0.5, 0.01, 0.0, -1, 2):
+                cmds, coords = kernels.findpath(pts[:n], curvature).arrays
+                scalar_cmds, scalar_coords = _findpath(pts[:n].tolist(), curvature)
+                self.assertEqual(cmds.tolist(), scalar_cmds)
+                self.assertTrue(np.allclose(coords, scalar_coords))
+
+def _findpath(points, curvature):
+    """The point-by-point spline solver originally used by pathmatics.findpath (returning
+    its list of commands & coordinates rather than a Bezier)"""
+    if len(points) < 3:
+        return [MOVETO, LINETO][:len(points)], points
+    curvature = max(0, min(1, curvature))
+    if curvature == 0:
+        return [MOVETO] + [LINETO] * len(points), points[:1] + points
+
+    curvature = 4 + (1.0-curvature)*40
+    dx = {0: 0, len(points)-1: 0}
+    dy = {0: 0, len(points)-1: 0}
+    bi = {1: -0.25}
+    ax = {1: (points[2][0]-points[0][0]-dx[0]) / 4.0}
+    ay = {1: (points[2][1]-points[0][1]-dy[0]) / 4.0}
+    for i in range(2, len(points)-1):
+        bi[i] = -1.0 / (curvature + bi[i-1])
+        ax[i] = -(points[i+1][0]-points[i-1][0]-ax[i-1]) * bi[i]
+        ay[i] = -(points[i+1][1]-points[i-1][1]-ay[i-1]) * bi[i]
+    for i in reversed(range(1, len(points)-1)):
+        dx[i] = ax[i] + dx[i+1] * bi[i]
+        dy[i] = ay[i] + dy[i+1] * bi[i]
+
+    coords = [points[0]]
+    for i in range(len(points)-1):
+        coords += [(points[i][0] + dx[i], points[i][1] + dy[i]),
+                   (points[i+1][0] - dx[i+1], points[i+1][1] - dy[i+1]),
+                   points[i+1]]
+    return [MOVETO] + [CURVETO] * (len(points)-1), coords
+
+def _polyline_distance(pts, poly):
+    """The distance from each point to the nearest edge of a polyline"""
+    a, b = poly[:-1], poly[1:]
+    ab = b - a
+    ap = pts[:,None] - a[None]
+    t = np.clip((ap * ab).sum(-1) / np.maximum((ab * ab).sum(-1), 1e-12), 0, 1)
+    closest = a + t[..., None] * ab
+    return np.hypot(*(pts[:,None] - closest).T).T.min(axis=1)
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(KernelTests))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(ScalarEquivalenceTests))
+    return suite
@@ -0,0 +1,222 @@
+# encoding: utf-8
+import unittest
+import numpy as np
+from plotdevice.lib import kernels
+from plotdevice.lib.pathdata import PathData, MOVETO, LINETO, CURVETO, CLOSE, QUADTO, affine, transform_all
+
+class PathDataTests(unittest.TestCase):
+    def square(self):
+        data = PathData()
+        data.moveto(0, 0)
+        data.lineto(10, 0)
+        data.lineto(10, 10)
+        data.lineto(0, 10)
+        data.closepath()
+        return data
+
+    def test_elements(self):
+        data = self.square()
+        data.curveto(1, 2, 3, 4, 5, 6)
+        self.assertEqual(len(data), 7)
+        self.assertEqual(data[0], (MOVETO, ((0, 0),)))
+        self.assertEqual(data[-1], (CURVETO, ((1, 2), (3, 4), (5, 6))))
+        self.assertEqual(data[4], (CLOSE, ()))
+        self.assertEqual([cmd for cmd, pts in data], [MOVETO, LINETO, LINETO, LINETO, CLOSE, MOVETO, CURVETO])
+        self.assertEqual(data[1:3], [(LINETO, ((10, 0),)), (LINETO, ((10, 10),))])
+        with self.assertRaises(IndexError):
+            data[7]
+
+    def test_implicit_moveto(self):
+        data = PathData()
+        data.lineto(5, 5)
+        self.assertEqual(data[0], (MOVETO, ((0, 0),)))
+
+        # continuing after a closepath starts a new contour at the old one's origin
+        data = self.square()
+        self.assertEqual(data.current, (0, 0))
+        data.lineto(20, 20)
+        self.assertEqual(data[5], (MOVETO, ((0, 0),)))
+        self.assertEqual(len(data.contours()), 2)
+
+        # closing an empty path is a no-op
+        data = PathData()
+        data.closepath()
+        self.assertEqual(len(data), 0)
+
+    def test_growth(self):
+        data = PathData(capacity=1)
+        for i in range(100):
+            data.lineto(i, i)
+        cmds, pts = data.arrays
+        self.assertEqual(len(cmds), 101)
+        self.assertEqual(pts.shape, (101, 2))
+        self.assertEqual(pts[-1].tolist(), [99, 99])
+
+    def test_arrays(self):
+        data = self.square()
+        cmds, pts = data.arrays
+        self.assertEqual(cmds.dtype, np.uint8)
+        self.assertEqual(pts.dtype, np.float64)
+        self.assertFalse(cmds.flags.writeable or pts.flags.writeable)
+        self.assertTrue(np.shares_memory(pts, data.arrays[1]))
+
+        clone = PathData.from_arrays(cmds, pts)
+        self.assertEqual(list(clone), list(data))
+        self.assertFalse(np.shares_memory(pts, clone.arrays[1]))
+
+    def test_from_points(self):
+        pts = np.array([(0, 0), (10, 0), (10, 10), (0, 10)])
+        data = PathData.from_points(pts, closed=True)
+        self.assertEqual(list(data), list(self.square()))
+        self.assertEqual(data.current, (0, 0))
+
+        # buffer-protocol objects with flat x,y sequences are reshaped
+        from array import array
+        flat = PathData.from_points(memoryview(array('d', pts.ravel())))
+        self.assertEqual(flat.arrays[0].tolist(), [MOVETO, LINETO, LINETO, LINETO])
+        self.assertEqual(flat.arrays[1].tolist(), pts.tolist())
+
+        self.assertEqual(len(PathData.from_points(np.empty((0, 2)))), 0)
+        with self.assertRaises(ValueError):
+            PathData.from_points([1, 2, 3])
+
+    def test_polyline(self):
+        data = PathData()
+        data.polyline([(0, 0), (10, 0), (10, 10)])
+        data.polyline(np.array([(0, 10)]))
+        data.closepath()
+        self.assertEqual(list(data), list(self.square()))
+
+        # a closed contour gets reopened at its origin
+        data.polyline([(5, 5)])
+        self.assertEqual(data[5:], [(MOVETO, ((0, 0),)), (LINETO, ((5, 5),))])
+
+    def test_from_commands(self):
+        data = PathData.from_commands([MOVETO, LINETO, CURVETO, CLOSE], [(0, 0), (5, 0), (1, 2), (3, 4), (5, 6)])
+        self.assertEqual(data[2], (CURVETO, ((1, 2), (3, 4), (5, 6))))
+
+        # moves are implied at the start and after closepaths
+        data = PathData.from_commands([CLOSE, LINETO, LINETO, CLOSE, LINETO], [5, 0, 5, 5, 9, 9])
+        incremental = PathData()
+        incremental.lineto(5, 0)
+        incremental.lineto(5, 5)
+        incremental.closepath()
+        incremental.lineto(9, 9)
+        self.assertEqual(list(data), list(incremental))
+        self.assertEqual(data.current, (9, 9))
+
+        with self.assertRaises(ValueError):
+            PathData.from_commands([MOVETO, LINETO], [(0, 0)])
+        with self.assertRaises(ValueError):
+            PathData.from_commands([MOVETO, QUADTO], [(0, 0), (1, 1), (2, 2)])
+
+    def test_quadratic(self):
+        data = PathData()
+        data.moveto(0, 0)
+        data.append(QUADTO, [(3, 3), (6, 0)])
+        self.assertEqual(data[1], (CURVETO, ((2, 2), (4, 2), (6, 0))))
+        with self.assertRaises(ValueError):
+            data.append(99)
+
+    def test_segments(self):
+        data = self.square()
+        data.moveto(50, 50)
+        data.curveto(60, 50, 70, 60, 70, 70)
+        cmds, segs = data.segments()
+        self.assertEqual(cmds.tolist(), [LINETO, LINETO, LINETO, CLOSE, MOVETO, CURVETO])
+        self.assertEqual(segs.shape, (6, 4, 2))
+        self.assertEqual(segs[0].tolist(), [[0, 0], [0, 0], [10, 0], [10, 0]])
+        self.assertEqual(segs[3].tolist(), [[0, 10], [0, 10], [0, 0], [0, 0]])
+        self.assertEqual(segs[4].tolist(), [[50, 50]]*4)
+        self.assertEqual(segs[5].tolist(), [[50, 50], [60, 50], [70, 60], [70, 70]])
+
+    def test_cache(self):
+        data = self.square()
+        segs = data.segments()
+        self.assertIs(segs, data.segments())
+        clone = data.copy()
+        self.assertIs(segs, clone.segments())
+        data.lineto(5, 5)
+        self.assertIsNot(segs, data.segments())
+        self.assertIs(segs, clone.segments())
+
+        # values computed after copying are shared by the unmodified copies
+        twin = clone.copy()
+        bounds = twin.cached('bounds', lambda d: object())
+        self.assertIs(bounds, clone.cached('bounds', lambda d: object()))
+        self.assertIsNot(bounds, data.cached('bounds', lambda d: object()))
+        twin.closepath()
+        self.assertIsNot(bounds, twin.cached('bounds', lambda d: object()))
+        self.assertIs(bounds, clone.cached('bounds', lambda d: object()))
+
+        # a copy modified before anything was cached mustn't share values with the original
+        original = PathData()
+        original.moveto(0, 0)
+        original.lineto(10, 10)
+        changed = original.copy()
+        changed.lineto(100, 100)
+        self.assertEqual(original.cached('bounds', kernels.extents), (0, 0, 10, 10))
+        self.assertEqual(changed.cached('bounds', kernels.extents), (0, 0, 100, 100))
+
+        # every modification bumps the version
+        version = data.version
+        for mutate in (lambda: data.moveto(1, 1), lambda: data.curveto(1, 2, 3, 4, 5, 6),
+                       lambda: data.closepath(), lambda: data.extend(clone),
+                       lambda: data.transform([1, 0, 0, 1, 5, 5])):
+            mutate()
+            self.assertGreater(data.version, version)
+            version = data.version
+
+    def test_transform(self):
+        data = self.square()
+        data.transform([2, 0, 0, 3, 1, 1])
+        self.assertEqual(data[2], (LINETO, ((21, 31),)))
+        data.transform([0, 1, -1, 0, 0, 0]) # rotate by 90°
+        self.assertEqual(data[2], (LINETO, ((-31, 21),)))
+
+    def test_affine(self):
+        pts = np.array([(0., 0.), (1., 2.), (-3., 4.)])
+        moved = affine(pts, [0, 1, -1, 0, 10, 20])
+        self.assertEqual(moved.tolist(), [[10, 20], [8, 21], [6, 17]])
+        self.assertEqual(pts[1].tolist(), [1, 2])
+
+        # writing back into the input array
+        self.assertIs(affine(pts, [2, 0, 0, 2, 0, 0], out=pts), pts)
+        self.assertEqual(pts[2].tolist(), [-6, 8])
+        with self.assertRaises(ValueError):
+            affine([1, 2, 3], [1, 0, 0, 1, 0, 0])
+
+        # transforming many paths at once matches doing them one by one
+        paths = [self.square(), PathData(), PathData.from_points(np.arange(20.).reshape(-1, 2))]
+        matrix = [0.5, 1, -2, 0.25, 7, -3]
+        expected = [p.copy() for p in paths]
+        for p in expected:
+            p.transform(matrix)
+        segs = paths[0].segments()
+        transform_all(paths, matrix)
+        self.assertEqual([list(p) for p in paths], [list(p) for p in expected])
+        self.assertIsNot(segs, paths[0].segments())
+
+    def test_splicing(self):
+        data = self.square()
+        data.moveto(50, 50)
+        data.lineto(60, 60)
+        first, second = data.contours()
+        self.assertEqual(len(first), 5)
+        self.assertEqual(list(second), [(MOVETO, ((50, 50),)), (LINETO, ((60, 60),))])
+
+        spliced = data.spliced(1, 1, [LINETO, LINETO], [(5, 0), (10, 0)])
+        self.assertEqual(len(spliced), len(data)+1)
+        self.assertEqual(spliced[1:3], [(LINETO, ((5, 0),)), (LINETO, ((10, 0),))])
+        self.assertEqual(spliced[3:], data[2:])
+
+        extended = PathData()
+        extended.extend(first)
+        extended.extend(second)
+        self.assertEqual(list(extended), list(data))
+        self.assertEqual(extended.current, (60, 60))
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(PathDataTests))
+    return suite
@@ -0,0 +1,137 @@
+# encoding: utf-8
+import unittest
+import numpy as np
+from plotdevice.lib.vectors import PointArray
+from plotdevice.lib.spatial import KDTree, SpatialHash, bbox_overlaps
+
+def _brute_nearest(pts, q, k):
+    d = np.hypot(*(pts - q).T)
+    order = np.lexsort([np.arange(len(pts)), d])[:k]
+    return order, d[order]
+
+class KDTreeTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(24601)
+        self.pts = rng.rand(2000, 2) * 500
+        self.queries = rng.rand(100, 2) * 600 - 50
+        self.tree = KDTree(self.pts, leafsize=8)
+
+    def test_nearest(self):
+        for q in self.queries:
+            for k in (1, 7):
+                idx, dist = self.tree.nearest(q, k)
+                expected, expected_dist = _brute_nearest(self.pts, q, k)
+                self.assertEqual(idx.tolist(), expected.tolist())
+                self.assertTrue(np.allclose(dist, expected_dist))
+
+        # batches of queries give one row per point
+        idx, dist = self.tree.nearest(PointArray(self.queries), k=3)
+        self.assertEqual(idx.shape, (100, 3))
+        self.assertEqual(idx[5].tolist(), self.tree.nearest(tuple(self.queries[5]), 3)[0].tolist())
+
+        # k is capped at the number of points
+        self.assertEqual(len(KDTree([(0, 0), (1, 1)]).nearest((5, 5), k=10)[0]), 2)
+
+    def test_within(self):
+        for q in self.queries:
+            found = self.tree.within(q, 40)
+            dist = np.hypot(*(self.pts - q).T)
+            self.assertEqual(sorted(found.tolist()), np.flatnonzero(dist <= 40).tolist())
+            self.assertTrue((np.diff(dist[found]) >= 0).all())
+
+        found = self.tree.within(self.queries[:10], 40)
+        self.assertEqual(len(found), 10)
+        self.assertEqual(found[3].tolist(), self.tree.within(self.queries[3], 40).tolist())
+
+    def test_inputs(self):
+        pts = [tuple(p) for p in self.pts[:50]]
+        for points in (pts, PointArray(pts), np.array(pts).ravel()):
+            tree = KDTree(points)
+            self.assertEqual(len(tree), 50)
+            self.assertEqual(tree.nearest(pts[10])[0].tolist(), [10])
+
+        empty = KDTree(np.empty((0, 2)))
+        self.assertEqual(len(empty.nearest((1, 2))[0]), 0)
+        self.assertEqual(len(empty.within((1, 2), 10)), 0)
+
+    def test_updates(self):
+        tree = KDTree(self.pts, leafsize=8, rebuild_ratio=0.5)
+        pts = self.pts.copy()
+
+        # inserted & moved points are found before (and after) the tree is rebuilt
+        added = tree.insert([(1000, 1000), (-1000, -1000)])
+        self.assertEqual(added.tolist(), [2000, 2001])
+        self.assertEqual(tree.nearest((990, 990))[0].tolist(), [2000])
+
+        moved = np.arange(0, 2000, 7)
+        pts[moved] = np.random.RandomState(1).rand(len(moved), 2) * 500
+        tree.move(moved, pts[moved])
+        self.assertTrue(len(tree._pending))
+        pts = np.concatenate([pts, [(1000, 1000), (-1000, -1000)]])
+        for q in self.queries[:20]:
+            self.assertEqual(tree.nearest(q, 5)[0].tolist(), _brute_nearest(pts, q, 5)[0].tolist())
+            dist = np.hypot(*(pts - q).T)
+            self.assertEqual(sorted(tree.within(q, 30).tolist()), np.flatnonzero(dist <= 30).tolist())
+
+        # moving more than the rebuild_ratio triggers a rebuild
+        tree.move(np.arange(1500), pts[:1500] + 1)
+        self.assertEqual(len(tree._pending), 0)
+        pts[:1500] += 1
+        self.assertTrue(np.array_equal(tree.points, pts))
+        q = self.queries[0]
+        self.assertEqual(tree.nearest(q, 5)[0].tolist(), _brute_nearest(pts, q, 5)[0].tolist())
+
+        tree.rebuild(self.pts[:100])
+        self.assertEqual(len(tree), 100)
+
+class SpatialHashTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(24680)
+        self.rects = np.column_stack([rng.rand(500, 2) * 1000, rng.rand(500, 2) * 60])
+        self.queries = np.column_stack([rng.rand(50, 2) * 1000, rng.rand(50, 2) * 120])
+
+    def test_query(self):
+        grid = SpatialHash(self.rects.tolist())
+        self.assertEqual(len(grid), 500)
+        for q in self.queries:
+            found = sorted(grid.query(tuple(q)))
+            self.assertEqual(found, np.flatnonzero(bbox_overlaps(self.rects, q)).tolist())
+
+        # touching edges count as overlapping
+        grid = SpatialHash([(0, 0, 10, 10)], ['a'], cellsize=5)
+        self.assertEqual(grid.query((10, 10, 5, 5)), ['a'])
+        self.assertEqual(grid.query((10.5, 0, 5, 5)), [])
+        self.assertEqual(SpatialHash().query((0, 0, 1, 1)), [])
+
+    def test_updates(self):
+        grid = SpatialHash(cellsize=25)
+        ids = grid.insert_many(self.rects[:250].tolist(), items=['r%i' % i for i in range(250)])
+        self.assertEqual(ids, list(range(250)))
+        self.assertEqual(grid.insert(tuple(self.rects[250])), 250)
+        for i in range(0, 250, 3):
+            grid.remove(i)
+        self.assertEqual(len(grid), 251 - len(range(0, 250, 3)))
+
+        live = np.array([i % 3 != 0 for i in range(251)])
+        for q in self.queries:
+            expected = np.flatnonzero(bbox_overlaps(self.rects[:251], q) & live)
+            expected = ['r%i' % i if i < 250 else 250 for i in expected]
+            self.assertEqual(sorted(grid.query(tuple(q)), key=str), sorted(expected, key=str))
+
+    def test_large_spans(self):
+        # giant rects & queries (relative to the cellsize) don't visit every cell they cover
+        grid = SpatialHash(self.rects.tolist(), cellsize=1)
+        big = grid.insert((-1e6, -1e6, 2e6, 2e6), 'big')
+        self.assertIn(big, grid._oversized)
+        rects = np.concatenate([self.rects, [(-1e6, -1e6, 2e6, 2e6)]])
+        for q in [(-1e7, -1e7, 2e7, 2e7), (500, 500, 1e5, 1e5), (2e6, 2e6, 1, 1)] + self.queries[:10].tolist():
+            expected = ['big' if i == big else i for i in np.flatnonzero(bbox_overlaps(rects, q))]
+            self.assertEqual(sorted(grid.query(tuple(q)), key=str), sorted(expected, key=str))
+        grid.remove(big)
+        self.assertEqual(len(grid.query((-1e7, -1e7, 2e7, 2e7))), 500)
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(KDTreeTests))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(SpatialHashTests))
+    return suite
@@ -0,0 +1,85 @@
+# encoding: utf-8
+import unittest
+import numpy as np
+from plotdevice.lib import strokes, kernels
+from plotdevice.lib.pathdata import PathData
+
+def area(data):
+    return kernels.moments(data)[:,0].sum() if len(data) else 0
+
+def inside(data, points):
+    return kernels.winding_numbers(kernels.edge_table(data), points) != 0
+
+def distances(points, line):
+    """The distance from each point to the nearest edge of a polyline"""
+    a, b = line[:-1], line[1:]
+    ab, ap = b - a, points[:,None] - a
+    len2 = (ab * ab).sum(-1)
+    t = np.clip((ap * ab).sum(-1) / np.where(len2 > 0, len2, 1), 0, 1) # (repeated vertices are points)
+    return np.hypot(*(ap - t[..., None] * ab).T).T.min(axis=1)
+
+class StrokeTests(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.RandomState(13579)
+        self.line = PathData.from_points([(0, 0), (100, 0)])
+        self.square = PathData.from_points([(0, 0), (100, 0), (100, 100), (0, 100)], closed=True)
+
+    def test_caps(self):
+        self.assertAlmostEqual(area(strokes.outline(self.line, 10, cap='butt')), 1000)
+        self.assertAlmostEqual(area(strokes.outline(self.line, 10, cap='square')), 1100)
+        rounded = area(strokes.outline(self.line, 10, cap='round', tolerance=0.01))
+        self.assertAlmostEqual(rounded, 1000 + np.pi * 25, delta=0.5)
+
+    def test_joins(self):
+        ring = 110**2 - 90**2
+        self.assertAlmostEqual(area(strokes.outline(self.square, 10, join='miter')), ring)
+        self.assertAlmostEqual(area(strokes.outline(self.square, 10, join='bevel')), ring - 4 * 12.5)
+        rounded = area(strokes.outline(self.square, 10, join='round', tolerance=0.01))
+        self.assertAlmostEqual(rounded, ring - 4 * 25 + np.pi * 25, delta=0.5)
+
+        # sharp corners fall back to bevels past the miter limit
+        spike = PathData.from_points([(0, 0), (100, 5), (0, 10)])
+        self.assertGreater(strokes.outline(spike, 10, miterlimit=100).arrays[1][:,0].max(), 150)
+        self.assertLess(strokes.outline(spike, 10, miterlimit=10).arrays[1][:,0].max(), 106)
+
+    def test_outline(self):
+        # a round-joined, round-capped stroke covers everything within half its width
+        zigzag = np.array([(0, 0), (50, 40), (100, 0), (150, 40), (60, 60), (60, 60), (60, 0)], dtype=float)
+        outline = strokes.outline(PathData.from_points(zigzag), 16, join='round', cap='round')
+        pts = self.rng.rand(20000, 2) * 220 - 30
+        found, dist = inside(outline, pts), distances(pts, zigzag)
+        self.assertGreater((dist > 8.1).sum(), 1000)
+        self.assertGreater((dist < 7.9).sum(), 1000)
+        self.assertFalse((found & (dist > 8.1)).any())
+        self.assertTrue(found[dist < 7.9].all())
+
+        # closed curves get an inner & outer edge (or are filled in if the stroke is wide)
+        k = 0.5522847498 * 50
+        circle = PathData()
+        circle.moveto(50, 0)
+        for (x1, y1), (x2, y2), (x3, y3) in [((50, k), (k, 50), (0, 50)), ((-k, 50), (-50, k), (-50, 0)),
+                                             ((-50, -k), (-k, -50), (0, -50)), ((k, -50), (50, -k), (50, 0))]:
+            circle.curveto(x1, y1, x2, y2, x3, y3)
+        circle.closepath()
+        self.assertAlmostEqual(area(strokes.outline(circle, 10, tolerance=0.01)), np.pi * (55**2 - 45**2), delta=5)
+        self.assertEqual(len(strokes.outline(circle, 10).contours()), 2)
+        self.assertAlmostEqual(area(strokes.outline(circle, 120, tolerance=0.01)), np.pi * 110**2, delta=5)
+        self.assertEqual(len(strokes.outline(PathData(), 10)), 0)
+
+    def test_offset(self):
+        self.assertAlmostEqual(area(strokes.offset(self.square, 10)), 120**2)
+        self.assertAlmostEqual(area(strokes.offset(self.square, -10)), 80**2)
+        self.assertEqual(len(strokes.offset(self.square, -60)), 0)
+        rounded = area(strokes.offset(self.square, 10, join='round', tolerance=0.01))
+        self.assertAlmostEqual(rounded, 100**2 + 4 * 1000 + np.pi * 100, delta=0.5)
+
+        # open contours are shifted sideways, meeting at the corners
+        chevron = PathData.from_points([(0, 0), (50, 50), (100, 0)])
+        shifted = strokes.offset(chevron, -10).arrays[1]
+        self.assertTrue(np.allclose(shifted[1], (50, 50 - 10 * np.sqrt(2))))
+        self.assertTrue(np.allclose(distances(shifted, chevron.arrays[1]), 10))
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(StrokeTests))
+    return suite
@@ -0,0 +1,151 @@
+# encoding: utf-8
+import unittest
+import numpy as np
+from math import atan2, degrees, hypot, cos, sin, radians
+from plotdevice import DeviceError
+from plotdevice.lib.vectors import PointArray, SizeArray, RegionArray, rect_union, rect_intersect
+
+class PointArrayTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(8675309)
+        self.xy = rng.rand(50, 2) * 200 - 100
+        self.pts = PointArray(self.xy)
+
+    def test_construction(self):
+        self.assertEqual(len(self.pts), 50)
+        self.assertFalse(np.shares_memory(self.pts.array, self.xy))
+        self.assertEqual(PointArray([(1, 2), (3, 4)]).array.tolist(), [[1, 2], [3, 4]])
+        self.assertEqual(PointArray([1, 2, 3, 4]).array.tolist(), [[1, 2], [3, 4]])
+        self.assertEqual(PointArray(iter([(1, 2)])).array.tolist(), [[1, 2]])
+        self.assertEqual(PointArray().array.shape, (0, 2))
+        self.assertEqual(np.asarray(self.pts).tolist(), self.xy.tolist())
+        with self.assertRaises(DeviceError):
+            PointArray([1, 2, 3])
+
+    def test_elements(self):
+        self.assertEqual(self.pts[3], tuple(self.xy[3]))
+        self.assertEqual(list(self.pts)[-1], tuple(self.xy[-1]))
+        self.assertIsInstance(self.pts[1:4], PointArray)
+        self.assertEqual(len(self.pts[self.pts.x > 0]), (self.xy[:,0] > 0).sum())
+
+        self.pts[0] = (5, 6)
+        self.pts.y = 0
+        self.assertEqual(self.pts[0], (5, 0))
+        self.assertTrue((self.pts.array[:,1] == 0).all())
+
+    def test_arithmetic(self):
+        pts = self.pts
+        self.assertTrue(np.allclose((pts + 1).array, self.xy + 1))
+        self.assertTrue(np.allclose((pts * (2, 3)).array, self.xy * [2, 3]))
+        self.assertTrue(np.allclose((10 - pts).array, 10 - self.xy))
+        self.assertTrue(np.allclose((1 / pts).array, 1 / self.xy))
+        self.assertTrue(np.allclose((pts - pts).array, 0))
+        self.assertTrue(np.allclose((-abs(pts)).array, -abs(self.xy)))
+        self.assertIsInstance(self.xy + pts, PointArray)
+
+        # in-place ops reuse the buffer
+        buf = pts.array
+        pts += (1, 1)
+        pts *= 2
+        self.assertIs(pts.array, buf)
+        self.assertTrue(np.allclose(buf, (self.xy + 1) * 2))
+
+    def test_trig(self):
+        # compare against the scalar versions in pathmatics' pure-python fallbacks
+        pts, (x1, y1) = self.pts, (12, -7)
+        angles = pts.angle(x1, y1)
+        dists = pts.distance(x1, y1)
+        for (x0, y0), a, d in zip(self.xy, angles, dists):
+            self.assertAlmostEqual(a, degrees(atan2(y1-y0, x1-x0)))
+            self.assertAlmostEqual(d, hypot(x1-x0, y1-y0))
+
+        # per-element targets
+        others = pts[::-1]
+        self.assertTrue(np.allclose(pts.distance(others), np.hypot(*(self.xy - self.xy[::-1]).T)))
+
+        moved = pts.coordinates(10, 30)
+        for (x0, y0), (x, y) in zip(self.xy, moved):
+            self.assertAlmostEqual(x, x0 + cos(radians(30)) * 10)
+            self.assertAlmostEqual(y, y0 + sin(radians(30)) * 10)
+
+        reflected = pts.reflect(x1, y1, 0.5, 90)
+        self.assertTrue(np.allclose(reflected.array, pts.coordinates(dists * 0.5, angles + 90).array))
+        self.assertTrue(np.allclose(pts.reflect((x1, y1)).array, 2*self.xy - (x1, y1)))
+
+class SizeArrayTests(unittest.TestCase):
+    def test_dimensions(self):
+        sizes = SizeArray([(10, 20), (30, 40)])
+        self.assertEqual(sizes.w.tolist(), [10, 30])
+        self.assertEqual(sizes.height.tolist(), [20, 40])
+        sizes.width = 5
+        self.assertEqual((sizes * 2).array.tolist(), [[10, 40], [10, 80]])
+
+class RegionArrayTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(31337)
+        self.rects = np.column_stack([rng.rand(500, 2) * 100, rng.rand(500, 2) * 40 - 5])
+        self.regions = RegionArray(self.rects)
+        self.other = (30, 40, 25, 20)
+
+    def test_rect_math(self):
+        self.assertEqual(rect_union((0, 0, 10, 10), (5, -5, 10, 10)), (0, -5, 15, 15))
+        self.assertEqual(rect_union((0, 0, 0, 10), (5, 5, 1, 1)), (5, 5, 1, 1))
+        self.assertEqual(rect_union((0, 0, -1, 10), (5, 5, 0, 0)), (0, 0, 0, 0))
+        self.assertEqual(rect_intersect((0, 0, 10, 10), (5, 5, 10, 10)), (5, 5, 5, 5))
+        self.assertEqual(rect_intersect((0, 0, 10, 10), (10, 0, 10, 10)), (0, 0, 0, 0))
+        self.assertEqual(rect_intersect((0, 0, 10, 10), (2, 2, 0, 5)), (0, 0, 0, 0))
+
+    def test_construction(self):
+        self.assertEqual(len(self.regions), 500)
+        self.assertEqual(self.regions[3], tuple(self.rects[3]))
+        self.assertEqual(RegionArray([((1, 2), (3, 4))]).array.tolist(), [[1, 2, 3, 4]])
+        self.assertEqual(RegionArray().array.shape, (0, 4))
+        self.assertTrue(np.allclose(self.regions.right, self.rects[:,0] + self.rects[:,2]))
+        self.assertIsInstance(self.regions.origin, PointArray)
+        self.assertTrue(np.shares_memory(self.regions.size.array, self.regions.array))
+        with self.assertRaises(DeviceError):
+            RegionArray([(1, 2, 3)])
+
+    def test_elementwise(self):
+        # compare against the scalar functions for a single rect & for pairs of rects
+        flipped = RegionArray(self.rects[::-1])
+        for op, scalar in (('union', rect_union), ('intersect', rect_intersect)):
+            single = getattr(self.regions, op)(*self.other)
+            paired = getattr(self.regions, op)(flipped)
+            for rect, flip, r1, r2 in zip(self.rects, self.rects[::-1], single, paired):
+                self.assertTrue(np.allclose(r1, scalar(rect, self.other)))
+                self.assertTrue(np.allclose(r2, scalar(rect, flip)))
+
+        full = (self.rects[:,2] > 0) & (self.rects[:,3] > 0)
+        overlaps = self.regions.intersect(self.other).w > 0
+        self.assertEqual(self.regions.intersects(self.other).tolist(), overlaps.tolist())
+
+        enclosing = self.regions.encloses(self.other)
+        same = self.regions.union(self.other).array == self.rects
+        self.assertEqual(enclosing.tolist(), (same.all(axis=1) & full).tolist())
+
+        shifted = self.regions.shift(1, 2).inset((3, 4))
+        self.assertTrue(np.allclose(shifted.array, self.rects + (4, 6, -6, -8)))
+
+    def test_union_all(self):
+        expected = (0, 0, 0, 0)
+        for rect in self.rects:
+            expected = rect_union(expected, rect)
+        self.assertTrue(np.allclose(self.regions.union_all(), expected))
+        self.assertEqual(RegionArray().union_all(), (0, 0, 0, 0))
+
+    def test_contains(self):
+        pts = PointArray(np.random.RandomState(1).rand(500, 2) * 120)
+        inside = self.regions.contains(pts)
+        x, y, w, h = self.rects.T
+        px, py = pts.x, pts.y
+        expected = (w > 0) & (h > 0) & (px >= x) & (px < x+w) & (py >= y) & (py < y+h)
+        self.assertEqual(inside.tolist(), expected.tolist())
+        self.assertEqual(self.regions.contains(50, 50).sum(), self.regions.contains((50, 50)).sum())
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(PointArrayTests))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(SizeArrayTests))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(RegionArrayTests))
+    return suite